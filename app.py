@@ -16,9 +16,8 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 try:
     from nebularag.clients.nebula_client import NebulaBlockClient
-    from nebularag.core.rag_pipeline import RAGPipeline
-    from nebularag.utils.file_utils import read_text_files
-    from nebularag.config.settings import get_settings
+    from nebularag.core.shared_index import SharedIndexRegistry
+    from nebularag.config.settings import load_env_file
 except ImportError as e:
     st.error(f"Import error: {e}")
     st.stop()
@@ -78,11 +77,22 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_registry() -> SharedIndexRegistry:
+    """One client and index registry per server process, shared by every session."""
+    load_env_file()
+    return SharedIndexRegistry(NebulaBlockClient())
+
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 if 'rag_pipeline' not in st.session_state:
     st.session_state.rag_pipeline = None
+if 'index_lease' not in st.session_state:
+    # Holds a reference on the shared index; released on re-init or when the session is dropped
+    st.session_state.index_lease = None
+if 'query_params' not in st.session_state:
+    st.session_state.query_params = (12, 6)
 if 'documents_loaded' not in st.session_state:
     st.session_state.documents_loaded = False
 if 'documents_count' not in st.session_state:
@@ -90,36 +100,41 @@ if 'documents_count' not in st.session_state:
 
 def initialize_rag_pipeline(docs_path: str, chunk_size: int = 800, chunk_overlap: int = 120, 
                           top_k: int = 12, rerank_k: int = 6) -> bool:
-    """Initialize the RAG pipeline with documents."""
+    """Attach this session to the shared index for these settings, building it if needed."""
     try:
-        with st.spinner("🔄 Initializing RAG pipeline..."):
-            # Initialize client
-            client = NebulaBlockClient()
-            
-            # Create RAG pipeline
-            rag = RAGPipeline(client, chunk_size=chunk_size, top_k=top_k, rerank_k=rerank_k)
-            
-            # Read documents
-            docs = read_text_files(docs_path)
-            
-            if not docs:
-                st.error("❌ No documents found in the specified directory!")
-                return False
-            
-            # Index documents
-            num_chunks = rag.index_texts(docs)
-            
-            # Store in session state
-            st.session_state.rag_pipeline = rag
-            st.session_state.documents_loaded = True
-            st.session_state.documents_count = len(docs)
-            
-            st.success(f"✅ Successfully loaded {len(docs)} documents and indexed {num_chunks} chunks!")
-            return True
-            
+        lease = get_registry().acquire(docs_path, chunk_size, chunk_overlap)
     except Exception as e:
         st.error(f"❌ Error initializing RAG pipeline: {str(e)}")
         return False
+    
+    old_lease = st.session_state.index_lease
+    st.session_state.index_lease = lease
+    st.session_state.query_params = (top_k, rerank_k)
+    st.session_state.rag_pipeline = None
+    st.session_state.documents_loaded = False
+    if old_lease is not None:
+        old_lease.release()
+    return True
+
+def sync_pipeline_status() -> None:
+    """Show build progress for this session's shared index; attach the pipeline once ready."""
+    lease = st.session_state.index_lease
+    if lease is None or st.session_state.rag_pipeline is not None:
+        return
+    index = lease.index
+    if index.status == "building":
+        st.progress(index.progress, text=f"🔄 Indexing documents... {index.docs_done}/{index.docs_total or '?'}")
+        index.wait(timeout=1.0)
+        st.rerun()
+    elif index.status == "failed":
+        st.error(f"❌ Error initializing RAG pipeline: {index.error}")
+        lease.release()
+        st.session_state.index_lease = None
+    else:
+        st.session_state.rag_pipeline = lease.session_pipeline(*st.session_state.query_params)
+        st.session_state.documents_loaded = True
+        st.session_state.documents_count = index.docs_total
+        st.success(f"✅ Ready: {index.docs_total} documents, {index.chunks} chunks (shared across sessions)")
 
 def ask_question(question: str) -> Dict[str, Any]:
     """Ask a question to the RAG pipeline."""
@@ -169,6 +184,7 @@ def main():
         
         # Status
         st.subheader("📊 Status")
+        sync_pipeline_status()
         if st.session_state.documents_loaded:
             st.markdown(f'<p class="status-success">✅ Pipeline Ready</p>', unsafe_allow_html=True)
             st.markdown(f'<p class="status-info">📚 {st.session_state.documents_count} documents loaded</p>', unsafe_allow_html=True)
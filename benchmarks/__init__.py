@@ -0,0 +1 @@
+"""Offline benchmarks: mock NebulaBlock server, synthetic corpora and runners."""
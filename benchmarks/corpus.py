@@ -0,0 +1,96 @@
+"""Synthetic corpora and embedding sets for benchmarks."""
+
+import random
+from typing import List, Optional
+
+import numpy as np
+
+# Small fixed vocabulary with a Zipf-like frequency so generated text has the
+# skew of real prose (frequent function words, long tail of content words).
+_VOCAB_SIZE = 5000
+
+
+def _vocabulary(rng: random.Random) -> List[str]:
+    letters = "etaoinshrdlucmfwypvbgkqjxz"
+    words = set()
+    while len(words) < _VOCAB_SIZE:
+        length = max(2, int(rng.expovariate(1 / 6)))
+        words.add("".join(rng.choice(letters[: 8 + length]) for _ in range(length)))
+    return sorted(words)
+
+
+def generate_documents(
+    n_docs: int,
+    words_per_doc: int = 600,
+    duplicate_ratio: float = 0.0,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Generate markdown-like documents with headings, paragraphs and sentences.
+
+    Args:
+        n_docs: Number of documents
+        words_per_doc: Approximate number of words per document
+        duplicate_ratio: Fraction of documents that repeat an earlier one
+            (boilerplate pages), for exercising deduplication
+        seed: Random seed
+
+    Returns:
+        List of document texts
+    """
+    rng = random.Random(seed)
+    vocab = _vocabulary(rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    docs: List[str] = []
+    for d in range(n_docs):
+        if docs and rng.random() < duplicate_ratio:
+            docs.append(rng.choice(docs))
+            continue
+        words = rng.choices(vocab, weights=weights, k=words_per_doc)
+        parts = [f"# Document {d}\n"]
+        i = 0
+        while i < len(words):
+            if rng.random() < 0.1:
+                parts.append(f"\n## Section {i}\n")
+            sentences = []
+            for _ in range(rng.randint(2, 6)):
+                length = rng.randint(6, 20)
+                sentence = " ".join(words[i:i + length])
+                i += length
+                if sentence:
+                    sentences.append(sentence.capitalize() + ".")
+            parts.append(" ".join(sentences) + "\n")
+        docs.append("\n".join(parts))
+    return docs
+
+
+def generate_embeddings(
+    n: int,
+    dim: int,
+    n_clusters: Optional[int] = None,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Generate unit-norm float32 embeddings.
+
+    Real embeddings are clustered by topic, which matters for approximate
+    indexes; with ``n_clusters`` the vectors are drawn around random centers.
+
+    Args:
+        n: Number of vectors
+        dim: Dimension of each vector
+        n_clusters: Optional number of topic clusters
+        seed: Random seed
+
+    Returns:
+        Array of shape (n, dim)
+    """
+    rng = np.random.default_rng(seed)
+    if n_clusters:
+        centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+        labels = rng.integers(0, n_clusters, size=n)
+        vectors = centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    else:
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality vs. speed evaluation for vector index configurations.
+
+The exact InMemoryVectorStore is the ground truth. Every candidate index
+configuration is built over the same embeddings and scored on recall@k and
+MRR against it, together with query latency, build time and memory, so
+operating points can be chosen with data.
+
+Usage:
+  python benchmarks/eval_retrieval.py --n 20000 --dim 1024 --output eval.json
+  python benchmarks/eval_retrieval.py --embeddings corpus.npy --queries queries.npy
+  python benchmarks/eval_retrieval.py --only exact int8 "truncate:256"
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from nebularag.core.reduction import PCAReducer, ReducedVectorStore
+from nebularag.core.sharded_store import ShardedVectorStore
+from nebularag.core.vector_store import InMemoryVectorStore
+from nebularag.utils.stats import latency_summary
+
+from benchmarks.corpus import generate_embeddings
+
+SearchFn = Callable[[np.ndarray, int], List[Tuple[int, float]]]
+
+
+# ------------------------------ Candidates ----------------------------- #
+def _exact(embeddings: np.ndarray) -> SearchFn:
+    store = InMemoryVectorStore()
+    store.add([""] * len(embeddings), embeddings)
+    return lambda q, k: store.search(q, k=k)
+
+
+def _binary(embeddings: np.ndarray, factor: int) -> SearchFn:
+    store = InMemoryVectorStore(binary_prefilter=True, shortlist_factor=factor, min_shortlist=1)
+    store.add([""] * len(embeddings), embeddings)
+    return lambda q, k: store.search(q, k=k)
+
+
+def _threaded(embeddings: np.ndarray, threads: int) -> SearchFn:
+    store = InMemoryVectorStore(search_threads=threads, block_rows=max(1024, len(embeddings) // (4 * threads)))
+    store.add([""] * len(embeddings), embeddings)
+    return lambda q, k: store.search(q, k=k)
+
+
+def _sharded(embeddings: np.ndarray, shards: int) -> SearchFn:
+    store = ShardedVectorStore(shards)
+    store.add([""] * len(embeddings), embeddings)
+    return lambda q, k: store.search(q, k=k)
+
+
+def _normalized(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    k = min(k, len(scores))
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx])]
+    return [(int(i), float(scores[i])) for i in idx]
+
+
+def _float16(embeddings: np.ndarray) -> SearchFn:
+    matrix = _normalized(embeddings).astype(np.float16)
+    return lambda q, k: _top_k(matrix @ _normalized(q[None, :])[0].astype(np.float16), k)
+
+
+def _int8(embeddings: np.ndarray) -> SearchFn:
+    unit = _normalized(embeddings)
+    scale = np.abs(unit).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.round(unit / scale).astype(np.int8)
+
+    def search(q: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        weighted = (_normalized(q[None, :])[0] * scale).astype(np.float32)
+        return _top_k(codes @ weighted, k)
+
+    return search
+
+
+def _truncate(embeddings: np.ndarray, dims: int) -> SearchFn:
+    matrix = _normalized(embeddings[:, :dims])
+    return lambda q, k: _top_k(matrix @ _normalized(q[None, :dims])[0], k)
+
+
+def _pca(embeddings: np.ndarray, dims: int, rescore_k: int = 0) -> SearchFn:
+    store = ReducedVectorStore(PCAReducer(dims, min_fit_rows=dims), rescore_k=rescore_k)
+    store.add([""] * len(embeddings), embeddings)
+    return lambda q, k: store.search(q, k=k)
+
+
+# name -> (factory(embeddings, param), description). Parameterized entries are
+# selected as "name:param", e.g. "truncate:256".
+CANDIDATES: Dict[str, Tuple[Callable[..., SearchFn], str]] = {
+    "exact": (lambda e, _: _exact(e), "InMemoryVectorStore (ground truth)"),
+    "float16": (lambda e, _: _float16(e), "float16 matrix, brute force"),
+    "int8": (lambda e, _: _int8(e), "per-dimension int8 scalar quantization"),
+    "truncate": (lambda e, p: _truncate(e, int(p)), "first N dimensions (Matryoshka-style)"),
+    "binary": (lambda e, p: _binary(e, int(p or 10)), "sign-code Hamming shortlist of N*k, exact rerank"),
+    "threaded": (lambda e, p: _threaded(e, int(p or 4)), "exact search over row blocks on N threads"),
+    "sharded": (lambda e, p: _sharded(e, int(p or 4)), "exact search split over N worker processes (memory not traced)"),
+    "pca": (lambda e, p: _pca(e, int(p)), "PCA projection to N dimensions"),
+    "pca-rescore": (lambda e, p: _pca(e, int(p), rescore_k=100), "PCA to N, top 100 rescored at full width"),
+}
+
+
+def default_configs(dim: int) -> List[str]:
+    """Configurations swept when none are selected explicitly."""
+    configs = ["exact", "float16", "int8", "binary:5", "binary:20"]
+    configs += [f"truncate:{d}" for d in (dim // 2, dim // 4, dim // 8) if d >= 16]
+    configs += [f"pca:{dim // 4}", f"pca-rescore:{dim // 4}"] if dim >= 64 else []
+    return configs
+
+
+def build(config: str, embeddings: np.ndarray) -> Tuple[SearchFn, float, int]:
+    """
+    Build one configuration.
+
+    Returns:
+        Tuple of (search function, build seconds, traced bytes allocated)
+    """
+    name, _, param = config.partition(":")
+    if name not in CANDIDATES:
+        raise ValueError(f"Unknown configuration: {config} (choose from {', '.join(CANDIDATES)})")
+    factory = CANDIDATES[name][0]
+    tracemalloc.start()
+    start = time.perf_counter()
+    search = factory(embeddings, param or None)
+    seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return search, seconds, memory
+
+
+# ------------------------------- Metrics ------------------------------- #
+def recall_at_k(truth: Sequence[int], found: Sequence[int], k: int) -> float:
+    """Fraction of the exact top-k that the candidate also returned in its top-k."""
+    return len(set(truth[:k]) & set(found[:k])) / min(k, len(truth)) if truth else 1.0
+
+
+def reciprocal_rank(truth_top1: int, found: Sequence[int]) -> float:
+    """1 / rank of the exact best hit in the candidate's results (0 if missing)."""
+    for rank, idx in enumerate(found, 1):
+        if idx == truth_top1:
+            return 1.0 / rank
+    return 0.0
+
+
+def evaluate(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    configs: List[str],
+    k: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    Score every configuration against exact search.
+
+    Args:
+        embeddings: Corpus matrix of shape (n, dim)
+        queries: Query matrix of shape (q, dim)
+        configs: Configuration names, e.g. ["exact", "int8", "truncate:256"]
+        k: Cutoff for recall@k and MRR@k
+
+    Returns:
+        One result dict per configuration
+    """
+    exact_search, _, _ = build("exact", embeddings)
+    truth = [[i for i, _ in exact_search(q, k)] for q in queries]
+
+    results = []
+    for config in configs:
+        search, build_s, memory = build(config, embeddings)
+        latencies: List[float] = []
+        recalls: List[float] = []
+        rr: List[float] = []
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = [i for i, _ in search(q, k)]
+            latencies.append(time.perf_counter() - start)
+            recalls.append(recall_at_k(expected, found, k))
+            rr.append(reciprocal_rank(expected[0], found) if expected else 1.0)
+        results.append({
+            "config": config,
+            f"recall@{k}": float(np.mean(recalls)),
+            f"mrr@{k}": float(np.mean(rr)),
+            "latency_ms": latency_summary(latencies),
+            "build_s": build_s,
+            "memory_bytes": memory,
+        })
+    return results
+
+
+def load_matrix(path: str) -> np.ndarray:
+    """Load embeddings from .npy or the first array of an .npz file."""
+    data = np.load(path)
+    if isinstance(data, np.lib.npyio.NpzFile):
+        key = "embeddings" if "embeddings" in data.files else data.files[0]
+        data = data[key]
+    return np.asarray(data, dtype=np.float32)
+
+
+def print_table(results: List[Dict[str, Any]], k: int) -> None:
+    """Print results in a fixed-width table."""
+    print(f"\n{'config':<18}{'recall@' + str(k):>11}{'mrr@' + str(k):>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'build s':>9}{'memory MB':>11}")
+    for r in results:
+        print(f"{r['config']:<18}{r[f'recall@{k}']:>11.3f}{r[f'mrr@{k}']:>9.3f}"
+              f"{r['latency_ms']['p50']:>9.2f}{r['latency_ms']['p95']:>9.2f}"
+              f"{r['build_s']:>9.2f}{r['memory_bytes'] / 1e6:>11.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the evaluation sweep."""
+    parser = argparse.ArgumentParser(description="Recall vs. speed evaluation of index configurations")
+    parser.add_argument("--embeddings", help="Saved corpus embeddings (.npy/.npz); synthetic if omitted")
+    parser.add_argument("--queries", help="Saved query embeddings (.npy/.npz); sampled from the corpus if omitted")
+    parser.add_argument("--n", type=int, default=5000, help="Synthetic corpus size (default: 5000)")
+    parser.add_argument("--dim", type=int, default=512, help="Synthetic dimension (default: 512)")
+    parser.add_argument("--num-queries", type=int, default=100, help="Number of queries (default: 100)")
+    parser.add_argument("--k", type=int, default=10, help="Cutoff for recall/MRR (default: 10)")
+    parser.add_argument("--only", nargs="+", help="Configurations to evaluate, e.g. exact int8 truncate:256")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.embeddings:
+        embeddings = load_matrix(args.embeddings)
+    else:
+        embeddings = generate_embeddings(args.n, args.dim, n_clusters=64)
+    if args.queries:
+        queries = load_matrix(args.queries)
+    else:
+        # Perturbed corpus vectors behave like paraphrased questions; the
+        # noise has norm ~0.5 whatever the dimension.
+        rng = np.random.default_rng(7)
+        picks = rng.integers(0, len(embeddings), size=args.num_queries)
+        dim = embeddings.shape[1]
+        noise = rng.standard_normal((args.num_queries, dim)).astype(np.float32) * (0.5 / np.sqrt(dim))
+        queries = embeddings[picks] / np.linalg.norm(embeddings[picks], axis=1, keepdims=True) + noise
+
+    configs = args.only or default_configs(embeddings.shape[1])
+    print(f"Evaluating {len(configs)} configurations on {len(embeddings)} x {embeddings.shape[1]} "
+          f"with {len(queries)} queries...")
+    results = evaluate(embeddings, queries, configs, k=args.k)
+    print_table(results, args.k)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"n": len(embeddings), "dim": int(embeddings.shape[1]), "k": args.k, "results": results}, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Local stand-in for the NebulaBlock inference API.
+
+Serves the same JSON shapes as the real service for /embeddings, /rerank and
+/chat/completions, with configurable latency, so the full client and
+pipeline can be benchmarked without network access or API spend.
+
+Usage: python benchmarks/mock_server.py --port 8900 --dim 1024 --latency-ms 20
+"""
+
+import argparse
+import base64
+import collections
+import gzip
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def hashed_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic bag-of-words embedding: texts sharing words are similar."""
+    vec = [0.0] * dim
+    for word in _WORD_RE.findall(text.lower()):
+        h = zlib.crc32(word.encode("utf-8"))
+        vec[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    return vec
+
+
+class MockNebulaHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the NebulaBlock endpoints."""
+
+    server: "MockNebulaServer"
+    protocol_version = "HTTP/1.1"
+
+    def _embeddings(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        texts = payload.get("input") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        dim = self.server.dim
+        if isinstance(payload.get("dimensions"), int):
+            dim = min(dim, payload["dimensions"])
+        encode = payload.get("encoding_format") == "base64"
+        data = []
+        for i, t in enumerate(texts):
+            emb: Any = hashed_embedding(t, dim)
+            if encode:
+                emb = base64.b64encode(np.asarray(emb, dtype="<f4").tobytes()).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": emb})
+        return {"object": "list", "model": payload.get("model"), "data": data}, len(texts)
+
+    def _rerank(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        query_words = set(_WORD_RE.findall(str(payload.get("query", "")).lower()))
+        documents = payload.get("documents") or []
+        scored = []
+        for i, doc in enumerate(documents):
+            words = set(_WORD_RE.findall(str(doc).lower()))
+            overlap = len(query_words & words) / (len(query_words) or 1)
+            scored.append({"index": i, "relevance_score": overlap})
+        scored.sort(key=lambda item: item["relevance_score"], reverse=True)
+        top_n = payload.get("top_n")
+        if isinstance(top_n, int):
+            scored = scored[:top_n]
+        return {"model": payload.get("model"), "results": scored}, len(documents)
+
+    def _chat(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        messages = payload.get("messages") or [{}]
+        prompt = str(messages[-1].get("content", ""))
+        content = f"Mock answer based on {len(prompt)} characters of prompt."
+        return {
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+        }, 1
+
+    def do_POST(self) -> None:
+        routes = {
+            "/embeddings": MockNebulaHandler._embeddings,
+            "/rerank": MockNebulaHandler._rerank,
+            "/chat/completions": MockNebulaHandler._chat,
+        }
+        path = self.path[len(self.server.prefix):] if self.path.startswith(self.server.prefix) else self.path
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            raw = gzip.decompress(raw)
+        route = routes.get(path)
+        if route is None:
+            self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        try:
+            payload = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self._send(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        if not self.server.admit():
+            self.server.count("throttled")
+            self._send(429, {"error": "Rate limit exceeded"},
+                       {"Retry-After": f"{self.server.retry_after_s:g}"})
+            return
+
+        body, items = route(self, payload)
+        self.server.delay(path, items)
+        self.server.count(path)
+        self._send(200, body)
+
+    def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class MockNebulaServer(ThreadingHTTPServer):
+    """
+    Threaded mock server.
+
+    Each response is delayed by ``latency_ms + per_item_ms * items``, where
+    items is the number of inputs, documents or chat messages, plus uniform
+    jitter of up to ``jitter_ms``. With ``max_rps`` set, requests beyond that
+    many in the last second get a 429 with ``Retry-After: retry_after_s``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        dim: int = 1024,
+        latency_ms: float = 0.0,
+        per_item_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        prefix: str = "/v1",
+        max_rps: Optional[float] = None,
+        retry_after_s: float = 1.0,
+    ) -> None:
+        super().__init__((host, port), MockNebulaHandler)
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+        self.jitter_ms = jitter_ms
+        self.prefix = prefix
+        self.max_rps = max_rps
+        self.retry_after_s = retry_after_s
+        self._admitted: "collections.deque[float]" = collections.deque()
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to give NebulaBlockClient."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.prefix}"
+
+    def delay(self, path: str, items: int) -> None:
+        seconds = (self.latency_ms + self.per_item_ms * items + random.uniform(0, self.jitter_ms)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def admit(self) -> bool:
+        """Sliding one-second window check against ``max_rps``."""
+        if self.max_rps is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            while self._admitted and now - self._admitted[0] >= 1.0:
+                self._admitted.popleft()
+            if len(self._admitted) >= self.max_rps:
+                return False
+            self._admitted.append(now)
+            return True
+
+    def count(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self) -> "MockNebulaServer":
+        """Serve from a background thread and return self."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background thread and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockNebulaServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """Run the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Mock NebulaBlock API for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding dimension (default: 1024)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed latency per request")
+    parser.add_argument("--per-item-ms", type=float, default=0.0, help="Extra latency per input item")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform random extra latency")
+    parser.add_argument("--max-rps", type=float, help="Answer 429 above this many requests per second")
+    args = parser.parse_args()
+
+    server = MockNebulaServer(args.host, args.port, args.dim, args.latency_ms, args.per_item_ms, args.jitter_ms,
+                              max_rps=args.max_rps)
+    print(f"Mock NebulaBlock API on {server.base_url} (Ctrl+C to stop)")
+    print(f"  NEBULABLOCK_BASE_URL={server.base_url} NEBULABLOCK_API_KEY=mock")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...", file=sys.stderr)
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Offline performance benchmarks for NebulaRAG.
+
+Runs against the local mock NebulaBlock server, so no API key or network is
+needed, and writes machine-readable results for comparing runs.
+
+Usage:
+  python benchmarks/run_benchmarks.py --output results.json
+  python benchmarks/run_benchmarks.py --quick --compare results.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from nebularag.clients.nebula_client import NebulaBlockClient
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.core.vector_store import InMemoryVectorStore
+from nebularag.utils.stats import latency_summary
+
+from benchmarks.corpus import generate_documents, generate_embeddings
+from benchmarks.mock_server import MockNebulaServer
+
+
+def _client(server: MockNebulaServer) -> NebulaBlockClient:
+    return NebulaBlockClient(base_url=server.base_url, api_key="mock")
+
+
+def bench_ingest(server: MockNebulaServer, n_docs: int, words_per_doc: int) -> Dict[str, Any]:
+    """Split, dedup, embed (mock) and store a synthetic corpus."""
+    docs = generate_documents(n_docs, words_per_doc, duplicate_ratio=0.1)
+    rag = RAGPipeline(_client(server))
+    start = time.perf_counter()
+    chunks = rag.index_texts(docs)
+    seconds = time.perf_counter() - start
+    total_chars = sum(len(d) for d in docs)
+    return {
+        "docs": n_docs,
+        "chunks": chunks,
+        "seconds": seconds,
+        "docs_per_s": n_docs / seconds,
+        "chunks_per_s": chunks / seconds,
+        "mb_per_s": total_chars / seconds / 1e6,
+    }
+
+
+def bench_search(sizes: List[int], dim: int, queries: int) -> List[Dict[str, Any]]:
+    """Search latency of the vector store as the corpus grows."""
+    results = []
+    query_vectors = generate_embeddings(queries, dim, seed=1)
+    for size in sizes:
+        store = InMemoryVectorStore()
+        store.add([f"chunk {i}" for i in range(size)], generate_embeddings(size, dim, n_clusters=32))
+        latencies = []
+        for q in query_vectors:
+            start = time.perf_counter()
+            store.search(q, k=10)
+            latencies.append(time.perf_counter() - start)
+        results.append({"size": size, "dim": dim, "queries": queries, "latency_ms": latency_summary(latencies)})
+    return results
+
+
+def bench_end_to_end(server: MockNebulaServer, n_queries: int, concurrency: int) -> Dict[str, Any]:
+    """Full answer() path (embed, search, rerank, chat) under concurrency."""
+    rag = RAGPipeline(_client(server))
+    rag.index_texts(generate_documents(50, 400, seed=2))
+    questions = [f"What does section {i} say about document {i % 50}?" for i in range(n_queries)]
+
+    def timed(question: str) -> float:
+        start = time.perf_counter()
+        rag.answer(question)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, questions))
+    wall = time.perf_counter() - start
+    return {
+        "queries": n_queries,
+        "concurrency": concurrency,
+        "qps": n_queries / wall,
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def bench_memory(n: int, dim: int) -> Dict[str, Any]:
+    """Python heap used by a store of ``n`` embeddings of ``dim`` floats."""
+    embeddings = generate_embeddings(n, dim)
+    texts = [f"chunk {i} " * 40 for i in range(n)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = InMemoryVectorStore()
+    store.add(texts, embeddings)
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return {
+        "vectors": n,
+        "dim": dim,
+        "bytes": used,
+        "bytes_per_vector": used / n,
+        "raw_float32_bytes_per_vector": dim * 4,
+        "size": store.size(),
+    }
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]) -> None:
+    if isinstance(value, dict):
+        for key, sub in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, sub, out)
+    elif isinstance(value, list):
+        for item in value:
+            label = item.get("size", len(out)) if isinstance(item, dict) else len(out)
+            _flatten(f"{prefix}[{label}]", item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the relative change of every numeric result against a baseline."""
+    now: Dict[str, float] = {}
+    before: Dict[str, float] = {}
+    _flatten("", current["results"], now)
+    _flatten("", baseline["results"], before)
+    print("\n" + "="*60)
+    print("COMPARISON WITH BASELINE:")
+    print("="*60)
+    for key in sorted(now):
+        if key in before and before[key]:
+            change = (now[key] - before[key]) / before[key]
+            print(f"{key:<55} {before[key]:>12.3f} -> {now[key]:>12.3f} ({change:+.1%})")
+
+
+def main() -> int:
+    """Run the selected benchmarks and write results."""
+    parser = argparse.ArgumentParser(description="NebulaRAG offline benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write JSON results")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=["ingest", "search", "e2e", "memory"],
+                       help="Run a subset of the benchmarks")
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding dimension (default: 1024)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Mock API latency per request")
+    parser.add_argument("--per-item-ms", type=float, default=0.05, help="Mock API latency per input item")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent e2e requests")
+    args = parser.parse_args()
+
+    quick = args.quick
+    selected = set(args.only or ["ingest", "search", "e2e", "memory"])
+    dim = min(args.dim, 256) if quick else args.dim
+    results: Dict[str, Any] = {}
+
+    with MockNebulaServer(dim=dim, latency_ms=args.latency_ms, per_item_ms=args.per_item_ms) as server:
+        runs: Dict[str, Callable[[], Any]] = {
+            "ingest": lambda: bench_ingest(server, 20 if quick else 200, 800),
+            "search": lambda: bench_search([500, 2000] if quick else [1000, 5000, 20000], dim, 10 if quick else 50),
+            "e2e": lambda: bench_end_to_end(server, 20 if quick else 200, args.concurrency),
+            "memory": lambda: bench_memory(1000 if quick else 10000, dim),
+        }
+        for name, run in runs.items():
+            if name not in selected:
+                continue
+            print(f"Running {name} benchmark...")
+            start = time.perf_counter()
+            results[name] = run()
+            print(f"  done in {time.perf_counter() - start:.1f}s: {json.dumps(results[name])[:200]}")
+        results["mock_requests"] = dict(server.requests)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+            "dim": dim,
+            "mock_latency_ms": args.latency_ms,
+            "mock_per_item_ms": args.per_item_ms,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            compare(report, json.load(fh))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
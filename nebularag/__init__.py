@@ -1,9 +1,25 @@
 """NebulaRAG - A minimal RAG pipeline with NebulaBlock integration."""
 
-from .clients import NebulaBlockClient
-from .core import RAGPipeline, InMemoryVectorStore
-from .utils import split_text, read_text_files
-from .config import get_settings
+from typing import TYPE_CHECKING
+
+from ._lazy import attach
+
+if TYPE_CHECKING:
+    from .clients import NebulaBlockClient
+    from .config import get_settings
+    from .core import InMemoryVectorStore, RAGPipeline
+    from .utils import read_text_files, split_text
+
+# Public names are imported on first access, so ``import nebularag`` stays
+# cheap and does not pull in NumPy or optional dependencies
+_LAZY = {
+    "NebulaBlockClient": ".clients",
+    "RAGPipeline": ".core",
+    "InMemoryVectorStore": ".core",
+    "split_text": ".utils",
+    "read_text_files": ".utils",
+    "get_settings": ".config",
+}
 
 __all__ = [
     "NebulaBlockClient",
@@ -16,3 +32,4 @@ __all__ = [
 
 __version__ = "0.1.0"
 
+__getattr__, __dir__ = attach(__name__, _LAZY, __all__)
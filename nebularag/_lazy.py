@@ -0,0 +1,39 @@
+"""Lazy exports for package ``__init__`` modules."""
+
+import importlib
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+def attach(
+    package: str, lazy: Dict[str, str], names: Iterable[str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build a package's ``__getattr__`` and ``__dir__`` for names imported on first access.
+
+    Usage in an ``__init__.py``::
+
+        __getattr__, __dir__ = attach(__name__, _LAZY, __all__)
+
+    Args:
+        package: The package's ``__name__``
+        lazy: Public name -> relative module that defines it
+        names: The package's ``__all__``, listed by ``dir()`` before first access
+
+    Returns:
+        Tuple of (``__getattr__``, ``__dir__``)
+    """
+    names = list(names)
+
+    def __getattr__(name: str) -> Any:
+        if name not in lazy:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(lazy[name], package), name)
+        # Cache on the package so later lookups skip __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(names))
+
+    return __getattr__, __dir__
@@ -0,0 +1,186 @@
+"""Batch question answering with bounded concurrency and resumable output."""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from ..core.rag_pipeline import RAGPipeline
+from ..utils.stats import latency_summary
+
+
+def read_questions(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Stream questions from a JSONL or plain text file.
+
+    JSONL lines are objects with a ``question`` field and an optional ``id``;
+    any other file is read as one question per non-empty line. Questions
+    without an id are numbered by their line.
+
+    Args:
+        path: Path to the questions file
+
+    Yields:
+        (question id, question) tuples
+
+    Raises:
+        ValueError: If a JSONL line is malformed or has no question
+    """
+    is_jsonl = Path(path).suffix.lower() in (".jsonl", ".json")
+    with open(path, "r", encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if not is_jsonl:
+                yield str(line_no), line
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON: {e}")
+            question = item.get("question") if isinstance(item, dict) else None
+            if not isinstance(question, str) or not question.strip():
+                raise ValueError(f"{path}:{line_no}: missing 'question'")
+            yield str(item.get("id", line_no)), question
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    Collect ids already answered in an existing output file.
+
+    A torn last line left by a crash is cut off so new results append
+    cleanly. Lines recording an error are not counted, so those questions
+    are retried.
+
+    Args:
+        output_path: Path to the results JSONL file
+
+    Returns:
+        Set of question ids with a stored answer
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, "rb+") as fh:
+        data = fh.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            fh.truncate(complete)
+
+    for line in data[:complete].decode("utf-8", errors="replace").splitlines():
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(item, dict) and "error" not in item and "id" in item:
+            done.add(str(item["id"]))
+    return done
+
+
+def _answer_one(rag: RAGPipeline, qid: str, question: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result = rag.answer(question)
+        record: Dict[str, Any] = {
+            "id": qid,
+            "question": question,
+            "answer": result["answer"],
+            "sources": result["sources"],
+        }
+    except Exception as e:
+        record = {"id": qid, "question": question, "error": str(e)}
+    record["latency_s"] = time.perf_counter() - start
+    return record
+
+
+def run_batch(
+    rag: RAGPipeline,
+    input_path: str,
+    output_path: str,
+    concurrency: int = 8,
+    resume: bool = True,
+) -> Dict[str, Any]:
+    """
+    Answer every question in ``input_path`` and stream results to ``output_path``.
+
+    At most ``concurrency`` questions are in flight at once and the input is
+    read lazily, so memory stays flat for very large question sets. Each
+    result is written and flushed as soon as it finishes; with ``resume`` the
+    output file doubles as a checkpoint and answered questions are skipped.
+
+    Args:
+        rag: Pipeline whose index has already been built
+        input_path: Questions file (JSONL or one question per line)
+        output_path: Results JSONL file
+        concurrency: Maximum number of questions answered in parallel
+        resume: Skip questions already answered in ``output_path``
+
+    Returns:
+        Summary with counts, wall time, throughput and latency percentiles
+    """
+    if concurrency <= 0:
+        raise ValueError("concurrency must be positive")
+
+    done = load_checkpoint(output_path) if resume else set()
+    mode = "a" if resume else "w"
+    latencies: List[float] = []
+    answered = failed = 0
+    skipped = 0
+    started = time.perf_counter()
+
+    with open(output_path, mode, encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending: Set[Future] = set()
+
+        def drain(block_until_below: int) -> None:
+            nonlocal pending, answered, failed
+            while len(pending) >= block_until_below and pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    latencies.append(record["latency_s"])
+                    if "error" in record:
+                        failed += 1
+                    else:
+                        answered += 1
+
+        for qid, question in read_questions(input_path):
+            if qid in done:
+                skipped += 1
+                continue
+            drain(concurrency)
+            pending.add(pool.submit(_answer_one, rag, qid, question))
+        drain(1)
+
+    wall = time.perf_counter() - started
+    processed = answered + failed
+    return {
+        "answered": answered,
+        "failed": failed,
+        "skipped": skipped,
+        "wall_s": wall,
+        "questions_per_s": processed / wall if wall > 0 else 0.0,
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    """Print a batch summary in the CLI's report style."""
+    latency = summary["latency_ms"]
+    print("\n" + "="*60)
+    print("BATCH SUMMARY:")
+    print("="*60)
+    print(f"Answered: {summary['answered']}  Failed: {summary['failed']}  "
+          f"Skipped (checkpoint): {summary['skipped']}")
+    print(f"Wall time: {summary['wall_s']:.2f}s  Throughput: {summary['questions_per_s']:.2f} questions/s")
+    print(f"Latency: p50 {latency['p50']:.0f} ms  p95 {latency['p95']:.0f} ms  "
+          f"p99 {latency['p99']:.0f} ms  max {latency['max']:.0f} ms")
+    if summary["failed"]:
+        print(f"Warning: {summary['failed']} questions failed; re-run to retry them.", file=sys.stderr)
@@ -1,19 +1,31 @@
 import argparse
+import dataclasses
 import os
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
 from ..clients.nebula_client import NebulaBlockClient
-from ..core.rag_pipeline import RAGPipeline
-from ..utils.file_utils import read_text_files
-from ..config import get_settings
+from ..utils.tokenization import RegexTokenizer
+from ..utils.tracing import Tracer
+from ..config.settings import Settings
 
+# The pipeline, stores, server and batch runner pull in NumPy; they are
+# imported where used so that `--help` and argument errors stay fast.
+if TYPE_CHECKING:
+    from ..core.rag_pipeline import RAGPipeline
 
-def build_client_from_env() -> NebulaBlockClient:
+
+def build_client_from_env(
+    tracer: Optional[Tracer] = None, embedding_dimensions: Optional[int] = None
+) -> NebulaBlockClient:
     """
     Build NebulaBlockClient from environment variables.
     
+    Args:
+        tracer: Optional tracer for HTTP request spans
+        embedding_dimensions: Ask the API for Matryoshka-truncated embeddings
+        
     Returns:
         Configured NebulaBlockClient instance
         
@@ -36,27 +48,387 @@ def build_client_from_env() -> NebulaBlockClient:
         embeddings_path=os.environ.get("NEBULABLOCK_EMBEDDINGS_PATH"),
         rerank_path=os.environ.get("NEBULABLOCK_RERANK_PATH"),
         chat_path=os.environ.get("NEBULABLOCK_CHAT_PATH"),
+        tracer=tracer,
+        embedding_dimensions=embedding_dimensions,
+    )
+
+
+def settings_from_args(args: argparse.Namespace) -> Settings:
+    """The environment's settings with the command line options applied on top."""
+    return dataclasses.replace(
+        Settings.from_env(),
+        default_chunk_size=args.chunk_size,
+        default_chunk_overlap=args.chunk_overlap,
+        default_top_k=args.top_k,
+        default_rerank_k=args.rerank_k,
+        chunk_unit=args.chunk_unit,
+        dedup_threshold=args.dedup_threshold,
+        dim_reduction=args.dim_reduction,
+        embedding_dim=args.embedding_dim,
+        rescore_k=args.rescore_k,
+        binary_prefilter=args.binary_prefilter,
+        batch_window_ms=args.batch_window_ms,
+        max_batch=args.max_batch,
+        speculative=args.speculative,
+        cache_size=args.cache_size,
+        cache_ttl=args.cache_ttl,
+        search_threads=args.search_threads,
+        shards=args.shards,
+        index_path=args.index_path,
+        import_embeddings=args.import_embeddings,
+        export_embeddings=args.export_embeddings,
+        tracing=args.trace,
     )
 
 
 def validate_args(args: argparse.Namespace) -> None:
-    """Validate command line arguments."""
-    if args.chunk_overlap >= args.chunk_size:
-        raise ValueError("chunk-overlap must be less than chunk-size")
-    if args.chunk_size <= 0:
-        raise ValueError("chunk-size must be positive")
-    if args.chunk_overlap < 0:
-        raise ValueError("chunk-overlap must be non-negative")
-    if args.top_k <= 0:
-        raise ValueError("top-k must be positive")
-    if args.rerank_k <= 0:
-        raise ValueError("rerank-k must be positive")
+    """Validate command line arguments with the same rules as :meth:`Settings.validate`."""
+    settings_from_args(args).validate()
     if args.rerank_k > args.top_k:
         print(f"Warning: rerank-k ({args.rerank_k}) > top-k ({args.top_k})", file=sys.stderr)
 
 
-def main() -> None:
+def add_pipeline_args(parser: argparse.ArgumentParser) -> None:
+    """Add the document and pipeline options shared by every command."""
+    # Option defaults come from the environment (and .env) via Settings
+    defaults = Settings.from_env()
+    parser.add_argument("--docs", required=True, help="Path to docs directory (txt/md)")
+    parser.add_argument("--chunk-size", type=int, default=defaults.default_chunk_size,
+                       help="Size of text chunks (default: %(default)s)")
+    parser.add_argument("--chunk-overlap", type=int, default=defaults.default_chunk_overlap,
+                       help="Overlap between chunks (default: %(default)s)")
+    parser.add_argument("--chunk-unit", choices=["chars", "tokens"], default=defaults.chunk_unit,
+                       help="Unit for chunk size and overlap (default: %(default)s)")
+    parser.add_argument("--top-k", type=int, default=defaults.default_top_k,
+                       help="Number of candidates to retrieve (default: %(default)s)")
+    parser.add_argument("--rerank-k", type=int, default=defaults.default_rerank_k,
+                       help="Number of candidates after reranking (default: %(default)s)")
+    parser.add_argument("--dedup-threshold", type=float, default=defaults.dedup_threshold,
+                       help="Drop chunks at least this similar to an indexed one; 0 disables (default: %(default)s)")
+    parser.add_argument("--dim-reduction", choices=["none", "api", "truncate", "pca"],
+                       default=defaults.dim_reduction,
+                       help="Reduce embeddings to --embedding-dim: request Matryoshka dims from the API, "
+                            "truncate locally, or fit a PCA projection (default: %(default)s)")
+    parser.add_argument("--embedding-dim", type=int, default=defaults.embedding_dim,
+                       help="Target embedding dimension for --dim-reduction")
+    parser.add_argument("--rescore-k", type=int, default=defaults.rescore_k,
+                       help="Re-rank this many reduced candidates with full-width vectors (default: 0, off)")
+    parser.add_argument("--binary-prefilter", action="store_true", default=defaults.binary_prefilter,
+                       help="Shortlist by Hamming distance of 1-bit sign codes, then exact cosine "
+                            "(faster on very large indexes, slightly lower recall)")
+    parser.add_argument("--batch-window-ms", type=float, default=defaults.batch_window_ms,
+                       help="Collect concurrent query embeddings for this long and send them as one "
+                            "request (default: 0, off)")
+    parser.add_argument("--max-batch", type=int, default=defaults.max_batch,
+                       help="Most queries per micro-batched request (default: %(default)s)")
+    parser.add_argument("--speculative", action="store_true", default=defaults.speculative,
+                       help="Start chat on the dense top results while reranking; keep the answer when "
+                            "the reranker agrees (lower latency, extra chat calls on disagreement)")
+    parser.add_argument("--cache-size", type=int, default=defaults.cache_size,
+                       help="Cache retrieval results for this many distinct questions; any index "
+                            "change invalidates them (default: 0, off)")
+    parser.add_argument("--cache-ttl", type=float, default=defaults.cache_ttl,
+                       help="Seconds a cached retrieval result stays valid (default: %(default)s)")
+    parser.add_argument("--search-threads", type=int, default=defaults.search_threads,
+                       help="Score row blocks of large indexes on this many threads (default: %(default)s)")
+    parser.add_argument("--shards", type=int, default=defaults.shards,
+                       help="Split the index over this many worker processes searched in parallel "
+                            "(default: 0, single process)")
+    parser.add_argument("--index-path", default=defaults.index_path,
+                       help="Load the index from this .npz if it exists, otherwise build it and save it there")
+    parser.add_argument("--import-embeddings", default=defaults.import_embeddings,
+                       help="Load precomputed chunks and embeddings (.npz, .parquet, .arrow or an .npy "
+                            "directory) instead of indexing --docs")
+    parser.add_argument("--export-embeddings", default=defaults.export_embeddings,
+                       help="After indexing, write chunks and embeddings here in the same formats")
+    parser.add_argument("--trace", action="store_true", default=defaults.tracing,
+                       help="Time every pipeline stage and HTTP call and report percentiles")
+
+
+def _store_options(store: Any) -> Dict[str, Any]:
+    """The options a store was built with, named like the CLI flags."""
+    from ..core.reduction import ReducedVectorStore
+    from ..core.sharded_store import ShardedVectorStore
+
+    if isinstance(store, ReducedVectorStore):
+        return {
+            "dim-reduction": store.reducer.method,
+            "embedding-dim": store.reducer.dim,
+            "rescore-k": store.rescore_k,
+        }
+    if isinstance(store, ShardedVectorStore):
+        options = store.store_options
+        return {
+            "dim-reduction": "none",
+            "shards": store.num_shards,
+            "binary-prefilter": options.get("binary_prefilter", False),
+            "search-threads": options.get("search_threads", 1),
+        }
+    return {
+        "dim-reduction": "none",
+        "shards": 0,
+        "binary-prefilter": store.binary_prefilter,
+        "search-threads": store.search_threads,
+    }
+
+
+def check_loaded_index(args: argparse.Namespace, requested: Any, rag: "RAGPipeline") -> None:
+    """
+    Make sure an index loaded from --index-path matches the other options.
+
+    Raises:
+        ValueError: If the saved index was built with other chunking or
+            store options than the ones given; it must be rebuilt for them
+            to take effect
+    """
+    wanted = _store_options(requested)
+    saved = _store_options(rag.store)
+    metadata = rag.index_metadata
+    for key in ("chunk_size", "chunk_overlap", "chunk_unit"):
+        # Indexes saved before chunking was recorded don't say
+        if key in metadata:
+            wanted[key.replace("_", "-")] = getattr(args, key)
+            saved[key.replace("_", "-")] = metadata[key]
+    differences = [
+        f"--{key} {wanted[key]} (index: {saved.get(key)})"
+        for key in wanted if saved.get(key) != wanted[key]
+    ]
+    if differences:
+        raise ValueError(
+            f"Index {args.index_path} was built with other options: {', '.join(differences)}. "
+            f"Delete it to rebuild, or drop those options"
+        )
+
+
+def build_pipeline(args: argparse.Namespace) -> "RAGPipeline":
+    """
+    Build a pipeline from parsed arguments and index the docs directory.
+    
+    Args:
+        args: Parsed arguments from a parser set up by add_pipeline_args
+        
+    Returns:
+        RAGPipeline with all documents indexed
+    """
+    from ..core.rag_pipeline import RAGPipeline
+    from ..core.vector_store import InMemoryVectorStore
+
+    print("Initializing NebulaBlock client...")
+    tracer = Tracer() if args.trace else None
+    client = build_client_from_env(
+        tracer, embedding_dimensions=args.embedding_dim if args.dim_reduction == "api" else None
+    )
+    if args.batch_window_ms > 0:
+        from ..clients.batching import BatchingClient
+
+        client = BatchingClient(client, max_batch=args.max_batch, max_wait_ms=args.batch_window_ms)
+    
+    print("Setting up RAG pipeline...")
+    tokenizer = None
+    if args.chunk_unit == "tokens":
+        tokenizer = RegexTokenizer(Settings.from_env().tokenizer_vocab_path)
+    store = None
+    if args.dim_reduction in ("truncate", "pca"):
+        from ..core.reduction import ReducedVectorStore, make_reducer
+
+        store = ReducedVectorStore(make_reducer(args.dim_reduction, args.embedding_dim), rescore_k=args.rescore_k)
+    elif args.shards:
+        from ..core.sharded_store import ShardedVectorStore
+
+        store = ShardedVectorStore(
+            args.shards, binary_prefilter=args.binary_prefilter, search_threads=args.search_threads
+        )
+    elif args.binary_prefilter or args.search_threads > 1:
+        store = InMemoryVectorStore(binary_prefilter=args.binary_prefilter, search_threads=args.search_threads)
+    rag = RAGPipeline(
+        client,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        top_k=args.top_k,
+        rerank_k=args.rerank_k,
+        tokenizer=tokenizer,
+        dedup_threshold=args.dedup_threshold,
+        tracer=tracer,
+        store=store,
+        speculative=args.speculative,
+        cache_size=args.cache_size,
+        cache_ttl_s=args.cache_ttl,
+    )
+
+    if args.index_path and os.path.exists(args.index_path):
+        print(f"Loading index from {args.index_path}...")
+        requested = rag.store
+        loaded = rag.load_index(args.index_path)
+        if requested is not rag.store and hasattr(requested, "close"):
+            # Stop the workers of a sharded store the saved index replaced
+            requested.close()
+        check_loaded_index(args, requested, rag)
+        print(f"Loaded {loaded} chunks.")
+        if args.import_embeddings:
+            print(f"Warning: --import-embeddings is ignored because {args.index_path} exists",
+                  file=sys.stderr)
+    else:
+        if args.import_embeddings:
+            print(f"Importing embeddings from {args.import_embeddings}...")
+            print(f"Imported {rag.import_embeddings(args.import_embeddings)} chunks.")
+        else:
+            print(f"Indexing documents from {args.docs}...")
+            num_chunks = rag.index_files(args.docs)
+            print(f"Indexed {num_chunks} chunks.")
+            if rag.dedup is not None and rag.dedup.stats.dropped:
+                stats = rag.dedup.stats
+                print(f"Skipped {stats.dropped} duplicate chunks "
+                      f"({stats.exact_duplicates} exact, {stats.near_duplicates} near; "
+                      f"{stats.savings:.1%} of text not embedded).")
+        if args.index_path:
+            rag.save_index(args.index_path)
+            print(f"Saved index to {args.index_path}")
+    if args.export_embeddings:
+        print(f"Exported {rag.export_embeddings(args.export_embeddings)} chunks to {args.export_embeddings}")
+    return rag
+
+
+def print_trace_summary(tracer: Tracer) -> None:
+    """Print per-stage latency percentiles collected by a tracer."""
+    summary = tracer.summary()
+    if not summary:
+        return
+    print("\n" + "="*60)
+    print("STAGE TIMINGS:")
+    print("="*60)
+    print(f"{'stage':<14}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in summary.items():
+        print(f"{name:<14}{stats['count']:>7}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    http = summary.get("http")
+    if http:
+        print(f"HTTP: {http.get('attempts', 0):.0f} attempts, {http.get('bytes_sent', 0):.0f} bytes sent, "
+              f"{http.get('bytes_received', 0):.0f} bytes received, "
+              f"{http.get('decompress_s', 0) * 1000:.1f} ms decompressing")
+
+
+def run_command(command: Callable[[], None]) -> None:
+    """Run a CLI command, turning expected failures into an error exit."""
+    try:
+        command()
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user.", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def serve(argv: List[str]) -> None:
+    """Index once, then answer questions over a local HTTP/JSON API."""
+    from .server import DEFAULT_MAX_BODY_BYTES, run_server
+
+    parser = argparse.ArgumentParser(
+        prog="nebularag serve",
+        description="Serve a warm NebulaRAG index over HTTP/JSON",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Endpoints:
+  POST /answer    {"question": "..."}
+  POST /retrieve  {"question": "...", "k": 5}
+  POST /index     {"texts": ["..."]} or {"docs": "path"} (under --docs)
+  GET  /metrics   request rate and latency percentiles
+                  (?format=prometheus for Prometheus text format)
+        """
+    )
+    add_pipeline_args(parser)
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    parser.add_argument("--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES,
+                        help=f"Reject POST bodies larger than this (default: {DEFAULT_MAX_BODY_BYTES})")
+    args = parser.parse_args(argv)
+
+    try:
+        validate_args(args)
+        if args.max_body_bytes < 0:
+            raise ValueError("max-body-bytes must be non-negative")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    def command() -> None:
+        rag = build_pipeline(args)
+        run_server(
+            rag,
+            host=args.host,
+            port=args.port,
+            verbose=args.verbose,
+            max_body_bytes=args.max_body_bytes,
+            docs_root=args.docs,
+        )
+
+    run_command(command)
+
+
+def batch(argv: List[str]) -> None:
+    """Index once, then answer a file of questions concurrently."""
+    from .batch import print_summary, run_batch
+
+    parser = argparse.ArgumentParser(
+        prog="nebularag batch",
+        description="Answer many questions against one NebulaRAG index",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Input is JSONL ({"id": ..., "question": ...} per line) or plain text with
+one question per line. Results are appended to the output JSONL as they
+finish; re-running with the same output resumes where it stopped.
+        """
+    )
+    add_pipeline_args(parser)
+    parser.add_argument("--input", required=True, help="Questions file (.jsonl or text)")
+    parser.add_argument("--output", required=True, help="Results file (.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=8,
+                       help="Questions answered in parallel (default: 8)")
+    parser.add_argument("--no-resume", action="store_true",
+                       help="Overwrite the output instead of resuming from it")
+    args = parser.parse_args(argv)
+
+    try:
+        validate_args(args)
+        if args.concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        if not os.path.isfile(args.input):
+            raise ValueError(f"Questions file not found: {args.input}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    def command() -> None:
+        rag = build_pipeline(args)
+        print(f"Answering questions from {args.input} (concurrency {args.concurrency})...")
+        summary = run_batch(
+            rag,
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            resume=not args.no_resume,
+        )
+        print_summary(summary)
+        if rag.tracer.enabled:
+            print_trace_summary(rag.tracer)
+
+    run_command(command)
+
+
+COMMANDS = {"serve": serve, "batch": batch}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Main CLI entry point for the RAG pipeline."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+
     parser = argparse.ArgumentParser(
         description="NebulaRAG - Minimal RAG pipeline with NebulaBlock",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -64,20 +436,14 @@ def main() -> None:
 Examples:
   %(prog)s --docs docs --question "What is the main topic?"
   %(prog)s --docs docs --question "Explain X" --chunk-size 1000 --top-k 15
+  %(prog)s serve --docs docs --port 8000
+  %(prog)s batch --docs docs --input questions.jsonl --output answers.jsonl
         """
     )
-    parser.add_argument("--docs", required=True, help="Path to docs directory (txt/md)")
+    add_pipeline_args(parser)
     parser.add_argument("--question", required=True, help="Question to ask")
-    parser.add_argument("--chunk-size", type=int, default=800, 
-                       help="Size of text chunks (default: 800)")
-    parser.add_argument("--chunk-overlap", type=int, default=120,
-                       help="Overlap between chunks (default: 120)")
-    parser.add_argument("--top-k", type=int, default=12,
-                       help="Number of candidates to retrieve (default: 12)")
-    parser.add_argument("--rerank-k", type=int, default=6,
-                       help="Number of candidates after reranking (default: 6)")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     try:
         validate_args(args)
@@ -85,26 +451,8 @@ Examples:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    try:
-        print("Initializing NebulaBlock client...")
-        client = build_client_from_env()
-        
-        print("Setting up RAG pipeline...")
-        rag = RAGPipeline(
-            client,
-            chunk_size=args.chunk_size,
-            chunk_overlap=args.chunk_overlap,
-            top_k=args.top_k,
-            rerank_k=args.rerank_k,
-        )
-
-        print(f"Reading documents from {args.docs}...")
-        docs = read_text_files(args.docs)
-        print(f"Found {len(docs)} documents")
-
-        print("Indexing documents...")
-        num_chunks = rag.index_texts(docs)
-        print(f"Indexed {num_chunks} chunks from {len(docs)} files.")
+    def command() -> None:
+        rag = build_pipeline(args)
 
         print("Processing question...")
         result = rag.answer(args.question)
@@ -120,16 +468,11 @@ Examples:
         for i, src in enumerate(result["sources"], start=1):
             first_line = src.splitlines()[0] if src.splitlines() else src[:80]
             print(f"{i}. {first_line[:120]}{'...' if len(first_line) > 120 else ''}")
-            
-    except (FileNotFoundError, ValueError, RuntimeError) as e:
-        print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
-    except KeyboardInterrupt:
-        print("\nOperation cancelled by user.", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"Unexpected error: {e}", file=sys.stderr)
-        sys.exit(1)
+        
+        if rag.tracer.enabled:
+            print_trace_summary(rag.tracer)
+
+    run_command(command)
 
 
 if __name__ == "__main__":
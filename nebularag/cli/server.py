@@ -0,0 +1,288 @@
+"""Long-running HTTP/JSON server that answers questions against a warm index."""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from ..core.rag_pipeline import RAGPipeline
+from ..utils.stats import latency_summary
+
+# Number of recent request latencies kept per endpoint for percentiles.
+_LATENCY_WINDOW = 2048
+# Window in seconds used for the "recent" request rate.
+_RATE_WINDOW = 60.0
+# Largest POST body accepted unless the server is told otherwise (10 MiB).
+DEFAULT_MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class ServerMetrics:
+    """Thread-safe request counters, rates and latency percentiles per endpoint."""
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._recent: Deque[float] = deque()
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        """Record one finished request."""
+        now = time.time()
+        with self._lock:
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+            self._latencies.setdefault(endpoint, deque(maxlen=_LATENCY_WINDOW)).append(seconds)
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - _RATE_WINDOW:
+                self._recent.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the current metrics."""
+        now = time.time()
+        with self._lock:
+            while self._recent and self._recent[0] < now - _RATE_WINDOW:
+                self._recent.popleft()
+            uptime = now - self.started
+            total = sum(self._counts.values())
+            endpoints = {}
+            for endpoint, count in self._counts.items():
+                endpoints[endpoint] = {
+                    "requests": count,
+                    "errors": self._errors.get(endpoint, 0),
+                    "latency_ms": latency_summary(self._latencies[endpoint]),
+                }
+            return {
+                "uptime_s": uptime,
+                "requests": total,
+                "requests_per_s": total / uptime if uptime > 0 else 0.0,
+                "recent_requests_per_s": len(self._recent) / min(_RATE_WINDOW, max(uptime, 1e-9)),
+                "endpoints": endpoints,
+            }
+
+
+class RAGRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API over a shared RAGPipeline.
+
+    Endpoints:
+      - POST /answer   {"question": str, "max_context_docs"?: int}
+      - POST /retrieve {"question": str, "k"?: int}
+      - POST /index    {"texts": [str, ...]} or {"docs": "path/to/dir"}
+      - GET  /metrics[?format=prometheus], GET /health
+
+    ``docs`` must lie inside the server's ``docs_root``; relative paths are
+    taken from there.
+    """
+
+    server: "RAGServer"
+    protocol_version = "HTTP/1.1"
+
+    # ------------------------------ Routes ---------------------------- #
+    def _answer(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        question = self._require_question(body)
+        max_context_docs = body.get("max_context_docs")
+        if max_context_docs is not None and not (isinstance(max_context_docs, int) and max_context_docs > 0):
+            raise ValueError("'max_context_docs' must be a positive integer")
+        return self.server.rag.answer(question, max_context_docs=max_context_docs)
+
+    def _retrieve(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        question = self._require_question(body)
+        rag = self.server.rag
+        snap = rag.snapshot()
+        results = rag.retrieve(question, snap)
+        k = body.get("k")
+        if isinstance(k, int) and k > 0:
+            results = results[:k]
+        texts = snap.texts if snap is not None else rag.store.texts
+        return {
+            "results": [
+                {"index": i, "score": score, "text": texts[i]} for i, score in results
+            ]
+        }
+
+    def _index(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        texts = body.get("texts")
+        docs = body.get("docs") if texts is None else None
+        if not docs and (not isinstance(texts, list) or not all(isinstance(t, str) for t in texts)):
+            raise ValueError("Expected 'texts' (list of strings) or 'docs' (directory path)")
+        # Writers are serialized; readers keep answering from the same store.
+        with self.server.index_lock:
+            if docs:
+                # Streamed from disk so large files are never held whole
+                indexed = self.server.rag.index_files(str(self._docs_path(docs)))
+            else:
+                indexed = self.server.rag.index_texts(texts)
+        return {"indexed": indexed, "size": self.server.rag.store.size()}
+
+    _POST_ROUTES = {"/answer": _answer, "/retrieve": _retrieve, "/index": _index}
+
+    # ----------------------------- Plumbing --------------------------- #
+    def _docs_path(self, docs: Any) -> Path:
+        root = self.server.docs_root
+        if root is None:
+            raise ValueError("Indexing 'docs' is disabled on this server")
+        if not isinstance(docs, str):
+            raise ValueError("'docs' must be a directory path")
+        path = (root / docs).resolve()
+        if not path.is_relative_to(root):
+            raise ValueError(f"'docs' must be inside {root}")
+        return path
+
+    @staticmethod
+    def _require_question(body: Dict[str, Any]) -> str:
+        question = body.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError("Missing 'question'")
+        return question
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, endpoint: str, handler: Any) -> None:
+        start = time.perf_counter()
+        status = 200
+        try:
+            payload = handler()
+        except (ValueError, FileNotFoundError) as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        # Recorded before replying, so a client that reads /metrics next sees it
+        self.server.metrics.record(endpoint, time.perf_counter() - start, status == 200)
+        self._send_json(status, payload)
+
+    def do_POST(self) -> None:
+        route = self._POST_ROUTES.get(self.path)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= self.server.max_body_bytes:
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(400, {
+                "error": f"Content-Length must be between 0 and {self.server.max_body_bytes} bytes"
+            })
+            return
+        raw = self.rfile.read(length) if length else b""
+        if route is None:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        def handler() -> Dict[str, Any]:
+            try:
+                body = json.loads(raw.decode("utf-8") or "{}")
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"Invalid JSON body: {e}")
+            if not isinstance(body, dict):
+                raise ValueError("JSON body must be an object")
+            return route(self, body)
+
+        self._dispatch(self.path, handler)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/metrics":
+            tracer = self.server.rag.tracer
+            if parse_qs(url.query).get("format") == ["prometheus"]:
+                data = tracer.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            metrics = self.server.metrics.snapshot()
+            if tracer.enabled:
+                metrics["stages"] = tracer.summary()
+            resilience = getattr(self.server.rag.client, "resilience_stats", None)
+            if resilience is not None:
+                metrics["client"] = resilience()
+            if self.server.rag.speculative:
+                metrics["speculation"] = self.server.rag.speculation_stats()
+            if self.server.rag.retrieval_cache is not None:
+                metrics["retrieval_cache"] = self.server.rag.cache_stats()
+            batching = getattr(self.server.rag.client, "batch_stats", None)
+            if batching is not None:
+                metrics["batching"] = batching()
+            self._send_json(200, metrics)
+        elif url.path == "/health":
+            self._send_json(200, {"status": "ok", "size": self.server.rag.store.size()})
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class RAGServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one warm RAGPipeline across requests."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        rag: RAGPipeline,
+        verbose: bool = False,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        docs_root: Optional[str] = None,
+    ) -> None:
+        if max_body_bytes < 0:
+            raise ValueError("max_body_bytes must be non-negative")
+        super().__init__(address, RAGRequestHandler)
+        self.rag = rag
+        self.verbose = verbose
+        # Larger request bodies are refused before they are read
+        self.max_body_bytes = max_body_bytes
+        # POST /index may only read directories under this one (None: none)
+        self.docs_root = Path(docs_root).resolve() if docs_root is not None else None
+        self.index_lock = threading.Lock()
+        self.metrics = ServerMetrics()
+
+
+def run_server(
+    rag: RAGPipeline,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    verbose: bool = False,
+    max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+    docs_root: Optional[str] = None,
+) -> None:
+    """
+    Serve ``rag`` over HTTP until interrupted.
+
+    Args:
+        rag: Pipeline whose index has already been built
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        verbose: Log every request to stderr
+        max_body_bytes: Largest accepted POST body
+        docs_root: Directory that POST /index may read ``docs`` from; by
+            default clients can only send texts
+    """
+    server = RAGServer(
+        (host, port), rag, verbose=verbose, max_body_bytes=max_body_bytes, docs_root=docs_root
+    )
+    bound_host, bound_port = server.server_address[:2]
+    print(f"Serving on http://{bound_host}:{bound_port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down server...", file=sys.stderr)
+    finally:
+        server.server_close()
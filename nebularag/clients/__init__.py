@@ -1,5 +1,19 @@
 """Client modules for external API integrations."""
 
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
 from .nebula_client import NebulaBlockClient
 
-__all__ = ["NebulaBlockClient"]
+if TYPE_CHECKING:
+    from .batching import BatchingClient, MicroBatcher
+
+# Imported on first access because they need NumPy
+_LAZY = {
+    "BatchingClient": ".batching",
+    "MicroBatcher": ".batching",
+}
+
+__all__ = ["NebulaBlockClient", "BatchingClient", "MicroBatcher"]
+
+__getattr__, __dir__ = attach(__name__, _LAZY, __all__)
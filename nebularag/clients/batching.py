@@ -0,0 +1,189 @@
+"""Micro-batching of concurrent single-item API calls."""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Put on the queue by close() to stop the collector thread
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collect items submitted from many threads and process them in batches.
+
+    The first item of a batch opens a window of ``max_wait_s``; the batch is
+    sent when the window closes or ``max_batch`` items are waiting, whichever
+    comes first. ``fn`` receives the list of items and must return one result
+    per item, in order; each caller's future gets its own result (or the
+    batch's exception). Up to ``max_in_flight`` batches run at once, so a slow
+    call does not hold back the next window.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch: int = 32,
+        max_wait_s: float = 0.005,
+        max_in_flight: int = 4,
+        name: str = "micro-batcher",
+    ) -> None:
+        if max_batch <= 0 or max_in_flight <= 0:
+            raise ValueError("max_batch and max_in_flight must be positive")
+        if max_wait_s < 0:
+            raise ValueError("max_wait_s must be non-negative")
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self.name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_in_flight, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the future resolves to its result."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, name=f"{self.name}-collector", daemon=True)
+                self._thread.start()
+            self._queue.put((item, future))
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait_s
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._pool.submit(self._run, batch)
+            if stop:
+                return
+
+    def _run(self, batch: List[Tuple[Any, Future]]) -> None:
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.largest = max(self.largest, len(batch))
+        try:
+            results = self.fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: expected {len(batch)} results, got {len(results)}")
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch": self.items / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest,
+            }
+
+    def close(self) -> None:
+        """Flush queued items and stop the worker threads."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+        self._pool.shutdown(wait=True)
+
+
+class BatchingClient:
+    """
+    Wrap a client so concurrent single-query calls share HTTP requests.
+
+    ``embed`` calls with a single text (query embeddings) are micro-batched
+    into one embeddings request; larger calls, such as indexing batches, go
+    straight through. ``rerank`` is batched only when the wrapped client
+    offers ``rerank_batch(requests)``, taking a list of ``(query, documents,
+    top_n)`` tuples and returning one result list per request; providers
+    whose rerank endpoint takes a single query are called directly. Every
+    other attribute is delegated to the wrapped client.
+    """
+
+    def __init__(self, client: Any, max_batch: int = 32, max_wait_ms: float = 5.0) -> None:
+        """
+        Args:
+            client: Client to wrap, e.g. a NebulaBlockClient
+            max_batch: Most items sent in one request
+            max_wait_ms: How long the first item of a batch waits for others
+        """
+        self.client = client
+        self._embed_batcher = MicroBatcher(
+            self._embed_many, max_batch, max_wait_ms / 1000.0, name="embed-batcher"
+        )
+        self._rerank_batcher: Optional[MicroBatcher] = None
+        if callable(getattr(client, "rerank_batch", None)):
+            self._rerank_batcher = MicroBatcher(
+                client.rerank_batch, max_batch, max_wait_ms / 1000.0, name="rerank-batcher"
+            )
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "client":  # not set yet, e.g. while copying
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _embed_many(self, texts: List[str]) -> Sequence[Any]:
+        return self.client.embed(texts)
+
+    def embed(self, texts: List[str]) -> Any:
+        if len(texts) != 1:
+            return self.client.embed(texts)
+        row = self._embed_batcher.submit(texts[0]).result()
+        return np.asarray(row, dtype=np.float32)[None, :]
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: Optional[int] = None,
+        return_documents: bool = False,
+    ) -> List[Dict[str, Any]]:
+        if self._rerank_batcher is None or return_documents:
+            return self.client.rerank(query, documents, top_n=top_n, return_documents=return_documents)
+        return self._rerank_batcher.submit((query, documents, top_n)).result()
+
+    def batch_stats(self) -> Dict[str, Any]:
+        """Requests saved by batching, per endpoint."""
+        stats = {"embed": self._embed_batcher.stats()}
+        if self._rerank_batcher is not None:
+            stats["rerank"] = self._rerank_batcher.stats()
+        return stats
+
+    def close(self) -> None:
+        self._embed_batcher.close()
+        if self._rerank_batcher is not None:
+            self._rerank_batcher.close()
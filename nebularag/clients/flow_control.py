@@ -0,0 +1,360 @@
+"""Client-side flow control: rate limiting, backoff, adaptive concurrency, hedging and circuit breaking."""
+
+import email.utils
+import random
+import threading
+import time
+import urllib.error
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from ..utils.stats import percentile
+
+# Status codes that mean "slow down" rather than "this request is wrong".
+OVERLOAD_STATUS = frozenset({429, 502, 503, 504})
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """
+    Full-jitter exponential backoff.
+
+    Spreads retries from concurrent callers over ``[0, base * 2**attempt]``
+    instead of having them all wake up at the same moment.
+
+    Args:
+        attempt: Zero-based attempt number that just failed
+        base: Delay scale in seconds
+        cap: Upper bound in seconds
+
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header given as seconds or as an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """
+    Parse ``"embed=20,rerank=10,chat=2"`` into requests per second by endpoint.
+
+    Raises:
+        ValueError: If an entry is malformed or a rate is not positive
+    """
+    limits: Dict[str, float] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, rate = entry.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid rate limit entry: {entry!r} (expected name=requests_per_second)")
+        value = float(rate)
+        if value <= 0:
+            raise ValueError(f"Rate limit for {name.strip()} must be positive")
+        limits[name.strip()] = value
+    return limits
+
+
+def is_overload(exc: Optional[BaseException]) -> bool:
+    """True if an exception signals provider overload (throttling, 5xx gateway errors, timeouts)."""
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code in OVERLOAD_STATUS
+    return isinstance(exc, (urllib.error.URLError, TimeoutError))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that callers block on before sending a request.
+
+    With ``rate=None`` the bucket never throttles but still honours
+    :meth:`pause`, so a ``Retry-After`` from the server holds back every
+    thread talking to that endpoint, not only the one that got the 429.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = float(burst) if burst else max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.rate is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                delay = self._blocked_until - now
+                if delay <= 0:
+                    if self.rate is None:
+                        return waited
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for ``seconds`` (e.g. from ``Retry-After``)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    Every successful response grows the limit by ``1 / limit`` (about one
+    slot per round of requests). Overload errors, or a smoothed latency that
+    drifts above ``latency_tolerance`` times the best latency seen (None
+    turns the latency signal off), cut the limit by ``backoff``. At most one
+    cut happens per round so a burst of failures from the same wave does not
+    collapse the limit to the minimum.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        backoff: float = 0.5,
+        latency_tolerance: Optional[float] = 2.0,
+    ) -> None:
+        if not 1 <= minimum <= maximum:
+            raise ValueError("need 1 <= minimum <= maximum")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.decreases = 0
+        self._baseline: Optional[float] = None
+        self._smoothed: Optional[float] = None
+        self._since_decrease = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """
+        Wait for a free slot.
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.perf_counter()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return time.perf_counter() - start
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        """Free a slot and adjust the limit from the request's outcome."""
+        with self._cond:
+            self.in_flight -= 1
+            self._since_decrease += 1
+            if not overloaded:
+                self._smoothed = latency if self._smoothed is None else 0.8 * self._smoothed + 0.2 * latency
+                if self._baseline is None or latency < self._baseline:
+                    self._baseline = latency
+                if self.latency_tolerance is not None:
+                    overloaded = self._smoothed > self.latency_tolerance * self._baseline
+            if overloaded:
+                if self._since_decrease >= int(self.limit):
+                    self.limit = max(float(self.minimum), self.limit * self.backoff)
+                    self._since_decrease = 0
+                    self.decreases += 1
+                    # Judge the next round on its own latencies.
+                    self._smoothed = self._baseline
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while an endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an endpoint is unhealthy.
+
+    After ``failure_threshold`` consecutive overload failures (see
+    :func:`is_overload`) the circuit opens and requests are rejected without
+    touching the network. After ``reset_timeout`` seconds a single trial
+    request is let through (half-open); its outcome closes or re-opens the
+    circuit. Outcomes of requests admitted before the circuit opened are
+    ignored while it is open or half-open, so a late success cannot close
+    it without the trial.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be positive")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[bool]:
+        """
+        Admit a request if the circuit allows it.
+
+        Returns:
+            None if rejected, True for the half-open trial request, False
+            for a normal request; pass it to :meth:`record` as ``trial``
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            if self.state != self.CLOSED:
+                self.rejected += 1
+                return None
+            return False
+
+    def record(self, ok: Optional[bool], trial: bool = False) -> None:
+        """
+        Record the outcome of an admitted request.
+
+        Args:
+            ok: True for a success, False for a failure that counts against
+                the endpoint, None for an outcome that says nothing about its
+                health (e.g. a 4xx caused by the request itself)
+            trial: Whether the request was the half-open trial
+        """
+        with self._lock:
+            if trial:
+                self._trial_in_flight = False
+            elif self.state != self.CLOSED:
+                return
+            if ok is None:
+                return
+            if ok:
+                self.failures = 0
+                self.state = self.CLOSED
+                return
+            self.failures += 1
+            if trial or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state and counters."""
+        with self._lock:
+            return {"state": self.state, "opened": self.opened, "rejected": self.rejected}
+
+
+class HedgePolicy:
+    """
+    Decides when to send a duplicate of a slow idempotent request.
+
+    The hedge delay is the ``quantile`` of recently observed latencies, so
+    only the slowest ``1 - quantile`` share of requests is duplicated. Until
+    ``min_samples`` latencies are known, ``initial_delay`` is used.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.01,
+        window: int = 256,
+        min_samples: int = 20,
+    ) -> None:
+        if not 0 < quantile < 1:
+            raise ValueError("quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Seconds to wait for the primary request before hedging."""
+        with self._lock:
+            self.requests += 1
+            latencies = sorted(self._latencies)
+        return self._delay_from(latencies)
+
+    def _delay_from(self, latencies: List[float]) -> float:
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, percentile(latencies, self.quantile))
+
+    def observe(self, latency: float) -> None:
+        """Record the latency of a successful request."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def record_hedge(self, won: bool) -> None:
+        """Count a hedge and whether the duplicate answered first."""
+        with self._lock:
+            self.hedged += 1
+            if won:
+                self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the current hedge delay in milliseconds."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests, hedged, wins = self.requests, self.hedged, self.hedge_wins
+        return {
+            "requests": requests,
+            "hedged": hedged,
+            "hedge_wins": wins,
+            "delay_ms": self._delay_from(latencies) * 1000,
+        }
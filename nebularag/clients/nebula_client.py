@@ -1,17 +1,124 @@
 import os
 import json
+import ssl
 import time
 import gzip
-from typing import List, Dict, Any, Optional
+import base64
+import functools
+import importlib.util
+import threading
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Tuple
 import urllib.request
 import urllib.error
 
-# Try to import brotli for Brotli decompression
+if TYPE_CHECKING:
+    import numpy as np
+
+from ..utils.tracing import NULL_TRACER, Tracer
+from .flow_control import (
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgePolicy,
+    TokenBucket,
+    backoff_delay,
+    is_overload,
+    parse_rate_limits,
+    parse_retry_after,
+)
+
+# brotli (optional) is only imported when a Brotli response arrives
+@functools.lru_cache(maxsize=None)
+def _brotli_available() -> bool:
+    return importlib.util.find_spec("brotli") is not None
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """Shared SSL context; building one loads the CA store, so do it once."""
+    # A more tolerant context
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def __getattr__(name: str) -> Any:
+    # BROTLI_AVAILABLE is resolved on first access without importing brotli
+    if name == "BROTLI_AVAILABLE":
+        return _brotli_available()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Try to import orjson for faster JSON encoding/decoding
 try:
-    import brotli
-    BROTLI_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    BROTLI_AVAILABLE = False
+    ORJSON_AVAILABLE = False
+
+# Request bodies smaller than this are not worth gzipping
+_COMPRESS_MIN_BYTES = 1024
+
+
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    """Serialize a request payload to UTF-8 JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _loads(body: bytes) -> Any:
+    """Parse a JSON response body, falling back to latin-1 for non-UTF-8 bytes."""
+    try:
+        if ORJSON_AVAILABLE:
+            return orjson.loads(body)
+        return json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        # orjson.JSONDecodeError and json.JSONDecodeError both subclass ValueError
+        return json.loads(body.decode("latin-1"))
+
+
+class _Race:
+    """
+    Outcomes of the copies of one hedged request, in finishing order.
+
+    The caller counts as a participant too, so ``release`` runs exactly once,
+    after the caller has left and every started copy has finished.
+    """
+
+    def __init__(self, release: Callable[[], None]) -> None:
+        self.results: List[Tuple[bool, bool, Any]] = []  # (is_backup, ok, result or exception)
+        self._release = release
+        self._active = 1
+        self._cond = threading.Condition()
+
+    def start(self, is_backup: bool, fn: Callable[[], Any]) -> None:
+        with self._cond:
+            self._active += 1
+        name = "nebula-hedge" if is_backup else "nebula-primary"
+        threading.Thread(target=self._run, args=(is_backup, fn), name=name, daemon=True).start()
+
+    def _run(self, is_backup: bool, fn: Callable[[], Any]) -> None:
+        try:
+            outcome: Tuple[bool, bool, Any] = (is_backup, True, fn())
+        except Exception as e:
+            outcome = (is_backup, False, e)
+        with self._cond:
+            self.results.append(outcome)
+            self._cond.notify_all()
+        self.leave()
+
+    def wait(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Wait until ``count`` copies have finished; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.results) >= count, timeout)
+
+    def leave(self) -> None:
+        with self._cond:
+            self._active -= 1
+            last = self._active == 0
+        if last:
+            self._release()
 
 
 class NebulaBlockClient:
@@ -31,6 +138,14 @@ class NebulaBlockClient:
       - NEBULABLOCK_EMBEDDING_MODEL (default: Qwen/Qwen3-Embedding-8B)
       - NEBULABLOCK_RERANKER_MODEL (default: BAAI/bge-reranker-v2-m3)
       - NEBULABLOCK_CHAT_MODEL (default: Mistral-Small-24B-Instruct-2501)
+
+      - NEBULABLOCK_RATE_LIMITS (e.g. embed=20,rerank=10,chat=2 requests/s; unset = unlimited)
+      - NEBULABLOCK_MAX_CONCURRENCY (upper bound for adaptive in-flight requests per endpoint)
+      - NEBULABLOCK_HEDGE_QUANTILE (e.g. 0.95: duplicate embed/rerank calls slower than p95; unset = off)
+      - NEBULABLOCK_BREAKER_THRESHOLD (consecutive failures that open an endpoint's circuit; 0 = off, default 5)
+      - NEBULABLOCK_COMPRESS_REQUESTS (1 = gzip request bodies over 1 KB)
+      - NEBULABLOCK_EMBEDDING_ENCODING (float or base64; base64 skips JSON floats entirely)
+      - NEBULABLOCK_EMBEDDING_DIMENSIONS (request Matryoshka-truncated embeddings of this width)
     """
 
     def __init__(
@@ -44,6 +159,16 @@ class NebulaBlockClient:
         rerank_path: Optional[str] = None,
         chat_path: Optional[str] = None,
         timeout: float = 60.0,
+        tracer: Optional[Tracer] = None,
+        rate_limits: Optional[Dict[str, float]] = None,
+        max_concurrency: Optional[int] = None,
+        hedge_quantile: Optional[float] = None,
+        breaker_threshold: Optional[int] = None,
+        breaker_reset_s: float = 30.0,
+        compress_requests: Optional[bool] = None,
+        embedding_encoding: Optional[str] = None,
+        embedding_dimensions: Optional[int] = None,
+        max_hedges: int = 8,
     ) -> None:
         self.base_url = (
             base_url
@@ -69,43 +194,196 @@ class NebulaBlockClient:
         self.chat_path = chat_path or os.environ.get("NEBULABLOCK_CHAT_PATH", "/chat/completions")
 
         self.timeout = timeout
+        if compress_requests is None:
+            compress_requests = os.environ.get("NEBULABLOCK_COMPRESS_REQUESTS", "").lower() in ("1", "true", "yes")
+        self.compress_requests = compress_requests
+        self.embedding_encoding = embedding_encoding or os.environ.get("NEBULABLOCK_EMBEDDING_ENCODING", "float")
+        if self.embedding_encoding not in ("float", "base64"):
+            raise ValueError("embedding_encoding must be 'float' or 'base64'")
+        if embedding_dimensions is None and os.environ.get("NEBULABLOCK_EMBEDDING_DIMENSIONS"):
+            embedding_dimensions = int(os.environ["NEBULABLOCK_EMBEDDING_DIMENSIONS"])
+        if embedding_dimensions is not None and embedding_dimensions <= 0:
+            raise ValueError("embedding_dimensions must be positive")
+        self.embedding_dimensions = embedding_dimensions
+        # Every _request is traced as an "http" span (attempts, bytes, decompression)
+        self.tracer = tracer or NULL_TRACER
+
+        # Flow control per endpoint ("embed", "rerank", "chat"): a token bucket
+        # (also used to honour Retry-After) and, if max_concurrency is set, an
+        # AIMD limit on in-flight requests.
+        if rate_limits is None:
+            rate_limits = parse_rate_limits(os.environ.get("NEBULABLOCK_RATE_LIMITS", ""))
+        if max_concurrency is None and os.environ.get("NEBULABLOCK_MAX_CONCURRENCY"):
+            max_concurrency = int(os.environ["NEBULABLOCK_MAX_CONCURRENCY"])
+        if max_concurrency is not None and max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self._endpoints = {
+            self.embeddings_path: "embed",
+            self.rerank_path: "rerank",
+            self.chat_path: "chat",
+        }
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.limiters: Dict[str, AIMDLimiter] = {}
+        for name in self._endpoints.values():
+            self.buckets[name] = TokenBucket(rate_limits.get(name))
+            if max_concurrency is not None:
+                # Chat latency tracks output length, so only errors shrink its limit.
+                self.limiters[name] = AIMDLimiter(
+                    initial=min(4, max_concurrency),
+                    maximum=max_concurrency,
+                    latency_tolerance=None if name == "chat" else 2.0,
+                )
+
+        # Tail-latency protection: hedged duplicates for idempotent embed/rerank
+        # calls, and a circuit breaker per endpoint that fails fast when the
+        # provider is down instead of stacking retries.
+        if hedge_quantile is None and os.environ.get("NEBULABLOCK_HEDGE_QUANTILE"):
+            hedge_quantile = float(os.environ["NEBULABLOCK_HEDGE_QUANTILE"])
+        if breaker_threshold is None:
+            breaker_threshold = int(os.environ.get("NEBULABLOCK_BREAKER_THRESHOLD", "5"))
+        self.hedges: Dict[str, HedgePolicy] = {}
+        if hedge_quantile is not None:
+            self.hedges = {name: HedgePolicy(hedge_quantile) for name in ("embed", "rerank")}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        if breaker_threshold > 0:
+            self.breakers = {
+                name: CircuitBreaker(breaker_threshold, breaker_reset_s) for name in self._endpoints.values()
+            }
+        # Hedged calls in flight, counted until both copies finish; once all
+        # slots are taken, requests are sent directly without a duplicate
+        if max_hedges <= 0:
+            raise ValueError("max_hedges must be positive")
+        self._hedge_slots = threading.BoundedSemaphore(max_hedges)
 
     # ------------------------------ HTTP ------------------------------ #
     def _request(self, path: str, payload: Dict[str, Any], max_retries: int = 3) -> Dict[str, Any]:
+        with self.tracer.span("http", endpoint=path) as span:
+            hedge = self.hedges.get(self._endpoints.get(path, path))
+            if hedge is None:
+                return self._send(path, payload, max_retries, span)
+            return self._hedged(hedge, path, payload, max_retries, span)
+
+    def _hedged(
+        self, hedge: HedgePolicy, path: str, payload: Dict[str, Any], max_retries: int, span: Any
+    ) -> Dict[str, Any]:
+        """
+        Send a request and, if it is slower than the hedge delay, a duplicate; first answer wins.
+
+        Each hedged call holds one of ``max_hedges`` slots until both copies
+        have finished, so abandoned losers cannot pile up; when no slot is
+        free the request is simply sent on the caller's thread. Both copies
+        start on their own threads immediately, so the hedge delay is never
+        spent waiting in a queue. The duplicate does not retry, and the
+        loser's result is ignored.
+        """
+        if not self._hedge_slots.acquire(blocking=False):
+            span.set("hedge_skipped", 1)
+            return self._send(path, payload, max_retries, span)
+
+        race = _Race(self._hedge_slots.release)
+        start = time.perf_counter()
+        try:
+            race.start(False, lambda: self._send(path, payload, max_retries, span))
+            if race.wait(1, timeout=hedge.delay()):
+                _, ok, value = race.results[0]
+                if not ok:
+                    raise value
+                hedge.observe(time.perf_counter() - start)
+                return value
+
+            # The duplicate reports into a no-op span so it cannot clobber the primary's attributes
+            race.start(True, lambda: self._send(path, payload, 1, NULL_TRACER.span("http")))
+            span.set("hedged", 1)
+            last_error: Optional[BaseException] = None
+            for count in (1, 2):
+                race.wait(count)
+                is_backup, ok, value = race.results[count - 1]
+                if not ok:
+                    last_error = value
+                    continue
+                hedge.record_hedge(is_backup)
+                hedge.observe(time.perf_counter() - start)
+                if is_backup:
+                    span.set("hedge_won", 1)
+                return value
+            hedge.record_hedge(False)
+            raise last_error  # type: ignore[misc]
+        finally:
+            race.leave()
+
+    def resilience_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hedging and circuit breaker counters per endpoint."""
+        stats: Dict[str, Dict[str, Any]] = {}
+        for name, hedge in self.hedges.items():
+            stats.setdefault(name, {})["hedge"] = hedge.stats()
+        for name, breaker in self.breakers.items():
+            stats.setdefault(name, {})["breaker"] = breaker.stats()
+        return stats
+
+    def _send(self, path: str, payload: Dict[str, Any], max_retries: int, span: Any) -> Dict[str, Any]:
         if not self.base_url:
             raise RuntimeError("NEBULABLOCK_BASE_URL is not set.")
         if not self.api_key:
             raise RuntimeError("NEBULABLOCK_API_KEY is not set.")
 
         url = f"{self.base_url}{path}"
-        data = json.dumps(payload).encode("utf-8")
+        data = _dumps(payload)
+        headers = {"Content-Type": "application/json"}
+        if self.compress_requests and len(data) >= _COMPRESS_MIN_BYTES:
+            span.set("bytes_uncompressed", len(data))
+            data = gzip.compress(data, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        span.set("bytes_sent", len(data))
         
-        # Create an SSL context that's more tolerant
-        import ssl
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        ssl_context = _ssl_context()
+        brotli_available = _brotli_available()
         
+        endpoint = self._endpoints.get(path, path)
+        bucket = self.buckets.get(endpoint) or self.buckets.setdefault(endpoint, TokenBucket())
+        limiter = self.limiters.get(endpoint)
+        breaker = self.breakers.get(endpoint)
+        throttled = 0.0
+        rate_limited = 0
+
         last_error = None
         for attempt in range(max_retries):
+            trial = breaker.admit() if breaker is not None else False
+            if trial is None:
+                span.set("breaker_rejected", 1)
+                raise CircuitOpenError(f"Circuit open for {url} after repeated failures. Last error: {last_error}")
+            span.set("attempts", attempt + 1)
+            throttled += bucket.acquire()
+            if limiter is not None:
+                throttled += limiter.acquire()
+            if throttled:
+                span.set("throttled_s", throttled)
+            sent = time.perf_counter()
+            error: Optional[BaseException] = None
+            succeeded = False
+            retry_after: Optional[float] = None
             try:
                 req = urllib.request.Request(url, data=data, method="POST")
                 
                 # Add headers
-                req.add_header("Content-Type", "application/json")
+                for key, value in headers.items():
+                    req.add_header(key, value)
                 req.add_header("Authorization", f"Bearer {self.api_key}")
                 req.add_header("User-Agent", "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36")
                 req.add_header("Accept", "application/json")
-                req.add_header("Accept-Encoding", "gzip, deflate, br")
+                req.add_header("Accept-Encoding", "gzip, br" if brotli_available else "gzip")
                 req.add_header("Connection", "keep-alive")
                 
                 with urllib.request.urlopen(req, timeout=self.timeout, context=ssl_context) as resp:
                     body = resp.read()
+                    received = len(body)
+                    span.set("bytes_received", received)
                     
                     # Check if response is compressed and decompress accordingly
                     content_encoding = resp.headers.get('Content-Encoding', '').lower()
+                    decompress_start = time.perf_counter()
                     
-                    if content_encoding == 'br' and BROTLI_AVAILABLE:
+                    if content_encoding == 'br' and brotli_available:
+                        import brotli
                         try:
                             body = brotli.decompress(body)
                         except Exception as e:
@@ -115,66 +393,108 @@ class NebulaBlockClient:
                             body = gzip.decompress(body)
                         except Exception as e:
                             raise RuntimeError(f"Failed to decompress gzip response: {e}")
-                    elif content_encoding == 'br' and not BROTLI_AVAILABLE:
+                    elif content_encoding == 'br' and not brotli_available:
                         raise RuntimeError("Response is Brotli compressed but brotli library is not available. Install with: pip install brotli")
-                    
-                    # Try to decode with UTF-8, fallback to latin-1 if that fails
-                    try:
-                        text = body.decode("utf-8")
-                    except UnicodeDecodeError:
-                        text = body.decode("latin-1")
+                    if len(body) != received:
+                        span.set("decompress_s", time.perf_counter() - decompress_start)
                     
                     # Debug: print response details if it's not valid JSON
-                    if not text.strip():
+                    if not body.strip():
                         raise RuntimeError(f"Empty response from {url}")
                     
                     try:
-                        return json.loads(text)
-                    except json.JSONDecodeError as e:
+                        result = _loads(body)
+                    except ValueError:
                         # If it's not JSON, show what we actually got
-                        raise RuntimeError(f"Invalid JSON response from {url}. Response: {text[:200]}...")
+                        preview = body[:200].decode("utf-8", errors="replace")
+                        raise RuntimeError(f"Invalid JSON response from {url}. Response: {preview}...")
+                    succeeded = True
+                    return result
                         
             except urllib.error.HTTPError as e:
-                last_error = e
+                last_error = error = e
                 try:
                     detail = e.read().decode("utf-8", errors="ignore")
                 except UnicodeDecodeError:
                     detail = e.read().decode("latin-1", errors="ignore")
-                # Add exponential backoff delay
-                time.sleep(0.5 * (2 ** attempt))
+                if e.code == 429:
+                    rate_limited += 1
+                    span.set("rate_limited", rate_limited)
+                # Retry-After holds back every caller of this endpoint, not just us.
+                retry_after = parse_retry_after(e.headers.get("Retry-After") if e.headers else None)
+                if retry_after is not None:
+                    bucket.pause(retry_after)
                 if attempt == max_retries - 1:
                     raise RuntimeError(f"HTTPError {e.code} for {url}: {detail}")
-                continue
-                
+
             except urllib.error.URLError as e:
-                last_error = e
-                # Add exponential backoff delay
-                time.sleep(0.5 * (2 ** attempt))
+                last_error = error = e
                 if attempt == max_retries - 1:
                     raise RuntimeError(f"URLError for {url}: {e}")
-                continue
-                
+
+            finally:
+                overloaded = is_overload(error)
+                if limiter is not None:
+                    limiter.release(time.perf_counter() - sent, overloaded=overloaded)
+                if breaker is not None:
+                    # Only a parsed 2xx response is a success; client errors (4xx
+                    # other than 429) say nothing about the endpoint's health
+                    client_error = (
+                        isinstance(error, urllib.error.HTTPError) and error.code < 500 and not overloaded
+                    )
+                    breaker.record(True if succeeded else None if client_error else False, trial=bool(trial))
+
+            # Jittered exponential backoff, stretched to the server's Retry-After
+            time.sleep(max(backoff_delay(attempt), retry_after or 0.0))
+
         # If we get here, all retries failed
         raise RuntimeError(f"Failed after {max_retries} attempts. Last error: {last_error}")
 
     # ---------------------------- Embeddings -------------------------- #
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    def embed(self, texts: List[str]) -> "np.ndarray":
         """
         Calls embeddings endpoint. Assumes payload {"model": ..., "input": [...]}
         and response like {"data": [{"embedding": [...]}, ...]}.
+
+        With ``embedding_encoding="base64"`` the payload asks for
+        ``encoding_format: base64`` and each embedding is decoded straight
+        from its little-endian float32 bytes. With ``embedding_dimensions``
+        the API is asked for Matryoshka-truncated vectors, and wider
+        responses are cut to that width locally.
+
+        Returns:
+            float32 array of shape (len(texts), dim)
         """
-        payload = {"model": self.embedding_model, "input": texts}
+        import numpy as np
+
+        payload: Dict[str, Any] = {"model": self.embedding_model, "input": texts}
+        if self.embedding_encoding == "base64":
+            payload["encoding_format"] = "base64"
+        if self.embedding_dimensions is not None:
+            payload["dimensions"] = self.embedding_dimensions
         resp = self._request(self.embeddings_path, payload)
 
         data = resp.get("data")
         if not isinstance(data, list):
             raise RuntimeError(f"Unexpected embeddings response: {resp}")
-        out: List[List[float]] = []
+        rows = []
         for item in data:
             emb = item.get("embedding")
-            if not isinstance(emb, list):
+            if isinstance(emb, str):
+                rows.append(np.frombuffer(base64.b64decode(emb), dtype="<f4"))
+            elif isinstance(emb, list):
+                rows.append(emb)
+            else:
                 raise RuntimeError(f"Missing 'embedding' in item: {item}")
-            out.append([float(x) for x in emb])
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        try:
+            # One C-level conversion instead of a Python float() per element
+            out = np.array(rows, dtype=np.float32)
+        except ValueError:
+            raise RuntimeError("Embeddings in response have inconsistent dimensions")
+        if self.embedding_dimensions is not None and out.shape[1] > self.embedding_dimensions:
+            out = np.ascontiguousarray(out[:, :self.embedding_dimensions])
         return out
 
     # ----------------------------- Reranker --------------------------- #
@@ -1,5 +1,5 @@
 """Configuration management for RAG Example."""
 
-from .settings import Settings, get_settings
+from .settings import Settings, get_settings, load_env_file
 
-__all__ = ["Settings", "get_settings"]
+__all__ = ["Settings", "get_settings", "load_env_file"]
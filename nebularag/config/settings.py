@@ -5,17 +5,30 @@ from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
 
-# Try to load python-dotenv if available
-try:
-    from dotenv import load_dotenv
+_env_loaded = False
+
+
+def load_env_file() -> None:
+    """
+    Load the project's ``.env`` file into the environment, once.
+    
+    Called by :meth:`Settings.from_env` and the CLI rather than at import
+    time, so importing the package has no side effects. Does nothing when
+    python-dotenv is not installed.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        # python-dotenv not available, continue without it
+        return
     # Load .env file from project root
-    project_root = Path(__file__).parent.parent.parent
-    env_file = project_root / ".env"
+    env_file = Path(__file__).parent.parent.parent / ".env"
     if env_file.exists():
         load_dotenv(env_file)
-except ImportError:
-    # python-dotenv not available, continue without it
-    pass
 
 
 @dataclass
@@ -41,13 +54,48 @@ class Settings:
     default_chunk_overlap: int = 120
     default_top_k: int = 12
     default_rerank_k: int = 6
+    # Unit for chunk size/overlap: "chars" or "tokens"
+    chunk_unit: str = "chars"
+    # Optional tokenizer vocab (tokenizer.json, vocab.json or one token per line)
+    tokenizer_vocab_path: Optional[str] = None
+    # Jaccard similarity above which chunks are dropped as duplicates (0 disables)
+    dedup_threshold: float = 0.9
+    # Embedding dimension reduction: "none", "api" (Matryoshka dims requested
+    # from the API), "truncate" (Matryoshka, local) or "pca" (fitted locally)
+    dim_reduction: str = "none"
+    embedding_dim: Optional[int] = None
+    # Re-rank this many reduced-space candidates with full-width vectors (0 disables)
+    rescore_k: int = 0
+    # Shortlist candidates by Hamming distance of 1-bit sign codes before exact cosine
+    binary_prefilter: bool = False
+    # Micro-batch concurrent query embeddings over this window (0 disables)
+    batch_window_ms: float = 0.0
+    max_batch: int = 32
+    # Chat on the dense top results while rerank is in flight
+    speculative: bool = False
+    # Retrieval results cached per normalized question (0 disables), for cache_ttl seconds
+    cache_size: int = 0
+    cache_ttl: float = 300.0
+    # Threads scoring row blocks of large indexes in exact search
+    search_threads: int = 1
+    # Split the index over this many worker processes (0 keeps it in-process)
+    shards: int = 0
+    # Saved index (.npz); reused when it exists and matches the embedding model
+    index_path: Optional[str] = None
+    # Bulk chunk + embedding files (.npz, .parquet, .arrow or an .npy directory)
+    import_embeddings: Optional[str] = None
+    export_embeddings: Optional[str] = None
     
     # HTTP Configuration
     timeout: float = 60.0
     
+    # Observability: per-stage and per-request latency tracing
+    tracing: bool = False
+    
     @classmethod
     def from_env(cls) -> "Settings":
         """Create settings from environment variables."""
+        load_env_file()
         return cls(
             nebula_base_url=os.environ.get("NEBULABLOCK_BASE_URL", cls.nebula_base_url),
             nebula_api_key=os.environ.get("NEBULABLOCK_API_KEY"),
@@ -61,7 +109,25 @@ class Settings:
             default_chunk_overlap=int(os.environ.get("RAG_CHUNK_OVERLAP", cls.default_chunk_overlap)),
             default_top_k=int(os.environ.get("RAG_TOP_K", cls.default_top_k)),
             default_rerank_k=int(os.environ.get("RAG_RERANK_K", cls.default_rerank_k)),
+            chunk_unit=os.environ.get("RAG_CHUNK_UNIT", cls.chunk_unit),
+            tokenizer_vocab_path=os.environ.get("RAG_TOKENIZER_VOCAB"),
+            dedup_threshold=float(os.environ.get("RAG_DEDUP_THRESHOLD", cls.dedup_threshold)),
+            dim_reduction=os.environ.get("RAG_DIM_REDUCTION", cls.dim_reduction),
+            embedding_dim=int(os.environ["RAG_EMBEDDING_DIM"]) if os.environ.get("RAG_EMBEDDING_DIM") else None,
+            rescore_k=int(os.environ.get("RAG_RESCORE_K", cls.rescore_k)),
+            binary_prefilter=os.environ.get("RAG_BINARY_PREFILTER", "").lower() in ("1", "true", "yes"),
+            batch_window_ms=float(os.environ.get("RAG_BATCH_WINDOW_MS", cls.batch_window_ms)),
+            max_batch=int(os.environ.get("RAG_MAX_BATCH", cls.max_batch)),
+            speculative=os.environ.get("RAG_SPECULATIVE", "").lower() in ("1", "true", "yes"),
+            cache_size=int(os.environ.get("RAG_CACHE_SIZE", cls.cache_size)),
+            cache_ttl=float(os.environ.get("RAG_CACHE_TTL", cls.cache_ttl)),
+            search_threads=int(os.environ.get("RAG_SEARCH_THREADS", cls.search_threads)),
+            shards=int(os.environ.get("RAG_SHARDS", cls.shards)),
+            index_path=os.environ.get("RAG_INDEX_PATH"),
+            import_embeddings=os.environ.get("RAG_IMPORT_EMBEDDINGS"),
+            export_embeddings=os.environ.get("RAG_EXPORT_EMBEDDINGS"),
             timeout=float(os.environ.get("HTTP_TIMEOUT", cls.timeout)),
+            tracing=os.environ.get("RAG_TRACING", "").lower() in ("1", "true", "yes"),
         )
     
     def validate(self) -> None:
@@ -86,6 +152,50 @@ class Settings:
         
         if self.default_rerank_k <= 0:
             raise ValueError("rerank_k must be positive")
+        
+        if self.chunk_unit not in ("chars", "tokens"):
+            raise ValueError("chunk_unit must be 'chars' or 'tokens'")
+        
+        if not 0 <= self.dedup_threshold <= 1:
+            raise ValueError("dedup_threshold must be between 0 and 1")
+        
+        validate_dim_reduction(self.dim_reduction, self.embedding_dim, self.rescore_k)
+        
+        if self.binary_prefilter and self.dim_reduction in ("truncate", "pca"):
+            raise ValueError("binary_prefilter cannot be combined with local dim_reduction")
+        
+        if self.batch_window_ms < 0:
+            raise ValueError("batch_window_ms must be non-negative")
+        
+        if self.max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        
+        if self.cache_size < 0:
+            raise ValueError("cache_size must be non-negative")
+        
+        if self.cache_ttl <= 0:
+            raise ValueError("cache_ttl must be positive")
+        
+        if self.search_threads <= 0:
+            raise ValueError("search_threads must be positive")
+        
+        if self.shards < 0:
+            raise ValueError("shards must be non-negative")
+        
+        if self.shards and self.dim_reduction in ("truncate", "pca"):
+            raise ValueError("shards cannot be combined with local dim_reduction")
+
+
+def validate_dim_reduction(method: str, embedding_dim: Optional[int], rescore_k: int) -> None:
+    """Check a dimension reduction configuration (see :meth:`Settings.validate`)."""
+    if method not in ("none", "api", "truncate", "pca"):
+        raise ValueError("dim_reduction must be 'none', 'api', 'truncate' or 'pca'")
+    if method != "none" and (embedding_dim is None or embedding_dim <= 0):
+        raise ValueError(f"dim_reduction '{method}' needs a positive embedding_dim")
+    if rescore_k < 0:
+        raise ValueError("rescore_k must be non-negative")
+    if rescore_k and method not in ("truncate", "pca"):
+        raise ValueError("rescore_k needs full-width vectors, so dim_reduction must be 'truncate' or 'pca'")
 
 
 # Global settings instance
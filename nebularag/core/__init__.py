@@ -1,6 +1,28 @@
 """Core RAG pipeline components."""
 
-from .rag_pipeline import RAGPipeline
-from .vector_store import InMemoryVectorStore
+from typing import TYPE_CHECKING
 
-__all__ = ["RAGPipeline", "InMemoryVectorStore"]
+from .._lazy import attach
+
+if TYPE_CHECKING:
+    from .rag_pipeline import RAGPipeline
+    from .reduction import PCAReducer, ReducedVectorStore, TruncateReducer
+    from .shared_index import SharedIndexRegistry
+    from .sharded_store import ShardedVectorStore
+    from .vector_store import InMemoryVectorStore
+
+# Imported on first access; every module here needs NumPy
+_LAZY = {
+    "RAGPipeline": ".rag_pipeline",
+    "InMemoryVectorStore": ".vector_store",
+    "ReducedVectorStore": ".reduction",
+    "ShardedVectorStore": ".sharded_store",
+    "SharedIndexRegistry": ".shared_index",
+    "PCAReducer": ".reduction",
+    "TruncateReducer": ".reduction",
+}
+
+__all__ = ["RAGPipeline", "InMemoryVectorStore", "ReducedVectorStore", "ShardedVectorStore", "SharedIndexRegistry",
+           "PCAReducer", "TruncateReducer"]
+
+__getattr__, __dir__ = attach(__name__, _LAZY, __all__)
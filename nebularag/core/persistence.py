@@ -0,0 +1,268 @@
+"""
+Saving and loading vector indexes as a single ``.npz`` file, and bulk
+import/export of chunk texts with their embeddings.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .reduction import ReducedVectorStore
+from .sharded_store import ShardedVectorStore
+from .text_arena import TextArena
+from .vector_store import InMemoryVectorStore
+
+# Version 2 stores text as byte spans of a shared buffer; version 1 files
+# (texts packed back to back, end offsets only) are still read
+FORMAT_VERSION = 2
+
+VectorStore = Union[InMemoryVectorStore, ReducedVectorStore, ShardedVectorStore]
+
+_STORE_KINDS = {
+    "flat": InMemoryVectorStore,
+    "reduced": ReducedVectorStore,
+    "sharded": ShardedVectorStore,
+}
+
+
+def _encode_texts(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """The texts' UTF-8 byte buffer plus (start, end) spans (no pickling)."""
+    if not isinstance(texts, TextArena):
+        arena = TextArena()
+        arena.extend(texts)
+        texts = arena
+    # Spans first: texts appended meanwhile only extend the buffer
+    spans = texts.spans.copy()
+    return texts.data, spans
+
+
+def _decode_texts(data: np.ndarray, offsets: np.ndarray) -> TextArena:
+    """Wrap saved texts in an arena; 1-D offsets are version 1 end offsets."""
+    if offsets.ndim == 1:
+        offsets = np.stack([np.concatenate(([0], offsets[:-1])), offsets], axis=1)
+    return TextArena.from_buffer(data, offsets)
+
+
+def save_index(path: str, store: VectorStore, metadata: Dict[str, Any]) -> None:
+    """
+    Write a store and its metadata to ``path`` (``.npz``).
+
+    Args:
+        path: Destination file
+        store: Store to save
+        metadata: JSON-serializable facts about the index, e.g. the
+            embedding model, checked again on load
+
+    Raises:
+        ValueError: If the store type cannot be saved
+    """
+    kind = next((name for name, cls in _STORE_KINDS.items() if type(store) is cls), None)
+    if kind is None:
+        raise ValueError(f"Cannot save a {type(store).__name__}")
+    text_data, text_offsets = _encode_texts(store.texts)
+    header = {"format_version": FORMAT_VERSION, "kind": kind, "size": store.size(), "metadata": metadata}
+    with open(path, "wb") as fh:
+        np.savez(
+            fh,
+            header=np.array(json.dumps(header)),
+            text_data=text_data,
+            text_offsets=text_offsets,
+            **store.state(),
+        )
+
+
+def load_index(path: str) -> Tuple[VectorStore, Dict[str, Any]]:
+    """
+    Read a store written by :func:`save_index`.
+
+    Returns:
+        Tuple of (store, metadata)
+
+    Raises:
+        ValueError: If the file is not a NebulaRAG index or has an unsupported version
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if "header" not in data.files:
+            raise ValueError(f"{path} is not a NebulaRAG index")
+        header = json.loads(str(data["header"]))
+        if header.get("format_version") not in (1, FORMAT_VERSION):
+            raise ValueError(f"Unsupported index format version: {header.get('format_version')}")
+        cls = _STORE_KINDS.get(header.get("kind"))
+        if cls is None:
+            raise ValueError(f"Unknown index kind: {header.get('kind')}")
+        texts = _decode_texts(data["text_data"], data["text_offsets"])
+        state = {key: data[key] for key in data.files if key not in ("header", "text_data", "text_offsets")}
+    return cls.from_state(texts, state), header.get("metadata", {})
+
+
+# Bulk embedding files: chunk texts plus one embedding per chunk, written by
+# offline jobs or exported from a store, in one of these layouts
+BULK_FORMAT = "nebularag-embeddings"
+BULK_VERSION = 1
+
+
+def _bulk_kind(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npz":
+        return "npz"
+    if ext == ".parquet":
+        return "parquet"
+    if ext in (".arrow", ".feather"):
+        return "arrow"
+    return "npy"
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "pyarrow is required for Parquet and Arrow files. Install it with: pip install pyarrow"
+        ) from None
+    return pyarrow
+
+
+def export_embeddings(
+    path: str,
+    texts: Sequence[str],
+    embeddings: np.ndarray,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Write chunk texts and their embeddings in a binary columnar layout.
+
+    The layout follows the extension of ``path``:
+
+    - ``.npz``: arrays ``embeddings``, ``text_data`` (UTF-8 bytes),
+      ``text_spans`` (byte ``(start, end)`` per text) and ``metadata``
+    - ``.parquet`` / ``.arrow`` / ``.feather``: columns ``text`` and
+      ``embedding`` (fixed-size float32 list), metadata in the schema;
+      requires pyarrow
+    - anything else: a directory of ``.npy`` files plus ``metadata.json``,
+      which :func:`import_embeddings` memory-maps
+
+    Args:
+        path: Destination file or directory
+        texts: Chunk texts, e.g. a store's ``texts``
+        embeddings: Array of shape (len(texts), dim)
+        metadata: JSON-serializable facts such as the embedding model
+
+    Raises:
+        ValueError: If texts and embeddings do not line up
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2 or len(matrix) != len(texts):
+        raise ValueError("embeddings must be a 2-D array with one row per text")
+    header = dict(metadata or {}, format=BULK_FORMAT, version=BULK_VERSION, count=len(matrix), dim=matrix.shape[1])
+    text_data, text_spans = _encode_texts(texts)
+    kind = _bulk_kind(path)
+
+    if kind == "npz":
+        with open(path, "wb") as fh:
+            np.savez(fh, embeddings=matrix, text_data=text_data, text_spans=text_spans,
+                     metadata=np.array(json.dumps(header)))
+    elif kind == "npy":
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "embeddings.npy"), matrix)
+        np.save(os.path.join(path, "text_data.npy"), text_data)
+        np.save(os.path.join(path, "text_spans.npy"), text_spans)
+        with open(os.path.join(path, "metadata.json"), "w", encoding="utf-8") as fh:
+            json.dump(header, fh)
+    else:
+        pa = _require_pyarrow()
+        column = pa.FixedSizeListArray.from_arrays(pa.array(matrix.ravel()), matrix.shape[1])
+        table = pa.table({"text": pa.array(list(texts), type=pa.large_string()), "embedding": column})
+        table = table.replace_schema_metadata({"nebularag": json.dumps(header)})
+        if kind == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, path)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, path, compression="uncompressed")
+
+
+def _arrow_texts(column: Any) -> TextArena:
+    """Wrap an Arrow string column's buffers in an arena without decoding."""
+    pa = _require_pyarrow()
+    column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if column.null_count:
+        raise ValueError("text column contains nulls")
+    if pa.types.is_string(column.type):
+        offset_type = np.int32
+    elif pa.types.is_large_string(column.type):
+        offset_type = np.int64
+    else:
+        raise ValueError(f"text column must be strings, not {column.type}")
+    _, offsets_buf, data_buf = column.buffers()
+    offsets = np.frombuffer(offsets_buf, dtype=offset_type)[column.offset:column.offset + len(column) + 1]
+    data = np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None else np.zeros(0, dtype=np.uint8)
+    return TextArena.from_buffer(data, np.stack([offsets[:-1], offsets[1:]], axis=1))
+
+
+def import_embeddings(path: str) -> Tuple[TextArena, np.ndarray, Dict[str, Any]]:
+    """
+    Read a file or directory written by :func:`export_embeddings`.
+
+    Embeddings are returned without copying where the layout allows it
+    (memory-mapped ``.npy``, memory-mapped Arrow); texts are wrapped in a
+    :class:`TextArena` without being decoded. An ``.npz`` may also hold a
+    plain ``texts`` string array instead of ``text_data``/``text_spans``,
+    which is easy to produce from offline jobs.
+
+    Returns:
+        Tuple of (texts, embeddings, metadata)
+
+    Raises:
+        ValueError: If the file is not a bulk embedding file or its columns
+            do not line up
+        ImportError: For Parquet/Arrow files when pyarrow is missing
+    """
+    kind = _bulk_kind(path)
+    if kind == "npz":
+        with np.load(path, allow_pickle=False) as data:
+            if "embeddings" not in data.files:
+                raise ValueError(f"{path} has no embeddings array")
+            header = json.loads(str(data["metadata"])) if "metadata" in data.files else {}
+            embeddings = data["embeddings"]
+            if "texts" in data.files:
+                texts = TextArena()
+                texts.extend(data["texts"].tolist())
+            else:
+                texts = _decode_texts(data["text_data"], data["text_spans"])
+    elif kind == "npy":
+        if not os.path.isfile(os.path.join(path, "embeddings.npy")):
+            raise ValueError(f"{path} is not a bulk embedding directory")
+        with open(os.path.join(path, "metadata.json"), encoding="utf-8") as fh:
+            header = json.load(fh)
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        texts = _decode_texts(
+            np.load(os.path.join(path, "text_data.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "text_spans.npy")),
+        )
+    else:
+        pa = _require_pyarrow()
+        if kind == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(path, memory_map=True)
+        if "text" not in table.column_names or "embedding" not in table.column_names:
+            raise ValueError(f"{path} needs 'text' and 'embedding' columns")
+        raw = (table.schema.metadata or {}).get(b"nebularag")
+        header = json.loads(raw) if raw else {}
+        texts = _arrow_texts(table.column("text"))
+        column = table.column("embedding").combine_chunks()
+        if not pa.types.is_fixed_size_list(column.type):
+            raise ValueError("embedding column must be a fixed-size list")
+        embeddings = column.flatten().to_numpy(zero_copy_only=False).reshape(len(column), column.type.list_size)
+
+    if header.get("format", BULK_FORMAT) != BULK_FORMAT or header.get("version", BULK_VERSION) != BULK_VERSION:
+        raise ValueError(f"{path} is not a supported bulk embedding file")
+    if embeddings.ndim != 2 or len(embeddings) != len(texts):
+        raise ValueError(f"{path}: expected one embedding row per text, got {embeddings.shape} for {len(texts)} texts")
+    if embeddings.dtype != np.float32:
+        embeddings = embeddings.astype(np.float32)
+    return texts, embeddings, header
@@ -1,8 +1,23 @@
-from typing import List, Dict, Any, Optional, Tuple
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
 from ..clients.nebula_client import NebulaBlockClient
-from ..utils.text_processing import split_text
+from ..utils.cache import TTLCache
+from ..utils.dedup import NearDuplicateFilter
+from ..utils.file_utils import iter_document_files, iter_file_blocks
+from ..utils.pdf_text import PdfTextCache, default_pdf_cache
+from ..utils.text_processing import iter_chunks, iter_stream_chunks
+from ..utils.tokenization import Tokenizer
+from ..utils.tracing import NULL_TRACER, Tracer
+from .persistence import export_embeddings, import_embeddings, load_index, save_index
+from .reduction import ReducedVectorStore
+from .text_arena import TextItem
 from .vector_store import InMemoryVectorStore
 
+# Draft chats that may run at once; further questions answer without speculating
+_SPECULATION_WORKERS = 8
+
 
 class RAGPipeline:
     def __init__(
@@ -12,31 +27,322 @@ class RAGPipeline:
         chunk_overlap: int = 120,
         top_k: int = 12,
         rerank_k: int = 6,
+        tokenizer: Optional[Tokenizer] = None,
+        dedup_threshold: Optional[float] = None,
+        tracer: Optional[Tracer] = None,
+        store: Optional[Union[InMemoryVectorStore, ReducedVectorStore]] = None,
+        speculative: bool = False,
+        cache_size: int = 0,
+        cache_ttl_s: Optional[float] = 300.0,
     ) -> None:
         self.client = client
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.top_k = top_k
         self.rerank_k = rerank_k
-        self.store = InMemoryVectorStore()
+        # When set, chunk_size/chunk_overlap are token counts
+        self.tokenizer = tokenizer
+        # Any object with add/search/texts/size/clear, e.g. a ReducedVectorStore
+        self.store = store if store is not None else InMemoryVectorStore()
+        # Near-duplicate chunks are dropped before embedding when a threshold is set
+        self.dedup = NearDuplicateFilter(dedup_threshold) if dedup_threshold else None
+        # Per-stage spans; defaults to the client's tracer so one tracer sees everything
+        self.tracer = tracer or getattr(client, "tracer", None) or NULL_TRACER
+        # Latency mode: chat on the dense top results while rerank runs, keeping
+        # the answer when both pick the same documents (see speculation_stats)
+        self.speculative = speculative
+        self._speculation = {"hits": 0, "misses": 0, "skipped": 0, "wasted_chat_calls": 0, "wasted_prompt_chars": 0}
+        self._speculation_lock = threading.Lock()
+        self._speculation_slots = threading.BoundedSemaphore(_SPECULATION_WORKERS)
+        self._speculation_executor: Optional[ThreadPoolExecutor] = None
+        # Normalized question -> retrieval results, tagged with the store and its
+        # version so any store mutation (or replacement) invalidates them
+        self.retrieval_cache = TTLCache(cache_size, cache_ttl_s) if cache_size > 0 else None
+        # Metadata of the index last loaded with load_index (empty until then)
+        self.index_metadata: Dict[str, Any] = {}
 
     def index_texts(self, docs: List[str]) -> int:
-        chunks: List[str] = []
-        for doc in docs:
-            chunks.extend(split_text(doc, self.chunk_size, self.chunk_overlap))
+        tracer = self.tracer
+        with tracer.span("index.split", docs=len(docs)) as span:
+            chunks: List[TextItem] = []
+            for doc in docs:
+                chunks.extend(iter_chunks(doc, self.chunk_size, self.chunk_overlap, self.tokenizer))
+            span.set("chunks", len(chunks))
+        return self.index_chunks(chunks)
+
+    def index_chunks(self, chunks: Sequence[TextItem]) -> int:
+        """
+        Deduplicate, embed and store already split chunks; returns how many were added.
+
+        Chunks given as :class:`Chunk` tuples keep their source offsets, so
+        the store keeps the text they overlap by only once.
+        """
+        tracer = self.tracer
+        texts = [c if isinstance(c, str) else c.text for c in chunks]
+        mark = 0
+        if self.dedup is not None:
+            mark = self.dedup.size()
+            with tracer.span("index.dedup") as span:
+                texts, kept = self.dedup.filter(texts)
+                chunks = [chunks[i] for i in kept]
+                span.set("kept", len(chunks))
         if not chunks:
             return 0
-        embeddings = self.client.embed(chunks)
-        self.store.add(chunks, embeddings)
+        try:
+            with tracer.span("index.embed", items=len(chunks)):
+                embeddings = self.client.embed(texts)
+            with tracer.span("index.store", items=len(chunks)):
+                self.store.add(chunks, embeddings)
+        except Exception:
+            if self.dedup is not None:
+                self.dedup.truncate(mark)
+            raise
         return len(chunks)
 
-    def retrieve(self, question: str) -> List[Tuple[int, float]]:
-        q_emb = self.client.embed([question])[0]
-        return self.store.search(q_emb, k=self.top_k)
+    def index_files(
+        self,
+        dir_path: str,
+        exts: Tuple[str, ...] = (".txt", ".md", ".pdf"),
+        batch_chunks: int = 256,
+        block_size: int = 1 << 20,
+        pdf_cache: Optional[PdfTextCache] = None,
+    ) -> int:
+        """
+        Stream every document under ``dir_path`` into the index.
+        
+        Unlike reading files into :meth:`index_texts`, each file is read in
+        blocks and chunked as it streams, and chunks are embedded in batches
+        of ``batch_chunks``, so memory stays bounded for multi-gigabyte files.
+        Produces the same chunks as splitting each file's full text. PDF
+        text comes from ``pdf_cache`` (default: the one named by
+        ``RAG_PDF_CACHE``, opened on the first PDF). Files that cannot be
+        read are skipped with a warning, like :func:`read_text_files` does.
+        
+        Returns:
+            Number of chunks indexed
+            
+        Raises:
+            FileNotFoundError: If the directory doesn't exist
+            ValueError: If no file yielded any text
+        """
+        total = 0
+        produced = False
+        batch: List[TextItem] = []
+        cache_opened = False
+        for file_path in iter_document_files(dir_path, exts):
+            if file_path.name.lower().endswith(".pdf") and pdf_cache is None and not cache_opened:
+                pdf_cache = default_pdf_cache()
+                cache_opened = True
+            blocks = iter_file_blocks(file_path, block_size, pdf_cache)
+            chunks = iter_stream_chunks(blocks, self.chunk_size, self.chunk_overlap, self.tokenizer)
+            while True:
+                # Only reading is guarded: embedding errors must still propagate
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                except ImportError:
+                    print(f"Warning: Skipping PDF {file_path} - PyPDF2 not installed", file=sys.stderr)
+                    break
+                except (UnicodeDecodeError, OSError) as e:
+                    print(f"Warning: Could not read {file_path}: {e}", file=sys.stderr)
+                    break
+                except Exception as e:
+                    # e.g. PyPDF2's PdfReadError for a corrupt PDF
+                    print(f"Warning: Error processing {file_path}: {e}", file=sys.stderr)
+                    break
+                produced = True
+                batch.append(chunk)
+                if len(batch) >= batch_chunks:
+                    total += self.index_chunks(batch)
+                    batch = []
+        if batch:
+            total += self.index_chunks(batch)
+        if not produced:
+            raise ValueError(f"No readable text files found in {dir_path}")
+        return total
+
+    def _model_metadata(self) -> Dict[str, Any]:
+        return {
+            "embedding_model": getattr(self.client, "embedding_model", None),
+            "embedding_dimensions": getattr(self.client, "embedding_dimensions", None),
+        }
+
+    def _check_model(self, path: str, metadata: Dict[str, Any]) -> None:
+        for key, current in self._model_metadata().items():
+            if metadata.get(key) != current:
+                raise ValueError(
+                    f"Index {path} was built with {key}={metadata.get(key)!r}, "
+                    f"but the client uses {current!r}; rebuild the index"
+                )
+
+    def save_index(self, path: str) -> None:
+        """Save the vector index, tagged with the embedding model and chunking that built it."""
+        metadata = {
+            **self._model_metadata(),
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "chunk_unit": "tokens" if self.tokenizer is not None else "chars",
+        }
+        save_index(path, self.store, metadata)
+
+    def export_embeddings(self, path: str) -> int:
+        """
+        Write every chunk with its embedding for bulk transfer; the layout
+        follows the extension (see :func:`.persistence.export_embeddings`).
+
+        Returns:
+            Number of chunks written
+
+        Raises:
+            ValueError: If the store only keeps reduced vectors
+        """
+        if isinstance(self.store, ReducedVectorStore) and self.store.reducer.fitted:
+            raise ValueError("The store keeps reduced vectors only; use save_index to move it")
+        export_embeddings(path, self.store.texts, self.store.embeddings, self._model_metadata())
+        return self.store.size()
+
+    def import_embeddings(self, path: str, replace: bool = False, model: Optional[str] = None) -> int:
+        """
+        Add chunks with precomputed embeddings, e.g. from an offline job,
+        without calling the embeddings API.
+
+        The embedding model is taken from the file's metadata, else from
+        ``model``; when neither names it, a warning is printed and the file
+        is assumed to match the client. The embedding width is always
+        checked against the client's ``embedding_dimensions`` and the
+        vectors already in the store.
+
+        With deduplication enabled, imported chunks go through the
+        near-duplicate filter like indexed ones: copies of chunks already in
+        the store (or earlier in the file) are skipped, and later
+        :meth:`index_texts` calls skip copies of the imported ones.
+
+        Args:
+            path: File or directory written by :func:`.persistence.export_embeddings`
+            replace: Clear the store first instead of appending
+            model: Embedding model of a file whose metadata does not say
+
+        Returns:
+            Number of chunks imported, after deduplication
+
+        Raises:
+            ValueError: If the file was made with a different embedding model
+                or dimension than this pipeline's client or store uses
+        """
+        texts, embeddings, metadata = import_embeddings(path)
+        current = self._model_metadata()
+        file_model = metadata.get("embedding_model") or model
+        if file_model is None:
+            print(f"Warning: {path} does not name its embedding model; "
+                  f"assuming {current['embedding_model']!r}", file=sys.stderr)
+        elif file_model != current["embedding_model"]:
+            raise ValueError(
+                f"{path} was built with embedding_model={file_model!r}, "
+                f"but the client uses {current['embedding_model']!r}"
+            )
+        dim = embeddings.shape[1]
+        # Reduced stores report their reduced width but take full-width vectors
+        store_dim = None if replace or isinstance(self.store, ReducedVectorStore) else self.store.dim
+        for expected, source in (
+            (metadata.get("embedding_dimensions"), "its metadata"),
+            (current["embedding_dimensions"], "the client"),
+            (store_dim, "the store"),
+        ):
+            if expected is not None and dim != expected:
+                raise ValueError(f"{path} holds {dim}-dimensional embeddings, but {source} expects {expected}")
+        if replace:
+            self.store.clear()
+            if self.dedup is not None:
+                self.dedup.clear()
+        mark = 0
+        if self.dedup is not None:
+            mark = self.dedup.size()
+            with self.tracer.span("index.dedup") as span:
+                texts, kept = self.dedup.filter(texts)
+                embeddings = embeddings[kept]
+                span.set("kept", len(texts))
+        try:
+            self.store.add(texts, embeddings)
+        except Exception:
+            if self.dedup is not None:
+                self.dedup.truncate(mark)
+            raise
+        return len(texts)
+
+    def load_index(self, path: str) -> int:
+        """
+        Replace the vector index with one saved by :meth:`save_index`.
+
+        The saved chunking settings are not checked here; they are available
+        afterwards as ``index_metadata``.
+
+        Returns:
+            Number of chunks loaded
 
-    def rerank(self, question: str, candidate_indices: List[int]) -> List[int]:
-        documents = [self.store.texts[i] for i in candidate_indices]
-        results = self.client.rerank(question, documents, top_n=self.rerank_k)
+        Raises:
+            ValueError: If the index was built with a different embedding model
+                or dimensions than this pipeline's client uses
+        """
+        store, metadata = load_index(path)
+        self._check_model(path, metadata)
+        self.store = store
+        self.index_metadata = metadata
+        if self.retrieval_cache is not None:
+            # The old store's id may be reused by a new object
+            self.retrieval_cache.clear()
+        if self.dedup is not None:
+            # Later index_texts calls should still skip copies of loaded chunks
+            self.dedup.clear()
+            self.dedup.filter(store.texts)
+        return store.size()
+
+    def snapshot(self) -> Optional[Any]:
+        """
+        The store's current snapshot, or None for stores that do not offer one.
+
+        Any object with ``texts`` and ``version`` that the store's
+        ``search_snapshot`` accepts will do, e.g. :class:`.StoreSnapshot`.
+
+        Indices returned by :meth:`retrieve` for a snapshot stay valid in its
+        ``texts`` even if the store is added to or cleared meanwhile.
+        """
+        snapshot = getattr(self.store, "snapshot", None)
+        return snapshot() if snapshot is not None else None
+
+    def _texts(self, snap: Optional[Any]) -> Sequence[str]:
+        return snap.texts if snap is not None else self.store.texts
+
+    def retrieve(self, question: str, snapshot: Optional[Any] = None) -> List[Tuple[int, float]]:
+        snap = snapshot if snapshot is not None else self.snapshot()
+        cache = self.retrieval_cache
+        version = snap.version if snap is not None else getattr(self.store, "version", None)
+        if cache is None or version is None:
+            return self._retrieve(question, snap)
+        key = (" ".join(question.split()).casefold(), self.top_k)
+        tag = (id(self.store), version)
+        cached = cache.get(key, tag)
+        if cached is not None:
+            return list(cached)
+        results = self._retrieve(question, snap)
+        cache.put(key, tuple(results), tag)
+        return results
+
+    def _retrieve(self, question: str, snap: Optional[Any]) -> List[Tuple[int, float]]:
+        with self.tracer.span("embed"):
+            q_emb = self.client.embed([question])[0]
+        with self.tracer.span("search"):
+            if snap is not None:
+                return self.store.search_snapshot(snap, q_emb, k=self.top_k)
+            return self.store.search(q_emb, k=self.top_k)
+
+    def rerank(
+        self, question: str, candidate_indices: List[int], texts: Optional[Sequence[str]] = None
+    ) -> List[int]:
+        texts = texts if texts is not None else self.store.texts
+        documents = [texts[i] for i in candidate_indices]
+        with self.tracer.span("rerank", documents=len(documents)):
+            results = self.client.rerank(question, documents, top_n=self.rerank_k)
         # Expect results items to include "index" within given documents list
         # Map back to original corpus indices
         out: List[int] = []
@@ -46,30 +352,128 @@ class RAGPipeline:
                 out.append(candidate_indices[local_idx])
         return out
 
-    def build_context(self, indices: List[int]) -> str:
-        snippets = [self.store.texts[i] for i in indices]
+    def build_context(self, indices: List[int], texts: Optional[Sequence[str]] = None) -> str:
+        texts = texts if texts is not None else self.store.texts
+        snippets = [texts[i] for i in indices]
         return "\n\n---\n\n".join(snippets)
 
     def answer(self, question: str, max_context_docs: Optional[int] = None) -> Dict[str, Any]:
-        candidates = self.retrieve(question)
+        with self.tracer.span("answer"):
+            return self._answer(question, max_context_docs)
+
+    def _answer(self, question: str, max_context_docs: Optional[int]) -> Dict[str, Any]:
+        # One snapshot per question: indices from the search are read back from
+        # its texts, so a concurrent clear or re-index cannot mismatch them
+        snap = self.snapshot()
+        texts = self._texts(snap)
+        candidates = self.retrieve(question, snap)
         cand_indices = [i for i, _ in candidates]
-        reranked = self.rerank(question, cand_indices) if cand_indices else []
-        final_indices = reranked or cand_indices[: (max_context_docs or self.rerank_k)]
-        context = self.build_context(final_indices)
-
-        system_prompt = (
-            "You are a helpful assistant. Use the provided context to answer.\n"
-            "If the answer is not present in the context, say you don't know."
-        )
-        user_prompt = (
-            f"Context:\n{context}\n\nQuestion: {question}\n"
-        )
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-
-        output = self.client.chat(messages, temperature=0.2)
-        sources = [self.store.texts[i] for i in final_indices]
+        fallback = cand_indices[: (max_context_docs or self.rerank_k)]
+        if self.speculative and cand_indices:
+            if self._speculation_slots.acquire(blocking=False):
+                return self._answer_speculative(question, cand_indices, fallback, texts)
+            # Every draft worker is busy; a queued draft would only add latency
+            self._count_speculation("skipped")
+        reranked = self.rerank(question, cand_indices, texts) if cand_indices else []
+        final_indices = reranked or fallback
+        messages = self._messages(question, final_indices, texts)
+        with self.tracer.span("chat"):
+            output = self.client.chat(messages, temperature=0.2)
+        sources = [texts[i] for i in final_indices]
+        return {"answer": output, "sources": sources, "indices": final_indices}
+
+    def _messages(self, question: str, indices: List[int], texts: Sequence[str]) -> List[Dict[str, str]]:
+        with self.tracer.span("context", documents=len(indices)):
+            context = self.build_context(indices, texts)
+
+            system_prompt = (
+                "You are a helpful assistant. Use the provided context to answer.\n"
+                "If the answer is not present in the context, say you don't know."
+            )
+            user_prompt = (
+                f"Context:\n{context}\n\nQuestion: {question}\n"
+            )
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+
+    def _answer_speculative(
+        self, question: str, cand_indices: List[int], draft: List[int], texts: Sequence[str]
+    ) -> Dict[str, Any]:
+        """
+        Start chat on the dense top results while the reranker runs.
+
+        When the reranked set equals the draft set the speculative answer is
+        used as is, hiding the rerank latency; otherwise it is cancelled (or,
+        if already sent, discarded and counted as wasted spend) and chat runs
+        again on the reranked context. A draft that failed is treated like a
+        miss rather than failing the question. The caller holds one of
+        ``_speculation_slots``; it is released when the draft finishes.
+        """
+        draft_messages = self._messages(question, draft, texts)
+
+        def draft_chat() -> str:
+            with self.tracer.span("chat.speculative"):
+                return self.client.chat(draft_messages, temperature=0.2)
+
+        try:
+            speculative = self._speculation_pool().submit(draft_chat)
+        except BaseException:
+            self._speculation_slots.release()
+            raise
+        speculative.add_done_callback(lambda _: self._speculation_slots.release())
+        try:
+            reranked = self.rerank(question, cand_indices, texts)
+        except BaseException:
+            speculative.cancel()
+            raise
+        final_indices = reranked or draft
+        prompt_chars = sum(len(m["content"]) for m in draft_messages)
+        if set(final_indices) == set(draft):
+            try:
+                output = speculative.result()
+            except Exception:
+                self._count_speculation("misses", wasted_chars=prompt_chars)
+            else:
+                self._count_speculation("hits")
+                sources = [texts[i] for i in draft]
+                return {"answer": output, "sources": sources, "indices": draft}
+        else:
+            # A chat request already sent cannot be recalled; its cost is wasted
+            wasted = not speculative.cancel()
+            self._count_speculation("misses", wasted_chars=prompt_chars if wasted else 0)
+        messages = self._messages(question, final_indices, texts)
+        with self.tracer.span("chat"):
+            output = self.client.chat(messages, temperature=0.2)
+        sources = [texts[i] for i in final_indices]
         return {"answer": output, "sources": sources, "indices": final_indices}
 
+    def _speculation_pool(self) -> ThreadPoolExecutor:
+        with self._speculation_lock:
+            if self._speculation_executor is None:
+                self._speculation_executor = ThreadPoolExecutor(
+                    _SPECULATION_WORKERS, thread_name_prefix="speculative-chat"
+                )
+            return self._speculation_executor
+
+    def _count_speculation(self, outcome: str, wasted_chars: int = 0) -> None:
+        """Count a speculation outcome: "hits", "misses" or "skipped"."""
+        with self._speculation_lock:
+            stats = self._speculation
+            stats[outcome] += 1
+            if wasted_chars:
+                stats["wasted_chat_calls"] += 1
+                stats["wasted_prompt_chars"] += wasted_chars
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Retrieval cache hits, misses and invalidations (empty when disabled)."""
+        return self.retrieval_cache.stats() if self.retrieval_cache is not None else {}
+
+    def speculation_stats(self) -> Dict[str, Any]:
+        """Speculative chat outcomes and the extra chat spend they caused."""
+        with self._speculation_lock:
+            stats: Dict[str, Any] = dict(self._speculation)
+        attempts = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / attempts if attempts else 0.0
+        return stats
@@ -0,0 +1,366 @@
+"""Embedding dimension reduction: Matryoshka truncation and PCA projection."""
+
+import abc
+import json
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .text_arena import TextArena, TextItem
+from .vector_store import InMemoryVectorStore, StoreSnapshot, normalize, top_k
+
+
+class DimensionReducer(abc.ABC):
+    """
+    Maps full-width embeddings to ``dim`` dimensions.
+
+    Subclasses that learn from data report ``fitted = False`` until
+    :meth:`fit` has seen at least ``min_fit_rows`` vectors.
+    """
+
+    method = ""
+
+    def __init__(self, dim: int) -> None:
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        self.dim = dim
+        self.fitted = True
+        self.min_fit_rows = 0
+
+    def fit(self, matrix: np.ndarray) -> None:
+        """Learn the projection from a (n, full_dim) matrix."""
+
+    @abc.abstractmethod
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        """Project a (n, full_dim) matrix to (n, dim) float32."""
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the reducer."""
+        return {}
+
+    def config(self) -> Dict[str, object]:
+        """JSON-serializable description of the reducer."""
+        return {"method": self.method, "dim": self.dim}
+
+
+class TruncateReducer(DimensionReducer):
+    """
+    Keep the first ``dim`` coordinates.
+
+    Only meaningful for Matryoshka-trained models (such as Qwen3-Embedding),
+    whose leading dimensions carry most of the signal; the store re-normalizes
+    the shortened vectors.
+    """
+
+    method = "truncate"
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.shape[1] < self.dim:
+            raise ValueError(f"Cannot truncate {matrix.shape[1]}-dimensional embeddings to {self.dim}")
+        return np.ascontiguousarray(matrix[:, :self.dim])
+
+
+class PCAReducer(DimensionReducer):
+    """
+    Project onto the top ``dim`` principal components of the indexed vectors.
+
+    Fitting uses a randomized SVD over at most ``max_fit_rows`` sampled rows,
+    so it stays fast for 4096-wide embeddings. It waits for ``min_fit_rows``
+    vectors (default ``max(2 * dim, 1000)``) so the components are not
+    learned from a handful of chunks.
+    """
+
+    method = "pca"
+
+    def __init__(
+        self,
+        dim: int,
+        min_fit_rows: Optional[int] = None,
+        max_fit_rows: int = 20000,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(dim)
+        self.fitted = False
+        self.min_fit_rows = min_fit_rows if min_fit_rows is not None else max(2 * dim, 1000)
+        if self.min_fit_rows < dim:
+            raise ValueError(f"min_fit_rows must be at least dim ({dim}) to fit the components")
+        self.max_fit_rows = max_fit_rows
+        self.seed = seed
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+
+    def fit(self, matrix: np.ndarray) -> None:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n, full_dim = matrix.shape
+        if n < self.dim or full_dim < self.dim:
+            raise ValueError(f"PCA to {self.dim} dimensions needs at least {self.dim} vectors of that width")
+        rng = np.random.default_rng(self.seed)
+        if n > self.max_fit_rows:
+            matrix = matrix[rng.choice(n, self.max_fit_rows, replace=False)]
+        mean = matrix.mean(axis=0)
+        centered = matrix - mean
+
+        rank = self.dim + 10
+        if rank >= min(centered.shape):
+            _, _, vt = np.linalg.svd(centered, full_matrices=False)
+        else:
+            # Randomized range finder with two power iterations (Halko et al.)
+            basis = centered @ rng.standard_normal((full_dim, rank)).astype(np.float32)
+            for _ in range(2):
+                basis, _ = np.linalg.qr(basis)
+                basis = centered @ (centered.T @ basis)
+            basis, _ = np.linalg.qr(basis)
+            _, _, vt = np.linalg.svd(basis.T @ centered, full_matrices=False)
+        self.mean = mean.astype(np.float32)
+        self.components = np.ascontiguousarray(vt[:self.dim], dtype=np.float32)
+        self.fitted = True
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        if self.components is None or self.mean is None:
+            raise RuntimeError("PCAReducer.transform called before fit")
+        matrix = np.asarray(matrix, dtype=np.float32)
+        return (matrix - self.mean) @ self.components.T
+
+    def state(self) -> Dict[str, np.ndarray]:
+        if self.components is None or self.mean is None:
+            return {}
+        return {"mean": self.mean, "components": self.components}
+
+
+def make_reducer(method: str, dim: int) -> DimensionReducer:
+    """
+    Create a reducer by name.
+
+    Args:
+        method: "truncate" or "pca"
+        dim: Target dimension
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method == "truncate":
+        return TruncateReducer(dim)
+    if method == "pca":
+        return PCAReducer(dim)
+    raise ValueError(f"Unknown dimension reduction method: {method}")
+
+
+def reducer_from_state(config: Dict[str, object], state: Dict[str, np.ndarray]) -> DimensionReducer:
+    """Rebuild a reducer saved with :meth:`DimensionReducer.config` and :meth:`DimensionReducer.state`."""
+    reducer = make_reducer(str(config["method"]), int(config["dim"]))  # type: ignore[arg-type]
+    if isinstance(reducer, PCAReducer) and "components" in state:
+        reducer.mean = np.asarray(state["mean"], dtype=np.float32)
+        reducer.components = np.asarray(state["components"], dtype=np.float32)
+        reducer.fitted = True
+    return reducer
+
+
+class ReducedSnapshot(NamedTuple):
+    """Immutable view of a :class:`ReducedVectorStore`: both inner snapshots."""
+
+    reduced: StoreSnapshot
+    full: StoreSnapshot  # holds at least the reduced rows when rescoring
+    use_reduced: bool
+
+    @property
+    def texts(self) -> TextArena:
+        return self.reduced.texts if self.use_reduced else self.full.texts
+
+    @property
+    def size(self) -> int:
+        return self.reduced.size if self.use_reduced else self.full.size
+
+    @property
+    def version(self) -> int:
+        return self.reduced.version + self.full.version
+
+
+class ReducedVectorStore:
+    """
+    Vector store that searches reduced embeddings, with the same interface
+    as :class:`InMemoryVectorStore`.
+
+    Vectors are added at full width. Until a learned reducer is fitted they
+    are searched at full width; once enough have arrived the reducer is fitted
+    on them and the store switches to the reduced matrix. With ``rescore_k``
+    the full-width vectors are kept too, and the best ``rescore_k`` reduced
+    candidates are re-ranked by exact full-width cosine similarity.
+
+    Like :class:`InMemoryVectorStore`, it can be searched while another
+    thread adds: writers are serialized, full-width rows are added before
+    their reduced copies (so rescoring always finds them), and searches
+    switch to the reduced store only once it holds every row. Like
+    :class:`InMemoryVectorStore`, it offers :meth:`snapshot` and
+    :meth:`search_snapshot` so one question reads consistent rows and texts.
+    """
+
+    def __init__(self, reducer: DimensionReducer, rescore_k: int = 0) -> None:
+        if rescore_k < 0:
+            raise ValueError("rescore_k must be non-negative")
+        self.reducer = reducer
+        self.rescore_k = rescore_k
+        self._reduced = InMemoryVectorStore()
+        # Unfitted buffer, and full-width vectors for rescoring
+        self._full = InMemoryVectorStore()
+        # Whether reads go to the reduced store; set once it is fully built
+        self._use_reduced = reducer.fitted
+        self._write_lock = threading.Lock()
+
+    @property
+    def texts(self) -> TextArena:
+        return self._reduced.texts if self._use_reduced else self._full.texts
+
+    @property
+    def version(self) -> int:
+        """Mutation counter; both inner stores only ever count up."""
+        return self._reduced.version + self._full.version
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._reduced.dim if self._use_reduced else self._full.dim
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """The matrix that is searched (reduced once fitted)."""
+        return self._reduced.embeddings if self._use_reduced else self._full.embeddings
+
+    def add(self, texts: Sequence[TextItem], embeddings: Sequence[Sequence[float]]) -> None:
+        """
+        Add texts with their full-width embeddings.
+
+        Raises:
+            ValueError: If texts and embeddings have different lengths, or
+                the reducer cannot fit or project them; nothing is stored then
+        """
+        if len(texts) != len(embeddings):
+            raise ValueError("texts and embeddings must have same length")
+        if not len(texts):
+            return
+        batch = normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._write_lock:
+            if not self._use_reduced:
+                fit = self._full.size() + len(batch) >= self.reducer.min_fit_rows
+                if fit:
+                    # Fit before storing, so a reducer that rejects the
+                    # vectors leaves the store as it was
+                    full_dim = self._full.dim
+                    if full_dim is not None and batch.shape[1] != full_dim:
+                        raise ValueError(
+                            f"Embedding dimension {batch.shape[1]} does not match store dimension {full_dim}"
+                        )
+                    self.reducer.fit(np.concatenate([self._full.embeddings, batch]) if full_dim else batch)
+                self._full.add(texts, batch)
+                if fit:
+                    self._switch()
+                return
+            reduced = self.reducer.transform(batch)
+            if self.rescore_k:
+                self._full.add(texts, batch)
+            self._reduced.add(texts, reduced)
+
+    def fit(self) -> None:
+        """
+        Fit the reducer on the stored vectors now and switch to reduced search.
+
+        Raises:
+            ValueError: If there are too few vectors to fit
+        """
+        with self._write_lock:
+            self._fit()
+
+    def _fit(self) -> None:
+        if self._use_reduced:
+            return
+        self.reducer.fit(self._full.embeddings)
+        self._switch()
+
+    def _switch(self) -> None:
+        """Build the reduced store from the full-width rows and search it from now on."""
+        full = self._full.embeddings
+        self._reduced.clear()
+        self._reduced.add(self._full.texts, self.reducer.transform(full))
+        self._use_reduced = True
+        if not self.rescore_k:
+            self._full.clear()
+
+    def snapshot(self) -> ReducedSnapshot:
+        """The contents as of the last completed ``add``, ``fit`` or ``clear``."""
+        while True:
+            use_reduced = self._use_reduced
+            # Reduced first: full-width rows are always added before their reduced copies
+            reduced = self._reduced.snapshot()
+            full = self._full.snapshot()
+            # Writers clear the reduced store before the full one, and a fit
+            # empties the full store only after switching: if neither the flag
+            # nor the reduced rows changed meanwhile, the pair is consistent
+            if use_reduced == self._use_reduced and self._reduced.snapshot() is reduced:
+                return ReducedSnapshot(reduced, full, use_reduced)
+
+    def search(self, query_embedding: Sequence[float], k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Search by cosine similarity in the reduced space.
+
+        Returns:
+            List of (index, score) tuples sorted by descending score; scores
+            are full-width cosines when rescoring is enabled
+        """
+        return self.search_snapshot(self.snapshot(), query_embedding, k)
+
+    def search_snapshot(
+        self, snap: ReducedSnapshot, query_embedding: Sequence[float], k: int = 5
+    ) -> List[Tuple[int, float]]:
+        """Search a snapshot taken earlier with :meth:`snapshot`; see :meth:`search`."""
+        if k <= 0:
+            raise ValueError("k must be positive")
+        if not snap.use_reduced:
+            return self._full.search_snapshot(snap.full, query_embedding, k)
+        query = normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))
+        reduced_query = self.reducer.transform(query)[0]
+        if not self.rescore_k:
+            return self._reduced.search_snapshot(snap.reduced, reduced_query, k)
+
+        candidates = self._reduced.search_snapshot(snap.reduced, reduced_query, max(k, self.rescore_k))
+        if not candidates:
+            return []
+        indices = np.array([i for i, _ in candidates])
+        scores = snap.full.matrix[indices] @ query[0]
+        return [(int(indices[local]), score) for local, score in top_k(scores, k)]
+
+    def clear(self) -> None:
+        """Clear all stored texts and embeddings (a fitted reducer is kept)."""
+        with self._write_lock:
+            # Reduced first; snapshot() relies on this order
+            self._reduced.clear()
+            self._full.clear()
+
+    def size(self) -> int:
+        """Return the number of stored vectors."""
+        return self._reduced.size() if self._use_reduced else self._full.size()
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the store (see :mod:`.persistence`)."""
+        out: Dict[str, np.ndarray] = {
+            "reducer_config": np.array(json.dumps({**self.reducer.config(), "rescore_k": self.rescore_k})),
+        }
+        for key, value in self.reducer.state().items():
+            out[f"reducer_{key}"] = value
+        if self._use_reduced:
+            out["embeddings"] = self._reduced.embeddings
+        if self._full.size():
+            out["full_embeddings"] = self._full.embeddings
+        return out
+
+    @classmethod
+    def from_state(cls, texts: Sequence[TextItem], state: Dict[str, np.ndarray]) -> "ReducedVectorStore":
+        """Rebuild a store saved with :meth:`state`."""
+        config = json.loads(str(state["reducer_config"]))
+        reducer_state = {key[len("reducer_"):]: value for key, value in state.items()
+                         if key.startswith("reducer_") and key != "reducer_config"}
+        store = cls(reducer_from_state(config, reducer_state), rescore_k=int(config.get("rescore_k", 0)))
+        if "embeddings" in state:
+            store._reduced.add(texts, state["embeddings"])
+        if "full_embeddings" in state:
+            store._full.add(texts, state["full_embeddings"])
+        return store
@@ -0,0 +1,367 @@
+"""Vector store partitioned across worker processes with scatter-gather search."""
+
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .text_arena import TextArena, TextItem
+from .vector_store import InMemoryVectorStore
+
+
+class ShardedSnapshot(NamedTuple):
+    """Immutable view of a :class:`ShardedVectorStore` at one point in time."""
+
+    texts: TextArena
+    size: int
+    dim: Optional[int]
+    version: int
+    # Shards drop every row on clear(), so a snapshot from an older
+    # generation can no longer be searched
+    generation: int
+
+
+def _shard_worker(conn: Any, store_options: Dict[str, Any]) -> None:
+    """
+    Serve one shard: an InMemoryVectorStore plus the global id of each row.
+
+    Requests are ``(request_id, op, *args)`` and are answered in order with
+    ``(request_id, status, payload)``. Rows arrive in increasing id order, so
+    the rows below a given id are always a prefix of the shard.
+    """
+    store = InMemoryVectorStore(**store_options)
+    ids = np.zeros(0, dtype=np.int64)
+    while True:
+        try:
+            request_id, op, *args = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        try:
+            if op == "add":
+                new_ids, matrix = args
+                store.add([""] * len(new_ids), matrix)
+                ids = np.concatenate([ids, new_ids])
+                reply: Any = None
+            elif op == "search":
+                # Rows at or past limit belong to an add that is not committed yet
+                query, k, limit = args
+                pending = int((ids >= limit).sum())
+                hits = store.search(query, k=k + pending) if len(ids) > pending else []
+                reply = [(int(ids[i]), score) for i, score in hits if ids[i] < limit][:k]
+            elif op == "dump":
+                reply = (ids, np.array(store.embeddings))
+            elif op == "truncate":
+                # Undo a failed add: keep only the rows below limit
+                (limit,) = args
+                keep = ids < limit
+                if not keep.all():
+                    matrix = np.array(store.embeddings)[:len(ids)][keep]
+                    store.clear()
+                    if len(matrix):
+                        store.add([""] * len(matrix), matrix)
+                    ids = ids[keep]
+                reply = None
+            elif op == "clear":
+                store.clear()
+                ids = np.zeros(0, dtype=np.int64)
+                reply = None
+            elif op == "stop":
+                conn.send((request_id, "ok", None))
+                break
+            else:
+                raise ValueError(f"Unknown shard operation: {op}")
+            conn.send((request_id, "ok", reply))
+        except Exception as e:
+            conn.send((request_id, "error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class ShardedVectorStore:
+    """
+    Vector store whose embeddings are partitioned across worker processes.
+
+    Rows are assigned round-robin by global index, so every shard holds an
+    equal slice of the corpus. A search broadcasts the query to all shards,
+    each computes its local top-k on its own core, and the per-shard lists
+    are merged with a heap. Texts stay in the parent process, so the
+    interface matches :class:`InMemoryVectorStore`.
+
+    Each shard has its own request queue: callers tag requests and a reader
+    thread per shard hands replies back, so concurrent searches queue up in
+    the workers instead of waiting for each other's round trips. Writers are
+    serialized, and rows become searchable only once every shard has stored
+    them and their texts are in place. If an add fails on some shards, the
+    others are rolled back; if that fails too the store refuses further use.
+    :meth:`snapshot` and :meth:`search_snapshot` let a caller search and
+    read texts from the same committed state, as with the in-memory store.
+
+    Workers are started with the "spawn" method (safe alongside threads)
+    and run as daemons; call :meth:`close` to stop them early.
+    """
+
+    def __init__(self, num_shards: Optional[int] = None, **store_options: Any) -> None:
+        """
+        Start the shard workers.
+
+        Args:
+            num_shards: Number of worker processes (default: CPU count)
+            **store_options: Passed to each shard's InMemoryVectorStore,
+                e.g. ``binary_prefilter=True``
+        """
+        num_shards = num_shards or os.cpu_count() or 1
+        if num_shards <= 0:
+            raise ValueError("num_shards must be positive")
+        self.num_shards = num_shards
+        self.store_options = store_options
+        self.texts = TextArena()
+        self._dim: Optional[int] = None
+        # Bumped by every mutation, like InMemoryVectorStore.version
+        self.version = 0
+        # Rows visible to searches; grows only after every shard stored them
+        self._size = 0
+        # Bumped by clear(), so searches that straddle it can retry
+        self._generation = 0
+        # Set when shards could not be brought back in line with the texts
+        self._broken: Optional[str] = None
+        self._snapshot = ShardedSnapshot(self.texts, 0, None, 0, 0)
+        self._write_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._conns = []
+        self._procs = []
+        # Per shard: lock around sends, and replies still awaited by request
+        # id (None once the shard's pipe is closed)
+        self._send_locks: List[threading.Lock] = []
+        self._pending: List[Optional[Dict[int, Future]]] = []
+        ctx = multiprocessing.get_context("spawn")
+        for i in range(num_shards):
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(
+                target=_shard_worker,
+                args=(child_conn, store_options),
+                name=f"nebularag-shard-{i}",
+                daemon=True,
+            )
+            proc.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._procs.append(proc)
+            self._send_locks.append(threading.Lock())
+            self._pending.append({})
+            threading.Thread(
+                target=self._receive, args=(i,), name=f"nebularag-shard-{i}-replies", daemon=True
+            ).start()
+
+    def _receive(self, shard: int) -> None:
+        """Hand each reply of one shard to the caller waiting for it."""
+        conn, pending = self._conns[shard], self._pending[shard]
+        if pending is None:
+            return
+        while True:
+            try:
+                request_id, status, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            future = pending.pop(request_id, None)
+            if future is not None:
+                future.set_result((status, payload))
+        with self._send_locks[shard]:
+            waiting = list(pending.values())
+            self._pending[shard] = None
+        for future in waiting:
+            future.set_result(("error", f"shard {shard} exited"))
+
+    def _scatter(self, messages: List[Tuple[Any, ...]]) -> List[Any]:
+        """Queue one message per shard, then wait for every reply."""
+        if not self._conns:
+            raise RuntimeError("ShardedVectorStore is closed")
+        if self._broken:
+            raise RuntimeError(f"ShardedVectorStore is unusable: {self._broken}")
+        futures = []
+        for shard, message in enumerate(messages):
+            future: Future = Future()
+            request_id = next(self._request_ids)
+            with self._send_locks[shard]:
+                pending = self._pending[shard]
+                if pending is None:
+                    future.set_result(("error", f"shard {shard} exited"))
+                else:
+                    pending[request_id] = future
+                    try:
+                        self._conns[shard].send((request_id, *message))
+                    except (OSError, ValueError) as e:
+                        del pending[request_id]
+                        future.set_result(("error", f"shard {shard} unreachable: {e}"))
+            futures.append(future)
+        replies = [future.result() for future in futures]
+        errors = [payload for status, payload in replies if status == "error"]
+        if errors:
+            raise RuntimeError(f"Shard failed: {errors[0]}")
+        return [payload for _, payload in replies]
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Embedding dimension, or None while the store is empty."""
+        snap = self._snapshot
+        return snap.dim if snap.size else None
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Normalized embeddings gathered from all shards in global order."""
+        snap = self._snapshot
+        size, dim = snap.size, snap.dim
+        if not size:
+            return np.zeros((0, 0), dtype=np.float32)
+        out = np.zeros((size, dim or 0), dtype=np.float32)
+        for ids, matrix in self._scatter([("dump",)] * self.num_shards):
+            keep = ids < size
+            out[ids[keep]] = matrix[:len(ids)][keep]
+        return out
+
+    def add(self, texts: Sequence[TextItem], embeddings: Sequence[Sequence[float]]) -> None:
+        """
+        Add texts and their embeddings, spread round-robin over the shards.
+
+        If the add fails, the rows already sent to shards are rolled back.
+
+        Raises:
+            ValueError: If texts and embeddings have different lengths or the
+                dimension differs from the stored embeddings
+            TypeError: If a text is neither a string nor a Chunk
+            RuntimeError: If a shard fails
+        """
+        if len(texts) != len(embeddings):
+            raise ValueError("texts and embeddings must have same length")
+        if not len(texts):
+            return
+        batch = np.asarray(embeddings, dtype=np.float32)
+        if batch.ndim != 2:
+            raise ValueError("embeddings must be a 2-D array of vectors")
+
+        with self._write_lock:
+            if self._size and batch.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {batch.shape[1]} does not match store dimension {self._dim}")
+            start = self._size
+            ids = np.arange(start, start + len(batch), dtype=np.int64)
+            shard_of = ids % self.num_shards
+            try:
+                self._scatter([("add", ids[shard_of == s], batch[shard_of == s]) for s in range(self.num_shards)])
+                # All or nothing, so on failure only the shards need undoing
+                self.texts.extend(texts)
+            except Exception:
+                self._rollback(start)
+                raise
+            self._dim = batch.shape[1]
+            # Publish last: searches only return ids whose texts exist
+            self._size = len(self.texts)
+            self.version += 1
+            self._publish()
+
+    def _rollback(self, size: int) -> None:
+        """Drop rows at or past ``size`` from every shard after a failed add."""
+        try:
+            self._scatter([("truncate", size)] * self.num_shards)
+        except RuntimeError as e:
+            self._broken = f"shards could not be rolled back after a failed add ({e})"
+
+    def snapshot(self) -> ShardedSnapshot:
+        """The committed rows and their texts as of the last ``add`` or ``clear``."""
+        return self._snapshot
+
+    def _publish(self) -> None:
+        """Swap in a snapshot of the committed state; called with the write lock held."""
+        self._snapshot = ShardedSnapshot(self.texts, self._size, self._dim, self.version, self._generation)
+
+    def search(self, query_embedding: Sequence[float], k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Search all shards in parallel and merge their top-k lists.
+
+        Returns:
+            List of (index, score) tuples sorted by descending similarity score
+
+        Raises:
+            ValueError: If k is not positive or the query dimension does not
+                match the stored embeddings
+        """
+        while True:
+            snap = self.snapshot()
+            hits = self.search_snapshot(snap, query_embedding, k)
+            if snap.generation == self._generation:
+                return hits
+
+    def search_snapshot(
+        self, snap: ShardedSnapshot, query_embedding: Sequence[float], k: int = 5
+    ) -> List[Tuple[int, float]]:
+        """
+        Search only the rows committed when ``snap`` was taken.
+
+        Returns an empty list if the store was cleared since then, as the
+        shards no longer hold those rows.
+        """
+        if k <= 0:
+            raise ValueError("k must be positive")
+        if not snap.size:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        if query.shape[0] != snap.dim:
+            raise ValueError(f"Query dimension {query.shape[0]} does not match store dimension {snap.dim}")
+        partials = self._scatter([("search", query, k, snap.size)] * self.num_shards)
+        if snap.generation != self._generation:
+            return []
+        # Each shard list is sorted by (-score, index); merging keeps that order
+        merged = heapq.merge(*partials, key=lambda item: (-item[1], item[0]))
+        return list(itertools.islice(merged, k))
+
+    def clear(self) -> None:
+        """Clear all stored texts and embeddings."""
+        with self._write_lock:
+            self._generation += 1
+            self._size = 0
+            self._dim = None
+            self.texts = TextArena()
+            self.version += 1
+            self._publish()
+            self._scatter([("clear",)] * self.num_shards)
+
+    def size(self) -> int:
+        """Return the number of stored vectors."""
+        return self._snapshot.size
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if not self._conns:
+            return
+        self._broken = None
+        try:
+            self._scatter([("stop",)] * self.num_shards)
+        except RuntimeError:
+            pass
+        for conn, proc in zip(self._conns, self._procs):
+            conn.close()
+            proc.join(timeout=5)
+        self._conns = []
+        self._procs = []
+
+    def __enter__(self) -> "ShardedVectorStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the store (see :mod:`.persistence`)."""
+        config = {"num_shards": self.num_shards, **self.store_options}
+        return {"embeddings": self.embeddings, "store_config": np.array(json.dumps(config))}
+
+    @classmethod
+    def from_state(cls, texts: Sequence[TextItem], state: Dict[str, np.ndarray]) -> "ShardedVectorStore":
+        """Rebuild a store saved with :meth:`state`, starting fresh workers."""
+        config = json.loads(str(state["store_config"]))
+        store = cls(**config)
+        store.add(texts, state["embeddings"])
+        return store
@@ -0,0 +1,197 @@
+"""Process-wide registry of indexed pipelines shared between sessions."""
+
+import copy
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from ..utils.file_utils import read_text_files
+from .rag_pipeline import RAGPipeline
+
+
+class IndexKey(NamedTuple):
+    """Everything that determines the contents of an index."""
+
+    docs_path: str
+    chunk_size: int
+    chunk_overlap: int
+    embedding_model: Optional[str]
+
+
+class SharedIndex:
+    """
+    One pipeline built in the background and shared by every lease on it.
+
+    ``status`` moves from "building" to "ready" or "failed"; ``docs_done``
+    and ``chunks`` report progress while building.
+    """
+
+    def __init__(self, key: IndexKey) -> None:
+        self.key = key
+        self.pipeline: Optional[RAGPipeline] = None
+        self.status = "building"
+        self.error: Optional[str] = None
+        self.docs_total = 0
+        self.docs_done = 0
+        self.chunks = 0
+        self.refs = 0
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def progress(self) -> float:
+        """Fraction of documents indexed, 0.0 to 1.0."""
+        if self._done.is_set():
+            return 1.0
+        return self.docs_done / self.docs_total if self.docs_total else 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the build finishes; returns False on timeout."""
+        return self._done.wait(timeout)
+
+
+class IndexLease:
+    """
+    A session's reference to a :class:`SharedIndex`.
+
+    The reference is dropped by :meth:`release` or, failing that, when the
+    lease is garbage collected (e.g. with the session that held it).
+    """
+
+    def __init__(self, registry: "SharedIndexRegistry", index: SharedIndex) -> None:
+        self.index = index
+        self._finalizer = weakref.finalize(self, registry._release, index)
+
+    def release(self) -> None:
+        """Drop this lease's reference; safe to call more than once."""
+        self._finalizer()
+
+    def session_pipeline(self, top_k: int, rerank_k: int) -> RAGPipeline:
+        """
+        A view of the shared pipeline with per-session query settings.
+
+        The store, client and dedup state are shared, not copied.
+
+        Raises:
+            RuntimeError: If the index is not ready yet
+        """
+        if self.index.pipeline is None or not self.index.ready:
+            raise RuntimeError(f"Index is {self.index.status}")
+        view = copy.copy(self.index.pipeline)
+        view.top_k = top_k
+        view.rerank_k = rerank_k
+        return view
+
+
+class SharedIndexRegistry:
+    """
+    Build each distinct index once per process and share it.
+
+    Indexes are keyed by (resolved docs path, chunk size, chunk overlap,
+    embedding model). The first :meth:`acquire` of a key starts a background
+    build; later ones join it. Indexes are reference counted: once no lease
+    holds one it is kept among the ``max_idle`` most recently released idle
+    indexes, then evicted.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_idle: int = 1,
+        batch_docs: int = 8,
+        reader: Callable[[str], List[str]] = read_text_files,
+    ) -> None:
+        """
+        Args:
+            client: Client shared by every pipeline (a NebulaBlockClient)
+            max_idle: Unreferenced indexes kept for reuse before eviction
+            batch_docs: Documents embedded per step; progress updates per step
+            reader: Function returning the document texts of a directory
+        """
+        if max_idle < 0 or batch_docs <= 0:
+            raise ValueError("max_idle must be non-negative and batch_docs positive")
+        self.client = client
+        self.max_idle = max_idle
+        self.batch_docs = batch_docs
+        self.reader = reader
+        self._indexes: Dict[IndexKey, SharedIndex] = {}
+        self._idle: "OrderedDict[IndexKey, SharedIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key_for(self, docs_path: str, chunk_size: int, chunk_overlap: int) -> IndexKey:
+        return IndexKey(
+            str(Path(docs_path).resolve()),
+            chunk_size,
+            chunk_overlap,
+            getattr(self.client, "embedding_model", None),
+        )
+
+    def acquire(self, docs_path: str, chunk_size: int = 800, chunk_overlap: int = 120) -> IndexLease:
+        """
+        Lease the index for these parameters, starting a build if needed.
+
+        A failed build is retried by the next acquire of the same key.
+        """
+        key = self.key_for(docs_path, chunk_size, chunk_overlap)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None or index.status == "failed":
+                index = SharedIndex(key)
+                self._indexes[key] = index
+                threading.Thread(target=self._build, args=(index,), name="index-build", daemon=True).start()
+            self._idle.pop(key, None)
+            index.refs += 1
+        return IndexLease(self, index)
+
+    def _release(self, index: SharedIndex) -> None:
+        with self._lock:
+            index.refs -= 1
+            if index.refs > 0 or self._indexes.get(index.key) is not index:
+                return
+            self._idle[index.key] = index
+            while len(self._idle) > self.max_idle:
+                key, _ = self._idle.popitem(last=False)
+                del self._indexes[key]
+
+    def _build(self, index: SharedIndex) -> None:
+        key = index.key
+        try:
+            docs = self.reader(key.docs_path)
+            if not docs:
+                raise ValueError(f"No documents found in {key.docs_path}")
+            index.docs_total = len(docs)
+            rag = RAGPipeline(self.client, chunk_size=key.chunk_size, chunk_overlap=key.chunk_overlap)
+            for start in range(0, len(docs), self.batch_docs):
+                batch = docs[start:start + self.batch_docs]
+                index.chunks += rag.index_texts(batch)
+                index.docs_done += len(batch)
+            index.pipeline = rag
+            index.status = "ready"
+        except Exception as e:
+            index.error = str(e)
+            index.status = "failed"
+        finally:
+            index._done.set()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """One summary dict per cached index."""
+        with self._lock:
+            indexes = list(self._indexes.values())
+        return [
+            {
+                "docs_path": index.key.docs_path,
+                "chunk_size": index.key.chunk_size,
+                "chunk_overlap": index.key.chunk_overlap,
+                "embedding_model": index.key.embedding_model,
+                "status": index.status,
+                "progress": index.progress,
+                "chunks": index.chunks,
+                "refs": index.refs,
+            }
+            for index in indexes
+        ]
@@ -0,0 +1,201 @@
+"""Chunk texts stored as byte spans of one shared UTF-8 buffer."""
+
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union, overload
+
+import numpy as np
+
+from ..utils.text_processing import Chunk
+
+# What stores accept as chunk text: a plain string, or a chunk with its
+# offsets in the source so overlap with the previous chunk can be shared
+TextItem = Union[str, Chunk]
+
+
+class TextArena(Sequence[str]):
+    """
+    Append-only sequence of chunk texts backed by one UTF-8 byte buffer.
+
+    Each text is a ``(start, end)`` byte span of the arena, so a million
+    chunks cost two int64 offsets each instead of a million ``str`` objects.
+    Text is decoded only when an item is read, e.g. for the documents of a
+    rerank call or the sources of an answer.
+
+    When consecutive items are :class:`Chunk` tuples whose source offsets
+    overlap (as :func:`iter_chunks` produces them), the shared part is stored
+    once: the new chunk's span starts inside the previous one. The overlap is
+    compared before it is shared, so chunks of different documents are never
+    merged by mistake.
+
+    An arena made by :meth:`from_buffer` keeps the given buffer (e.g. a
+    memory-mapped ``.npy`` or an Arrow string buffer) as a read-only base and
+    appends into a ``bytearray`` tail behind it, so loading never copies the
+    texts. Offsets run across both: the tail starts at ``len(base)``.
+
+    One thread may append while others read: an item's span is written
+    before the length that makes it visible grows. A batch that fails
+    part-way (e.g. on an item that is not text) leaves the arena unchanged.
+    """
+
+    def __init__(self) -> None:
+        self._base = memoryview(b"")
+        self._data = bytearray()
+        self._spans = np.zeros((0, 2), dtype=np.int64)
+        self._size = 0
+        # Last chunk appended, while its bytes still end the arena
+        self._tail: Optional[Chunk] = None
+
+    @classmethod
+    def from_buffer(cls, data: Union[bytes, np.ndarray], spans: np.ndarray) -> "TextArena":
+        """
+        Wrap an encoded buffer and its ``(n, 2)`` byte spans without copying
+        or decoding; the buffer is only read, never written.
+
+        Raises:
+            ValueError: If a span lies outside the buffer
+        """
+        arena = cls()
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data, dtype=np.uint8).reshape(-1)
+        arena._base = memoryview(data).cast("B").toreadonly()
+        spans = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+        if len(spans) and (spans.min() < 0 or spans.max() > len(arena._base) or (spans[:, 0] > spans[:, 1]).any()):
+            raise ValueError("text spans fall outside the text buffer")
+        arena._spans = spans.copy()
+        arena._size = len(spans)
+        return arena
+
+    @property
+    def data(self) -> np.ndarray:
+        """A copy of the arena bytes as a uint8 array (a view would block appends)."""
+        return np.frombuffer(bytes(self._base) + bytes(self._data), dtype=np.uint8)
+
+    @property
+    def spans(self) -> np.ndarray:
+        """``(start, end)`` byte offsets of every item, shape (len, 2)."""
+        return self._spans[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the text bytes and the span index."""
+        return len(self._base) + len(self._data) + self._spans.nbytes
+
+    def _end(self) -> int:
+        """Byte offset where the next appended text starts."""
+        return len(self._base) + len(self._data)
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed > len(self._spans):
+            grown = np.zeros((max(needed, 2 * len(self._spans), 64), 2), dtype=np.int64)
+            grown[:self._size] = self._spans[:self._size]
+            self._spans = grown
+
+    def append(self, item: TextItem) -> None:
+        self.extend([item])
+
+    def extend(self, items: Iterable[TextItem]) -> None:
+        """
+        Append texts or chunks.
+
+        Another arena is copied in bulk, without decoding its texts; an
+        empty arena shares the other's read-only base instead of copying it.
+        """
+        if isinstance(items, TextArena):
+            self._reserve(len(items))
+            if not self._end():
+                self._base = items._base
+                self._data += items._data
+                self._spans[self._size:self._size + len(items)] = items.spans
+            else:
+                self._spans[self._size:self._size + len(items)] = items.spans + self._end()
+                self._data += items._base
+                self._data += items._data
+            self._size += len(items)
+            self._tail = None
+            return
+        if not isinstance(items, Sequence):
+            items = list(items)
+        for item in items:
+            if not isinstance(item, (str, Chunk)):
+                raise TypeError(f"TextArena items must be str or Chunk, not {type(item).__name__}")
+        self._reserve(len(items))
+        # All or nothing: spans are written past the visible length, which
+        # grows once the whole batch is in, and bytes are cut back on failure
+        data_end, tail, size = len(self._data), self._tail, self._size
+        try:
+            for item in items:
+                if isinstance(item, str):
+                    start = self._end()
+                    self._data += item.encode("utf-8", "surrogatepass")
+                    self._tail = None
+                else:
+                    start = self._append_chunk(item)
+                self._spans[size] = (start, self._end())
+                size += 1
+        except BaseException:
+            del self._data[data_end:]
+            self._tail = tail
+            raise
+        self._size = size
+
+    def _append_chunk(self, chunk: Chunk) -> int:
+        """Append a chunk, sharing its overlap with the previous one; returns its byte start."""
+        tail, self._tail = self._tail, chunk
+        if tail is not None and tail.start < chunk.start < tail.end <= chunk.end:
+            shared = tail.end - chunk.start
+            if tail.text[-shared:] == chunk.text[:shared]:
+                start = self._end() - len(chunk.text[:shared].encode("utf-8", "surrogatepass"))
+                self._data += chunk.text[shared:].encode("utf-8", "surrogatepass")
+                return start
+        start = self._end()
+        self._data += chunk.text.encode("utf-8", "surrogatepass")
+        return start
+
+    def clear(self) -> None:
+        self._base = memoryview(b"")
+        self._data = bytearray()
+        self._spans = np.zeros((0, 2), dtype=np.int64)
+        self._size = 0
+        self._tail = None
+
+    def _decode(self, i: int) -> str:
+        start, end = self._spans[i]
+        split = len(self._base)
+        if end <= split:
+            raw = bytes(self._base[start:end])
+        elif start >= split:
+            raw = self._data[start - split:end - split]
+        else:
+            raw = bytes(self._base[start:]) + self._data[:end - split]
+        return raw.decode("utf-8", "surrogatepass")
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(self._size))]
+        i = index.__index__()
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("TextArena index out of range")
+        return self._decode(i)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._size):
+            yield self._decode(i)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (TextArena, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TextArena({self._size} texts, {self._end()} bytes)"
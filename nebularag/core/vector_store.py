@@ -1,6 +1,15 @@
-from typing import List, Tuple
+import heapq
+import itertools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 import math
 
+import numpy as np
+
+from .text_arena import TextArena, TextItem
+
 
 def _dot(a: List[float], b: List[float]) -> float:
     """Calculate dot product of two vectors."""
@@ -36,39 +45,163 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     return _dot(a, b) / (na * nb)
 
 
+class StoreSnapshot(NamedTuple):
+    """Immutable view of a store's contents at one version."""
+
+    matrix: np.ndarray  # read-only (size, dim) normalized embeddings
+    codes: np.ndarray  # read-only sign codes when binary_prefilter is on
+    texts: TextArena  # may hold rows added after this snapshot; indices < size are stable
+    size: int
+    version: int
+
+
+def _empty_snapshot(texts: TextArena, version: int) -> StoreSnapshot:
+    return StoreSnapshot(
+        np.zeros((0, 0), dtype=np.float32), np.zeros((0, 0), dtype=np.uint64), texts, 0, version
+    )
+
+
 class InMemoryVectorStore:
     """
     In-memory vector store for storing and searching text embeddings.
     
-    This implementation uses cosine similarity for vector search and stores
-    both text and embeddings in memory for fast retrieval.
+    Embeddings are kept L2-normalized in one contiguous float32 matrix, so a
+    cosine search is a single matrix-vector product. The matrix grows by
+    doubling, keeping repeated ``add`` calls amortized O(1) per vector.
+    
+    With ``binary_prefilter`` the store also keeps 1-bit sign codes of every
+    embedding packed into uint64 words (32x smaller than float32). A search
+    first ranks all codes by Hamming distance to the query's code, then
+    computes exact cosine only for the ``max(shortlist_factor * k,
+    min_shortlist)`` closest; results keep the same contract but may miss
+    true neighbours whose sign pattern differs a lot from the query's.
+    
+    With ``search_threads`` above one, exact scans of stores larger than
+    ``block_rows`` split the matrix into row blocks scored on a thread pool
+    (NumPy releases the GIL inside the matrix-vector product); per-block
+    top-k lists are merged, so results are identical to a single-threaded
+    scan.
+    
+    The store is safe to search from many threads while one thread adds.
+    Rows are append-only: a writer fills rows past the published size (or a
+    grown copy of the buffers), then publishes a new :class:`StoreSnapshot`
+    with a single attribute assignment. Every read works on the snapshot it
+    loaded first, so searches never block on ingestion and never see a
+    half-written batch. Writers are serialized by a lock.
     """
     
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        binary_prefilter: bool = False,
+        shortlist_factor: int = 10,
+        min_shortlist: int = 256,
+        search_threads: int = 1,
+        block_rows: int = 65536,
+    ) -> None:
         """Initialize an empty vector store."""
-        self.texts: List[str] = []
-        self.embeddings: List[List[float]] = []
+        if shortlist_factor <= 0 or min_shortlist <= 0:
+            raise ValueError("shortlist_factor and min_shortlist must be positive")
+        if search_threads <= 0 or block_rows <= 0:
+            raise ValueError("search_threads and block_rows must be positive")
+        # Chunk texts live as byte spans of one buffer and are decoded on access
+        self.texts = TextArena()
+        self.binary_prefilter = binary_prefilter
+        self.shortlist_factor = shortlist_factor
+        self.min_shortlist = min_shortlist
+        self.search_threads = search_threads
+        self.block_rows = block_rows
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Writer-side buffers; rows below the published size are never modified
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._codes = np.zeros((0, 0), dtype=np.uint64)
+        self._size = 0
+        self._snapshot = _empty_snapshot(self.texts, 0)
+
+    def snapshot(self) -> StoreSnapshot:
+        """The contents as of the last completed ``add`` or ``clear``."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Bumped by every mutation, so callers can tell when cached results are stale."""
+        return self._snapshot.version
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Embedding dimension, or None while the store is empty."""
+        snap = self._snapshot
+        return snap.matrix.shape[1] if snap.size else None
 
-    def add(self, texts: List[str], embeddings: List[List[float]]) -> None:
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Read-only view of the stored (normalized) embeddings, shape (size, dim)."""
+        return self._snapshot.matrix
+
+    def add(self, texts: Sequence[TextItem], embeddings: Sequence[Sequence[float]]) -> None:
         """
         Add texts and their embeddings to the store.
         
         Args:
-            texts: List of text strings
-            embeddings: List of embedding vectors (same length as texts)
+            texts: Text strings, or :class:`Chunk` tuples whose overlap with
+                the previous chunk is then stored only once
+            embeddings: Embedding vectors (same length as texts); a list of
+                lists or a 2-D array
             
         Raises:
-            ValueError: If texts and embeddings have different lengths
+            ValueError: If texts and embeddings have different lengths or the
+                dimension differs from the stored embeddings
         """
         if len(texts) != len(embeddings):
             raise ValueError("texts and embeddings must have same length")
-        if not texts:
+        if not len(texts):
             return
-        
+
+        batch = np.asarray(embeddings, dtype=np.float32)
+        if batch.ndim != 2:
+            raise ValueError("embeddings must be a 2-D array of vectors")
+        with self._write_lock:
+            self._append(texts, batch)
+
+    def _append(self, texts: Sequence[TextItem], batch: np.ndarray) -> None:
+        if self._size and batch.shape[1] != self._matrix.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {batch.shape[1]} does not match store dimension {self._matrix.shape[1]}"
+            )
+
+        needed = self._size + len(batch)
+        if needed > self._matrix.shape[0] or batch.shape[1] != self._matrix.shape[1]:
+            # Grow into fresh buffers; published snapshots keep the old ones
+            capacity = max(needed, 2 * self._matrix.shape[0], 64)
+            grown = np.zeros((capacity, batch.shape[1]), dtype=np.float32)
+            if self._size:
+                grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+            if self.binary_prefilter:
+                codes = np.zeros((capacity, _code_words(batch.shape[1])), dtype=np.uint64)
+                if self._size:
+                    codes[:self._size] = self._codes[:self._size]
+                self._codes = codes
+
+        rows = self._matrix[self._size:needed]
+        rows[:] = batch
+        normalize(rows, out=rows)
+        if self.binary_prefilter:
+            self._codes[self._size:needed] = sign_codes(rows)
         self.texts.extend(texts)
-        self.embeddings.extend(embeddings)
+        self._size = needed
+        self._publish()
+
+    def _publish(self) -> None:
+        """Swap in a snapshot of the current buffers; called with the write lock held."""
+        matrix = self._matrix[:self._size]
+        matrix.flags.writeable = False
+        codes = self._codes[:self._size]
+        codes.flags.writeable = False
+        self._snapshot = StoreSnapshot(matrix, codes, self.texts, self._size, self._snapshot.version + 1)
 
-    def search(self, query_embedding: List[float], k: int = 5) -> List[Tuple[int, float]]:
+    def search(self, query_embedding: Sequence[float], k: int = 5) -> List[Tuple[int, float]]:
         """
         Search for the most similar vectors using cosine similarity.
         
@@ -80,31 +213,179 @@ class InMemoryVectorStore:
             List of (index, score) tuples sorted by descending similarity score
             
         Raises:
-            ValueError: If k is not positive or if store is empty
+            ValueError: If k is not positive or the query dimension does not
+                match the stored embeddings
         """
         if k <= 0:
             raise ValueError("k must be positive")
-        if not self.embeddings:
+        return self.search_snapshot(self._snapshot, query_embedding, k)
+
+    def search_snapshot(
+        self, snap: StoreSnapshot, query_embedding: Sequence[float], k: int = 5
+    ) -> List[Tuple[int, float]]:
+        """Search a snapshot taken earlier with :meth:`snapshot`; see :meth:`search`."""
+        if not snap.size:
             return []
-        
-        scores: List[Tuple[int, float]] = []
-        for i, emb in enumerate(self.embeddings):
-            try:
-                score = cosine_similarity(query_embedding, emb)
-                scores.append((i, score))
-            except ValueError:
-                # Skip embeddings with different dimensions
-                continue
-        
-        scores.sort(key=lambda t: t[1], reverse=True)
-        return scores[:k]
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        if query.shape[0] != snap.matrix.shape[1]:
+            raise ValueError(
+                f"Query dimension {query.shape[0]} does not match store dimension {snap.matrix.shape[1]}"
+            )
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return top_k(np.zeros(snap.size, dtype=np.float32), k)
+        query = query / norm
+
+        shortlist = max(self.shortlist_factor * k, self.min_shortlist)
+        if not self.binary_prefilter or shortlist >= snap.size:
+            return self._scan(snap.matrix, query, k)
+
+        # Stage 1: Hamming distance between sign codes; stage 2: exact cosine on the shortlist
+        distances = hamming_distances(snap.codes, sign_codes(query[None, :])[0])
+        candidates = np.argpartition(distances, shortlist - 1)[:shortlist]
+        candidates.sort()
+        scores = snap.matrix[candidates] @ query
+        return [(int(candidates[local]), score) for local, score in top_k(scores, k)]
     
+    def _scan(self, matrix: np.ndarray, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Exact top-k over every row, split into blocks when threads are enabled."""
+        size = len(matrix)
+        if self.search_threads == 1 or size <= self.block_rows:
+            return top_k(matrix @ query, k)
+
+        def score_block(start: int) -> List[Tuple[int, float]]:
+            scores = matrix[start:start + self.block_rows] @ query
+            return [(start + i, score) for i, score in top_k(scores, k)]
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.search_threads, thread_name_prefix="vector-search")
+        partials = list(self._executor.map(score_block, range(0, size, self.block_rows)))
+        # Blocks are sorted by (-score, index) like top_k, so the merge keeps its tie order
+        merged = heapq.merge(*partials, key=lambda item: (-item[1], item[0]))
+        return list(itertools.islice(merged, k))
+
     def clear(self) -> None:
         """Clear all stored texts and embeddings."""
-        self.texts.clear()
-        self.embeddings.clear()
+        with self._write_lock:
+            # Fresh objects, so searches still running on old snapshots keep their texts
+            self.texts = TextArena()
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._codes = np.zeros((0, 0), dtype=np.uint64)
+            self._size = 0
+            self._snapshot = _empty_snapshot(self.texts, self._snapshot.version + 1)
     
     def size(self) -> int:
         """Return the number of stored vectors."""
-        return len(self.texts)
+        return self._snapshot.size
+
+    def config(self) -> Dict[str, object]:
+        """JSON-serializable search options, saved alongside the embeddings."""
+        return {
+            "binary_prefilter": self.binary_prefilter,
+            "shortlist_factor": self.shortlist_factor,
+            "min_shortlist": self.min_shortlist,
+            "search_threads": self.search_threads,
+            "block_rows": self.block_rows,
+        }
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to rebuild the store (see :mod:`.persistence`)."""
+        return {"embeddings": self.embeddings, "store_config": np.array(json.dumps(self.config()))}
+
+    @classmethod
+    def from_state(cls, texts: Sequence[TextItem], state: Dict[str, np.ndarray]) -> "InMemoryVectorStore":
+        """Rebuild a store saved with :meth:`state`; sign codes are recomputed."""
+        config = json.loads(str(state["store_config"])) if "store_config" in state else {}
+        store = cls(**config)
+        store.add(texts, state["embeddings"])
+        return store
+
+
+def _code_words(dim: int) -> int:
+    return (dim + 63) // 64
 
+
+def sign_codes(matrix: np.ndarray) -> np.ndarray:
+    """
+    Pack the sign bits of each row into uint64 words.
+    
+    Args:
+        matrix: 2-D float array of shape (n, dim)
+        
+    Returns:
+        uint64 array of shape (n, ceil(dim / 64)); bit set where value > 0
+    """
+    n, dim = matrix.shape
+    words = _code_words(dim)
+    bits = np.packbits(matrix > 0, axis=1)
+    padded = np.zeros((n, words * 8), dtype=np.uint8)
+    padded[:, :bits.shape[1]] = bits
+    return padded.view(np.uint64)
+
+
+# Bits set in every byte value, for NumPy versions without bitwise_count
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """
+    Hamming distance from one packed code to every row of ``codes``.
+    
+    Args:
+        codes: uint64 array of shape (n, words)
+        query_code: uint64 array of shape (words,)
+        
+    Returns:
+        int array of shape (n,) with the number of differing bits
+    """
+    diff = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT8[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+def normalize(matrix: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Scale rows to unit L2 norm; all-zero rows are left as zeros.
+    
+    Args:
+        matrix: 2-D float array
+        out: Optional output array (may be ``matrix`` itself)
+        
+    Returns:
+        The normalized float32 array
+    """
+    if out is None:
+        out = np.array(matrix, dtype=np.float32)
+    elif out is not matrix:
+        out[:] = matrix
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+def top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """
+    Select the ``k`` best scores without sorting the whole array.
+    
+    Ties keep ascending index order, matching a stable descending sort.
+    
+    Args:
+        scores: 1-D array of similarity scores
+        k: Number of results
+        
+    Returns:
+        List of (index, score) tuples sorted by descending score
+    """
+    n = scores.shape[0]
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        # Include every index tied with the k-th score so ties break by index
+        kth = scores[candidates].min()
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))[:k]
+    return [(int(i), float(scores[i])) for i in candidates[order]]
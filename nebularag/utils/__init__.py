@@ -1,6 +1,35 @@
 """Utility functions and helpers for RAG Example."""
 
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
 from .file_utils import read_text_files, validate_directory
-from .text_processing import split_text
+from .text_processing import Chunk, iter_chunks, split_text
+from .tokenization import RegexTokenizer, Tokenizer
+from .tracing import NULL_TRACER, LoggingSink, Tracer
+
+if TYPE_CHECKING:
+    from .dedup import DedupStats, NearDuplicateFilter
+
+# Imported on first access because they need NumPy
+_LAZY = {
+    "NearDuplicateFilter": ".dedup",
+    "DedupStats": ".dedup",
+}
+
+__all__ = [
+    "read_text_files",
+    "validate_directory",
+    "split_text",
+    "iter_chunks",
+    "Chunk",
+    "Tokenizer",
+    "RegexTokenizer",
+    "NearDuplicateFilter",
+    "DedupStats",
+    "Tracer",
+    "LoggingSink",
+    "NULL_TRACER",
+]
 
-__all__ = ["read_text_files", "validate_directory", "split_text"]
+__getattr__, __dir__ = attach(__name__, _LAZY, __all__)
@@ -0,0 +1,80 @@
+"""Small thread-safe caches."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire ``ttl_s`` seconds after insertion.
+
+    Each entry can carry a version tag; :meth:`get` treats an entry whose
+    tag differs from the caller's current version as missing and drops it,
+    so bumping a version invalidates everything cached under older ones.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            max_entries: Least recently used entries are evicted beyond this
+            ttl_s: Seconds an entry stays valid (None: no expiry)
+            clock: Time source, replaceable in tests
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if ttl_s is not None and ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.clock = clock
+        # key -> (expires_at, version, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "expired": 0, "stale": 0, "evicted": 0}
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        """Return the cached value, or None if missing, expired or from another version."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            expires_at, entry_version, value = entry
+            if expires_at <= self.clock() or entry_version != version:
+                del self._entries[key]
+                self._counts["expired" if entry_version == version else "stale"] += 1
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Any = None) -> None:
+        expires_at = self.clock() + self.ttl_s if self.ttl_s is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counts["evicted"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counts, size=len(self._entries))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,207 @@
+"""Near-duplicate detection for chunks using MinHash signatures and LSH banding."""
+
+import hashlib
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+
+# Mersenne prime modulus for the universal hash family; keeps a * x + b
+# inside uint64 for 31-bit inputs and coefficients.
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+@dataclass
+class DedupStats:
+    """Counters describing how much work deduplication saved."""
+
+    seen: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    chars_seen: int = 0
+    chars_dropped: int = 0
+
+    @property
+    def dropped(self) -> int:
+        """Total number of chunks that were dropped."""
+        return self.exact_duplicates + self.near_duplicates
+
+    @property
+    def savings(self) -> float:
+        """Fraction of the seen characters that never had to be embedded."""
+        return self.chars_dropped / self.chars_seen if self.chars_seen else 0.0
+
+
+class NearDuplicateFilter:
+    """
+    Streaming near-duplicate filter for text chunks.
+
+    Each chunk is reduced to word shingles and a MinHash signature whose
+    agreement rate estimates Jaccard similarity. Signatures are split into
+    LSH bands so only chunks sharing a band are compared, which keeps the
+    cost per chunk constant regardless of how many chunks were seen.
+    Exact duplicates are caught first by a 128-bit BLAKE2b digest of the
+    normalized text, wide enough that distinct chunks never collide in practice.
+
+    Kept chunks are numbered in insertion order; ``links[n]`` counts how many
+    duplicates were folded into kept chunk ``n``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ) -> None:
+        """
+        Args:
+            threshold: Estimated Jaccard similarity at or above which a chunk is
+                treated as a duplicate (0 < threshold <= 1)
+            num_perm: Number of hash permutations in each signature
+            bands: Number of LSH bands; must divide num_perm
+            shingle_size: Number of consecutive words per shingle
+            seed: Seed for the hash coefficients
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if num_perm <= 0 or bands <= 0 or num_perm % bands:
+            raise ValueError("bands must be a positive divisor of num_perm")
+        if shingle_size <= 0:
+            raise ValueError("shingle_size must be positive")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=num_perm).astype(np.uint64)
+
+        self._exact: Dict[bytes, int] = {}
+        self._keys: List[bytes] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        self.links: List[int] = []
+        self.stats = DedupStats()
+
+    def _signature(self, words: List[str]) -> np.ndarray:
+        """Compute the MinHash signature of a list of normalized words."""
+        k = self.shingle_size
+        if len(words) <= k:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        ) % _PRIME
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    def check(self, text: str) -> Optional[int]:
+        """
+        Register a chunk, or report the kept chunk it duplicates.
+
+        Args:
+            text: Chunk text
+
+        Returns:
+            Number of the kept chunk this one duplicates, or None if the chunk
+            is new and has been registered under number ``len(links) - 1``
+        """
+        words = _WORD_RE.findall(text.lower())
+        self.stats.seen += 1
+        self.stats.chars_seen += len(text)
+
+        key = hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=16).digest()
+        match = self._exact.get(key)
+        if match is not None:
+            self.stats.exact_duplicates += 1
+            self.stats.chars_dropped += len(text)
+            self.links[match] += 1
+            return match
+
+        signature = self._signature(words)
+        band_keys = [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        for candidate in sorted(candidates):
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self.threshold:
+                self.stats.near_duplicates += 1
+                self.stats.chars_dropped += len(text)
+                self.links[candidate] += 1
+                return candidate
+
+        number = len(self._signatures)
+        self._exact[key] = number
+        self._keys.append(key)
+        self._signatures.append(signature)
+        self.links.append(0)
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band].setdefault(band_key, []).append(number)
+        return None
+
+    def filter(self, texts: List[str]) -> Tuple[List[str], List[int]]:
+        """
+        Drop duplicates from a batch of chunks.
+
+        Args:
+            texts: Chunk texts in ingest order
+
+        Returns:
+            Tuple of (kept texts, positions of the kept texts in ``texts``)
+        """
+        kept: List[str] = []
+        positions: List[int] = []
+        for i, text in enumerate(texts):
+            if self.check(text) is None:
+                kept.append(text)
+                positions.append(i)
+        return kept, positions
+
+    def size(self) -> int:
+        """Return the number of kept chunks."""
+        return len(self._signatures)
+
+    def truncate(self, size: int) -> None:
+        """
+        Forget kept chunks numbered ``size`` and above.
+
+        Used to roll back a batch whose chunks never made it into the store,
+        e.g. because embedding them failed. Statistics are left untouched.
+        """
+        while len(self._signatures) > size:
+            number = len(self._signatures) - 1
+            signature = self._signatures.pop()
+            del self._exact[self._keys.pop()]
+            self.links.pop()
+            for band in range(self.bands):
+                band_key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                bucket = self._buckets[band][band_key]
+                bucket.remove(number)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def clear(self) -> None:
+        """Forget every registered chunk and reset the statistics."""
+        self._exact.clear()
+        self._keys.clear()
+        for bucket in self._buckets:
+            bucket.clear()
+        self._signatures.clear()
+        self.links.clear()
+        self.stats = DedupStats()
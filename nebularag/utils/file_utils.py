@@ -1,16 +1,24 @@
 """File handling utilities."""
 
+import codecs
 import os
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
 
-try:
-    from PyPDF2 import PdfReader
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
-    print("Warning: PyPDF2 not installed. PDF support disabled.", file=sys.stderr)
+from .pdf_text import PdfTextCache, default_pdf_cache, iter_pdf_pages, load_pdf_reader
+
+
+def __getattr__(name: str) -> Any:
+    # PDF_SUPPORT and PdfReader stay importable but are resolved lazily
+    if name == "PDF_SUPPORT":
+        return load_pdf_reader() is not None
+    if name == "PdfReader":
+        reader = load_pdf_reader()
+        if reader is None:
+            raise AttributeError("PdfReader is unavailable: PyPDF2 is not installed")
+        return reader
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def validate_directory(dir_path: str) -> Path:
@@ -42,42 +50,146 @@ def validate_directory(dir_path: str) -> Path:
     return dir_path
 
 
-def extract_text_from_pdf(file_path: Path) -> str:
+def extract_text_from_pdf(
+    file_path: Union[str, Path],
+    cache: Optional[PdfTextCache] = None,
+    workers: Optional[int] = None,
+) -> str:
     """
     Extract text from a PDF file.
     
     Args:
         file_path: Path to the PDF file
+        cache: Page-level text cache; only uncached pages are parsed
+        workers: Processes used for parsing (default: CPU count)
         
     Returns:
         Extracted text as a string
         
     Raises:
-        ImportError: If PyPDF2 is not installed
+        ImportError: If pages need parsing and PyPDF2 is not installed
         Exception: If PDF cannot be read
     """
-    if not PDF_SUPPORT:
-        raise ImportError("PyPDF2 is required for PDF support. Install it with: pip install PyPDF2")
-    
     try:
-        reader = PdfReader(str(file_path))
-        text_parts = []
-        
-        for page_num, page in enumerate(reader.pages, 1):
-            try:
-                text = page.extract_text()
-                if text.strip():
-                    text_parts.append(text.strip())
-            except Exception as e:
-                print(f"Warning: Could not extract text from page {page_num} of {file_path}: {e}", file=sys.stderr)
-                continue
-        
+        text_parts = [text.strip() for text in iter_pdf_pages(file_path, cache, workers) if text.strip()]
         return "\n\n".join(text_parts)
+    except ImportError:
+        raise
     except Exception as e:
         raise Exception(f"Error reading PDF {file_path}: {e}")
 
 
-def read_text_files(dir_path: str, exts: Tuple[str, ...] = (".txt", ".md", ".pdf")) -> List[str]:
+def iter_text_blocks(
+    file_path: Union[str, Path],
+    block_size: int = 1 << 20,
+    encodings: Sequence[str] = ("utf-8", "cp1252", "latin-1"),
+) -> Iterator[str]:
+    """
+    Read a text file as decoded blocks of about ``block_size`` bytes.
+    
+    Decoding is incremental, so multi-byte characters split between reads
+    are kept whole. If the data stops being valid in the current encoding,
+    everything before the bad byte keeps that decoding and the rest of the
+    file is decoded with the next encoding in ``encodings``; nothing is
+    read twice. A UTF-8 byte order mark is skipped. Line endings are
+    translated to ``\\n`` as in text mode, including a ``\\r\\n`` split
+    between reads.
+    
+    Args:
+        file_path: Text file to read
+        block_size: Bytes read per step
+        encodings: Encodings to try in order; end with one that accepts any
+            byte (such as latin-1) to never fail
+        
+    Yields:
+        Decoded text blocks
+        
+    Raises:
+        UnicodeDecodeError: If no encoding in ``encodings`` can decode the data
+    """
+    if block_size <= 0 or not encodings:
+        raise ValueError("block_size must be positive and encodings non-empty")
+    remaining = list(encodings)
+    encoding = remaining.pop(0)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    # A trailing "\r" waits for the next block in case a "\n" follows it
+    carry = ""
+    with open(file_path, "rb") as fh:
+        raw = fh.read(block_size)
+        if raw.startswith(codecs.BOM_UTF8) and codecs.lookup(encoding).name == "utf-8":
+            raw = raw[len(codecs.BOM_UTF8):]
+        while True:
+            final = not raw
+            pending = decoder.getstate()[0]
+            head = ""
+            while True:
+                try:
+                    text = head + decoder.decode(raw, final=final)
+                    break
+                except UnicodeDecodeError as e:
+                    if not remaining:
+                        raise
+                    # e.start indexes the bytes carried over from the last block plus this one
+                    data = pending + raw
+                    head += data[:e.start].decode(encoding)
+                    encoding = remaining.pop(0)
+                    print(f"Warning: {file_path} is not valid {e.encoding}; decoding the rest as {encoding}",
+                          file=sys.stderr)
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                    raw, pending = data[e.start:], b""
+            text = carry + text
+            carry = "\r" if text.endswith("\r") and not final else ""
+            if carry:
+                text = text[:-1]
+            if text:
+                yield text.replace("\r\n", "\n").replace("\r", "\n")
+            if final:
+                break
+            raw = fh.read(block_size)
+
+
+def iter_document_files(dir_path: str, exts: Tuple[str, ...] = (".txt", ".md", ".pdf")) -> Iterator[Path]:
+    """
+    Yield the files under ``dir_path`` whose extension is in ``exts``.
+    
+    Raises:
+        FileNotFoundError: If the directory doesn't exist
+    """
+    for file_path in validate_directory(dir_path).rglob("*"):
+        if file_path.is_file() and any(file_path.name.lower().endswith(ext) for ext in exts):
+            yield file_path
+
+
+def iter_file_blocks(
+    file_path: Union[str, Path],
+    block_size: int = 1 << 20,
+    pdf_cache: Optional[PdfTextCache] = None,
+) -> Iterator[str]:
+    """
+    Stream a document's text: PDFs page by page, other files in blocks.
+    
+    PDF pages are trimmed, empty ones skipped and the rest separated by a
+    blank line, matching :func:`extract_text_from_pdf`.
+    
+    Raises:
+        ImportError: If a PDF needs parsing and PyPDF2 is not installed
+    """
+    if str(file_path).lower().endswith(".pdf"):
+        separator = ""
+        for page in iter_pdf_pages(file_path, pdf_cache):
+            page = page.strip()
+            if page:
+                yield separator + page
+                separator = "\n\n"
+    else:
+        yield from iter_text_blocks(file_path, block_size)
+
+
+def read_text_files(
+    dir_path: str,
+    exts: Tuple[str, ...] = (".txt", ".md", ".pdf"),
+    pdf_cache: Optional[PdfTextCache] = None,
+) -> List[str]:
     """
     Read all text files from a directory and its subdirectories.
     Supports .txt, .md, and .pdf files.
@@ -85,6 +197,8 @@ def read_text_files(dir_path: str, exts: Tuple[str, ...] = (".txt", ".md", ".pdf
     Args:
         dir_path: Path to the directory containing text files
         exts: Tuple of file extensions to include (case-insensitive)
+        pdf_cache: Extracted-text cache for PDFs (default: the one named by
+            ``RAG_PDF_CACHE``, opened when the first PDF is found)
         
     Returns:
         List of file contents as strings
@@ -96,19 +210,23 @@ def read_text_files(dir_path: str, exts: Tuple[str, ...] = (".txt", ".md", ".pdf
     dir_path = validate_directory(dir_path)
     
     out: List[str] = []
+    cache_opened = False
     for file_path in dir_path.rglob("*"):
         if file_path.is_file() and any(file_path.name.lower().endswith(ext) for ext in exts):
             try:
                 # Handle PDF files
                 if file_path.name.lower().endswith(".pdf"):
-                    if not PDF_SUPPORT:
+                    if pdf_cache is None and not cache_opened:
+                        pdf_cache = default_pdf_cache()
+                        cache_opened = True
+                    try:
+                        content = extract_text_from_pdf(file_path, pdf_cache)
+                    except ImportError:
                         print(f"Warning: Skipping PDF {file_path} - PyPDF2 not installed", file=sys.stderr)
                         continue
-                    content = extract_text_from_pdf(file_path)
                 # Handle text files
                 else:
-                    with open(file_path, "r", encoding="utf-8") as fh:
-                        content = fh.read().strip()
+                    content = "".join(iter_text_blocks(file_path)).strip()
                 
                 if content:  # Only add non-empty files
                     out.append(content)
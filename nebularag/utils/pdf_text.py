@@ -0,0 +1,209 @@
+"""PDF text extraction with a persistent, page-level cache."""
+
+import hashlib
+import os
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# PyPDF2, sqlite3 and the process pool are imported on first use to keep
+# package import fast. _pdf_reader is None until tried, then the PdfReader
+# class or False if unavailable
+_pdf_reader: Any = None
+
+# Pages below this count are extracted in-process; a pool costs more to start
+_MIN_PARALLEL_PAGES = 16
+
+
+def load_pdf_reader() -> Optional[type]:
+    """Import PyPDF2's PdfReader once; None when PyPDF2 is not installed."""
+    global _pdf_reader
+    if _pdf_reader is None:
+        try:
+            from PyPDF2 import PdfReader
+            _pdf_reader = PdfReader
+        except ImportError:
+            _pdf_reader = False
+    return _pdf_reader or None
+
+
+def _require_pdf_reader() -> type:
+    reader = load_pdf_reader()
+    if reader is None:
+        raise ImportError("PyPDF2 is required for PDF support. Install it with: pip install PyPDF2")
+    return reader
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """SHA-256 of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfTextCache:
+    """
+    Extracted PDF text stored in SQLite, keyed by file hash and page number.
+
+    Page text is zlib-compressed. Because the key is the content hash, a
+    renamed PDF stays cached and an edited one is re-extracted. Safe to
+    share between threads.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file; parent directories are created
+        """
+        import sqlite3
+
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS files (hash TEXT PRIMARY KEY, pages INTEGER NOT NULL)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "hash TEXT NOT NULL, page INTEGER NOT NULL, text BLOB NOT NULL, PRIMARY KEY (hash, page))"
+            )
+
+    def page_count(self, digest: str) -> Optional[int]:
+        """Number of pages recorded for a file, or None if it was never opened."""
+        with self._lock:
+            row = self._db.execute("SELECT pages FROM files WHERE hash = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, digest: str, pages: int) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (digest, pages))
+
+    def get_pages(self, digest: str, pages: Sequence[int]) -> Dict[int, str]:
+        """Cached text of the requested pages; missing pages are left out."""
+        if not pages:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT page, text FROM pages WHERE hash = ? AND page BETWEEN ? AND ?",
+                (digest, min(pages), max(pages)),
+            ).fetchall()
+        wanted = set(pages)
+        return {page: zlib.decompress(blob).decode("utf-8") for page, blob in rows if page in wanted}
+
+    def put_pages(self, digest: str, texts: Dict[int, str]) -> None:
+        rows = [(digest, page, zlib.compress(text.encode("utf-8"))) for page, text in texts.items()]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)", rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def default_pdf_cache() -> Optional[PdfTextCache]:
+    """
+    The cache named by ``RAG_PDF_CACHE`` (default
+    ``~/.cache/nebularag/pdf_text.sqlite``); None when set to "none".
+    """
+    import sqlite3
+
+    location = os.environ.get("RAG_PDF_CACHE", "~/.cache/nebularag/pdf_text.sqlite")
+    if location.lower() in ("", "none", "off"):
+        return None
+    try:
+        return PdfTextCache(location)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: PDF text cache disabled ({location}: {e})", file=sys.stderr)
+        return None
+
+
+def _extract_pages(reader_cls: type, path: str, pages: Sequence[int]) -> List[Tuple[int, Optional[str]]]:
+    """
+    Extract the given 0-based pages; runs in a worker process.
+
+    A page that fails to extract is returned as None, so it is read as empty
+    now but not cached and is retried on the next run.
+    """
+    reader = reader_cls(path)
+    out: List[Tuple[int, Optional[str]]] = []
+    for page in pages:
+        try:
+            out.append((page, reader.pages[page].extract_text() or ""))
+        except Exception as e:
+            print(f"Warning: Could not extract text from page {page + 1} of {path}: {e}", file=sys.stderr)
+            out.append((page, None))
+    return out
+
+
+def iter_pdf_pages(
+    file_path: Union[str, Path],
+    cache: Optional[PdfTextCache] = None,
+    workers: Optional[int] = None,
+    batch_pages: int = 64,
+) -> Iterator[str]:
+    """
+    Yield the text of each page, extracting only what the cache lacks.
+
+    Pages are produced in batches as the iterator is consumed. Uncached
+    pages of a batch are split across ``workers`` processes (PyPDF2 is pure
+    Python, so threads would not run in parallel). Workers are spawned, not
+    forked, so they never inherit locks held by the caller's other threads.
+    A fully cached PDF is served without PyPDF2. Pages that fail to extract
+    read as empty and are not cached.
+
+    Args:
+        file_path: PDF file
+        cache: Page cache to read from and fill (None extracts every page)
+        workers: Extraction processes (default: CPU count; 1 runs in-process)
+        batch_pages: Pages fetched per step
+
+    Raises:
+        ImportError: If pages need extracting and PyPDF2 is not installed
+    """
+    path = str(file_path)
+    digest = file_hash(path) if cache is not None else ""
+    total = cache.page_count(digest) if cache is not None else None
+    if total is None:
+        total = len(_require_pdf_reader()(path).pages)
+        if cache is not None:
+            cache.set_page_count(digest, total)
+
+    workers = workers or os.cpu_count() or 1
+    pool: Optional["ProcessPoolExecutor"] = None
+    try:
+        for start in range(0, total, batch_pages):
+            pages = list(range(start, min(start + batch_pages, total)))
+            texts = cache.get_pages(digest, pages) if cache is not None else {}
+            missing = [p for p in pages if p not in texts]
+            if missing:
+                reader_cls = _require_pdf_reader()
+                if workers > 1 and len(missing) >= _MIN_PARALLEL_PAGES:
+                    if pool is None:
+                        import multiprocessing
+                        from concurrent.futures import ProcessPoolExecutor
+                        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+                    step = -(-len(missing) // workers)
+                    parts = [missing[i:i + step] for i in range(0, len(missing), step)]
+                    results = pool.map(_extract_pages, [reader_cls] * len(parts), [path] * len(parts), parts)
+                    extracted = dict(item for part in results for item in part)
+                else:
+                    extracted = dict(_extract_pages(reader_cls, path, missing))
+                good = {page: text for page, text in extracted.items() if text is not None}
+                if cache is not None and good:
+                    cache.put_pages(digest, good)
+                texts.update({page: text or "" for page, text in extracted.items()})
+            for page in pages:
+                yield texts[page]
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,31 @@
+"""Small statistics helpers shared by the CLI reports and metrics."""
+
+from typing import Dict, Iterable, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted sequence.
+    
+    Args:
+        sorted_values: Values in ascending order
+        q: Quantile between 0 and 1
+        
+    Returns:
+        The percentile value, or 0.0 for an empty sequence
+    """
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(seconds: Iterable[float]) -> Dict[str, float]:
+    """Summarize latencies given in seconds as p50/p95/p99/max milliseconds."""
+    values: List[float] = sorted(seconds)
+    return {
+        "p50": percentile(values, 0.50) * 1000,
+        "p95": percentile(values, 0.95) * 1000,
+        "p99": percentile(values, 0.99) * 1000,
+        "max": (values[-1] if values else 0.0) * 1000,
+    }
@@ -1,57 +1,303 @@
 """Text processing utilities."""
 
-from typing import List
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, NamedTuple, Optional
 
+from .tokenization import Tokenizer
 
-def split_text(text: str, chunk_size: int = 800, chunk_overlap: int = 120) -> List[str]:
+
+class Chunk(NamedTuple):
+    """A chunk of text together with its character offsets in the source."""
+
+    start: int
+    end: int
+    text: str
+
+
+# Boundary levels, from the coarsest to the finest structure. A chunk is ended
+# at the last boundary of the coarsest level that fits inside the window and
+# fills it well enough (see _MIN_FILL).
+_HEADING, _PARAGRAPH, _SENTENCE = range(3)
+
+# Single alternation so the whole document is scanned for boundaries once.
+# Order matters: a blank line followed by a heading counts as a heading break.
+# Word boundaries are not collected here; they are only looked up near the end
+# of a window when no coarser boundary fits.
+_BOUNDARY_RE = re.compile(
+    r"(?P<heading>\n(?:[ \t]*\n)*(?=[ \t]{0,3}#{1,6}[ \t]))"
+    r"|(?P<paragraph>\n[ \t]*\n)"
+    r"|(?P<sentence>[.!?\u3002\uff01\uff1f][\"')\]]*(?=\s))"
+)
+_LEVEL_BY_GROUP = {"heading": _HEADING, "paragraph": _PARAGRAPH, "sentence": _SENTENCE}
+_WHITESPACE = (" ", "\n", "\t", "\r")
+
+# Fraction of ``chunk_size`` a chunk should reach before a coarser boundary is
+# accepted over a finer one; keeps the chunk count close to the minimum.
+_MIN_FILL = 0.5
+
+
+def _scan_boundaries(text: str) -> List[List[int]]:
     """
-    Split text into overlapping chunks of fixed size.
-    
-    This is a simple character-based splitter that maintains overlap between chunks
-    to preserve context across boundaries. It's designed to be dependency-free.
-    
+    Collect candidate cut offsets for every boundary level in one pass.
+
+    Returns:
+        One sorted list of cut offsets per level
+    """
+    cuts: List[List[int]] = [[], [], []]
+    for match in _BOUNDARY_RE.finditer(text):
+        level = _LEVEL_BY_GROUP[match.lastgroup]
+        # Sentences end after their punctuation; headings and paragraphs end
+        # before the separator so trailing whitespace stays out of the chunk.
+        cuts[level].append(match.end() if level == _SENTENCE else match.start())
+    return cuts
+
+
+def _last_space(text: str, lower: int, upper: int) -> int:
+    """Return the offset of the last whitespace in ``text[lower:upper]``, or -1."""
+    return max(text.rfind(ws, lower, upper) for ws in _WHITESPACE)
+
+
+def iter_chunks(
+    text: str,
+    chunk_size: int = 800,
+    chunk_overlap: int = 120,
+    tokenizer: Optional[Tokenizer] = None,
+) -> Iterator[Chunk]:
+    """
+    Lazily split text into chunks that respect document structure.
+
+    Boundaries are tried recursively from headings to paragraphs, sentences
+    and finally words; a hard cut at ``chunk_size`` is only used when a window
+    contains no boundary at all. Structural boundaries are found with one
+    regex scan up front and consumed with monotonic cursors, so the whole
+    split runs in linear time and each chunk is sliced from the source
+    exactly once.
+
+    When a tokenizer is given, ``chunk_size`` and ``chunk_overlap`` are
+    measured in tokens: the text is tokenized once and windows are mapped
+    back to character offsets, so chunks fill the model's token budget
+    instead of a character guess.
+
     Args:
         text: The input text to split
-        chunk_size: Maximum size of each chunk in characters (default: 800)
-        chunk_overlap: Number of characters to overlap between chunks (default: 120)
-        
-    Returns:
-        List of text chunks, each trimmed of whitespace
-        
+        chunk_size: Maximum size of each chunk in characters, or in tokens
+            when a tokenizer is given (default: 800)
+        chunk_overlap: Approximate size shared by consecutive chunks; the
+            overlap is widened so it starts on a word, or dropped when that
+            word began before the previous chunk (default: 120)
+        tokenizer: Optional tokenizer that switches sizes to token counts
+
+    Yields:
+        ``Chunk(start, end, text)`` tuples where ``text == source[start:end]``
+        and has no leading or trailing whitespace
+
     Raises:
         ValueError: If chunk_overlap >= chunk_size or if chunk_size <= 0
-        
-    Example:
-        >>> text = "This is a long document that needs to be split into chunks."
-        >>> chunks = split_text(text, chunk_size=20, chunk_overlap=5)
-        >>> len(chunks)
-        3
     """
+    _check_sizes(chunk_size, chunk_overlap)
+    yield from _split(text, chunk_size, chunk_overlap, tokenizer, [0, 0], final=True)
+
+
+def _check_sizes(chunk_size: int, chunk_overlap: int) -> None:
     if chunk_size <= 0:
         raise ValueError("chunk_size must be positive")
     if chunk_overlap < 0:
         raise ValueError("chunk_overlap must be non-negative")
     if chunk_overlap >= chunk_size:
         raise ValueError("chunk_overlap must be < chunk_size")
-    
-    text = text.strip()
-    if not text:
-        return []
-    
-    chunks: List[str] = []
-    start = 0
+
+
+# Streaming: characters kept before the resume point and required past a
+# window's end, so boundary matches and token offsets near the edges of the
+# buffer are the same as in the whole text
+_LOOKBEHIND = 256
+_LOOKAHEAD = 256
+# Minimum characters of new input per streaming split pass
+_MIN_STEP = 4096
+
+
+def _split(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    tokenizer: Optional[Tokenizer],
+    state: List[int],
+    final: bool,
+) -> Iterator[Chunk]:
+    """
+    Chunking loop behind :func:`iter_chunks` and :func:`iter_stream_chunks`.
+
+    ``state`` is ``[start, prev_end]`` and is updated in place. When
+    ``final`` is False, ``text`` is a prefix of more input: the loop stops
+    before any chunk whose window (plus lookahead) reaches the end of
+    ``text``, leaving ``state`` at that chunk so it can resume later.
+    """
     n = len(text)
-    
+    cuts = _scan_boundaries(text)
+    offsets = tokenizer.token_offsets(text) if tokenizer is not None else None
+
+    def advance(pos: int, size: int) -> int:
+        """Offset reached by moving ``size`` units forward from ``pos``."""
+        if offsets is None:
+            return pos + size
+        index = max(bisect_right(offsets, pos) - 1, 0) + size
+        return offsets[index] if index < len(offsets) else n
+
+    def retreat(pos: int, size: int) -> int:
+        """Offset reached by moving ``size`` units back from ``pos``."""
+        if offsets is None:
+            return pos - size
+        index = bisect_left(offsets, pos) - size
+        return offsets[index] if index >= 0 else 0
+
+    # cursors[level] indexes the first cut of that level beyond the current window
+    cursors = [0] * len(cuts)
+
+    start, prev_end = state
     while start < n:
-        end = min(n, start + chunk_size)
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        if end == n:
+        while start < n and text[start].isspace():
+            start += 1
+        state[0] = start
+        if start >= n:
+            break
+
+        limit = advance(start, chunk_size)
+        if not final and limit + _LOOKAHEAD >= n:
+            return
+        if limit >= n:
+            end = n
+        else:
+            # Only cut past the previous chunk so every chunk adds new text.
+            floor = max(start, prev_end)
+            fill = advance(start, int(chunk_size * _MIN_FILL))
+            end = -1
+            for level, positions in enumerate(cuts):
+                i = cursors[level]
+                while i < len(positions) and positions[i] <= limit:
+                    i += 1
+                cursors[level] = i
+                if i and positions[i - 1] > floor:
+                    # A coarse cut that leaves the chunk mostly empty yields to a
+                    # finer one; it is still preferred over breaking a sentence.
+                    end = max(end, positions[i - 1])
+                    if end >= fill:
+                        break
+            if end < 0:
+                space = _last_space(text, floor + 1, limit + 1)
+                if space > floor:
+                    end = space
+                elif start < prev_end:
+                    # The overlap leaves no room for another whole word: drop it.
+                    start = prev_end
+                    continue
+                else:
+                    end = limit
+
+        stop = end
+        while stop > start and text[stop - 1].isspace():
+            stop -= 1
+        if stop > start:
+            yield Chunk(start, stop, text[start:stop])
+        if end >= n:
+            state[0] = n
             break
-        start = end - chunk_overlap
+
+        # Back the overlap up to a word start; drop it rather than split a word.
+        prev_end = end
+        next_start = end
+        if chunk_overlap:
+            # Clamped: a negative bound would make rfind count from the end
+            space = _last_space(text, start, max(retreat(end, chunk_overlap), start))
+            if space >= start:
+                next_start = space + 1
+        start = next_start
+        state[0], state[1] = start, prev_end
+
+
+def iter_stream_chunks(
+    blocks: Iterable[str],
+    chunk_size: int = 800,
+    chunk_overlap: int = 120,
+    tokenizer: Optional[Tokenizer] = None,
+) -> Iterator[Chunk]:
+    """
+    Chunk a text that arrives in blocks, e.g. from :func:`iter_text_blocks`.
+
+    Gives the same chunks as :func:`iter_chunks` on the concatenated text
+    (offsets are relative to it), while only holding the unread part of the
+    current window plus the incoming block, so memory stays bounded however
+    large the input is. Chunks may span block boundaries.
+
+    Args:
+        blocks: Consecutive pieces of the source text
+        chunk_size: Maximum chunk size in characters, or tokens with a tokenizer
+        chunk_overlap: Approximate size shared by consecutive chunks
+        tokenizer: Optional tokenizer that switches sizes to token counts
+
+    Yields:
+        ``Chunk(start, end, text)`` tuples with offsets into the whole text
+
+    Raises:
+        ValueError: If chunk_overlap >= chunk_size or if chunk_size <= 0
+    """
+    _check_sizes(chunk_size, chunk_overlap)
+    buffer = ""
+    base = 0  # offset of buffer[0] in the whole text
+    state = [0, 0]
+    unsplit = 0  # characters appended since the last split pass
+    for block in blocks:
+        buffer += block
+        unsplit += len(block)
+        if unsplit < _MIN_STEP or len(buffer) - state[0] < chunk_size + _LOOKAHEAD:
+            continue  # coalesce small blocks; each pass rescans the buffer
+        unsplit = 0
+        for chunk in _split(buffer, chunk_size, chunk_overlap, tokenizer, state, final=False):
+            yield Chunk(base + chunk.start, base + chunk.end, chunk.text)
+        # Keep only what the next window can still need; a prev_end before
+        # start no longer affects any cut, so it may be dropped with the text
+        keep = max(state[0] - _LOOKBEHIND, 0)
+        if keep:
+            buffer = buffer[keep:]
+            base += keep
+            state[0] -= keep
+            state[1] = max(state[1] - keep, 0)
+    for chunk in _split(buffer, chunk_size, chunk_overlap, tokenizer, state, final=True):
+        yield Chunk(base + chunk.start, base + chunk.end, chunk.text)
+
+
+def split_text(
+    text: str,
+    chunk_size: int = 800,
+    chunk_overlap: int = 120,
+    tokenizer: Optional[Tokenizer] = None,
+) -> List[str]:
+    """
+    Split text into overlapping chunks that respect document structure.
     
-    return chunks
+    Chunks end on the coarsest boundary that fits (heading, paragraph,
+    sentence, then word) instead of at fixed character offsets, so sentences
+    and words are only broken when a window has no boundary at all. See
+    :func:`iter_chunks` for a lazy variant that also reports offsets.
+    
+    Args:
+        text: The input text to split
+        chunk_size: Maximum size of each chunk in characters (default: 800)
+        chunk_overlap: Number of characters to overlap between chunks (default: 120)
+        tokenizer: Optional tokenizer; when given, sizes are counted in tokens
+        
+    Returns:
+        List of text chunks, each trimmed of whitespace
+        
+    Raises:
+        ValueError: If chunk_overlap >= chunk_size or if chunk_size <= 0
+        
+    Example:
+        >>> text = "This is a long document. It needs to be split into chunks."
+        >>> split_text(text, chunk_size=40, chunk_overlap=5)
+        ['This is a long document.', 'document. It needs to be split into', 'split into chunks.']
+    """
+    return [chunk.text for chunk in iter_chunks(text, chunk_size, chunk_overlap, tokenizer)]
 
 
 def clean_text(text: str) -> str:
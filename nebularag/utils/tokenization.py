@@ -0,0 +1,140 @@
+"""Lightweight tokenizers used to measure chunks in tokens instead of characters."""
+
+import abc
+import functools
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# GPT-2 style pre-tokenization: contractions, words with their leading space,
+# short digit groups, punctuation runs and whitespace. BPE tokenizers never
+# merge across these pieces, so counting per piece is a close approximation.
+_PRETOKENIZE_RE = re.compile(
+    r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+"
+)
+
+# Average characters per BPE token for English prose when no vocab is loaded.
+_CHARS_PER_TOKEN = 4
+
+# Markers used by byte-level BPE and SentencePiece vocabs for a leading space.
+_SPACE_MARKERS = ("Ġ", "▁")
+
+_MAX_CACHED_PIECES = 200_000
+
+
+class Tokenizer(abc.ABC):
+    """
+    Interface for tokenizers used by the chunker.
+
+    Implementations only need :meth:`token_offsets`; anything that can report
+    where each token starts (tiktoken, HuggingFace tokenizers, ...) can be
+    plugged into :func:`nebularag.utils.text_processing.iter_chunks`.
+    """
+
+    @abc.abstractmethod
+    def token_offsets(self, text: str) -> List[int]:
+        """
+        Return the character offset at which each token of ``text`` starts.
+
+        Args:
+            text: Text to tokenize
+
+        Returns:
+            Ascending list of offsets, one per token
+        """
+
+    def count_tokens(self, text: str) -> int:
+        """Return the number of tokens in ``text``."""
+        return len(self.token_offsets(text))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_vocab(path: str) -> Tuple[FrozenSet[str], int]:
+    """
+    Load a tokenizer vocabulary once per path.
+
+    Accepts a HuggingFace ``tokenizer.json``, a ``vocab.json`` mapping, or a
+    plain text file with one token per line. Leading-space markers are turned
+    back into spaces so tokens can be matched against raw text.
+
+    Returns:
+        Tuple of (token set, length of the longest token)
+    """
+    file_path = Path(path)
+    raw = file_path.read_text(encoding="utf-8")
+    if file_path.suffix == ".json":
+        data = json.loads(raw)
+        if isinstance(data.get("model"), dict):
+            data = data["model"].get("vocab", {})
+        tokens = list(data)
+    else:
+        tokens = [line.rstrip("\n") for line in raw.splitlines() if line.strip()]
+
+    vocab = set()
+    for token in tokens:
+        for marker in _SPACE_MARKERS:
+            token = token.replace(marker, " ")
+        vocab.add(token)
+    if not vocab:
+        raise ValueError(f"Empty tokenizer vocab: {path}")
+    return frozenset(vocab), max(len(t) for t in vocab)
+
+
+class RegexTokenizer(Tokenizer):
+    """
+    Offline, dependency-free BPE approximation.
+
+    Text is pre-tokenized with a GPT-2 style regex. Without a vocab each piece
+    counts as ``ceil(len / 4)`` tokens; with a vocab file the piece is
+    segmented by greedy longest match, which tracks real BPE counts closely.
+    The vocab is loaded lazily on first use and shared between instances, and
+    per-piece results are memoized since natural text repeats words heavily.
+    """
+
+    def __init__(self, vocab_path: Optional[str] = None) -> None:
+        """
+        Args:
+            vocab_path: Optional path to a tokenizer vocab (see ``_load_vocab``)
+        """
+        self.vocab_path = vocab_path
+        self._piece_cache: Dict[str, Tuple[int, ...]] = {}
+
+    def _segment(self, piece: str) -> Tuple[int, ...]:
+        """Return token start offsets relative to the start of ``piece``."""
+        cached = self._piece_cache.get(piece)
+        if cached is not None:
+            return cached
+
+        if self.vocab_path is None:
+            step = _CHARS_PER_TOKEN
+            # The leading space is folded into the first token.
+            n_tokens = max(1, math.ceil(len(piece.lstrip(" ")) / step))
+            offsets = tuple(i * step for i in range(n_tokens))
+        else:
+            vocab, longest = _load_vocab(self.vocab_path)
+            starts: List[int] = []
+            i = 0
+            while i < len(piece):
+                starts.append(i)
+                for j in range(min(len(piece), i + longest), i, -1):
+                    if piece[i:j] in vocab:
+                        i = j
+                        break
+                else:
+                    i += 1
+            offsets = tuple(starts)
+
+        if len(self._piece_cache) >= _MAX_CACHED_PIECES:
+            self._piece_cache.clear()
+        self._piece_cache[piece] = offsets
+        return offsets
+
+    def token_offsets(self, text: str) -> List[int]:
+        out: List[int] = []
+        for match in _PRETOKENIZE_RE.finditer(text):
+            base = match.start()
+            out.extend(base + rel for rel in self._segment(match.group()))
+        return out
+
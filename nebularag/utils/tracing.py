@@ -0,0 +1,223 @@
+"""Lightweight latency tracing with histogram aggregation and pluggable sinks."""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets: 0.5 ms to ~3 min,
+# growing by 1.5x so percentile estimates stay within a few percent.
+_BUCKETS: List[float] = [0.0005 * 1.5 ** i for i in range(32)]
+
+
+class Span:
+    """A single timed operation with free-form numeric or string attributes."""
+
+    __slots__ = ("name", "attrs", "start", "duration", "error")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Attach an attribute, e.g. bytes sent or number of attempts."""
+        self.attrs[key] = value
+
+
+class _SpanContext:
+    """Context manager that times a span and hands it to its tracer."""
+
+    __slots__ = ("_tracer", "_span")
+
+    def __init__(self, tracer: "Tracer", span: Span) -> None:
+        self._tracer = tracer
+        self._span = span
+
+    def __enter__(self) -> Span:
+        self._span.start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        span = self._span
+        span.duration = time.perf_counter() - span.start
+        if exc_type is not None:
+            span.error = exc_type.__name__
+        self._tracer.record(span)
+
+
+class _NullSpanContext:
+    """Shared no-op span used when tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpanContext":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpanContext()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with interpolated percentiles."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add one observation in seconds."""
+        self.counts[bisect.bisect_left(_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Estimate the ``q`` quantile (0..1) in seconds."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= target:
+                lower = _BUCKETS[i - 1] if i > 0 else 0.0
+                upper = _BUCKETS[i] if i < len(_BUCKETS) else self.max
+                fraction = (target - seen) / bucket_count
+                return min(lower + (upper - lower) * fraction, self.max)
+            seen += bucket_count
+        return self.max
+
+
+class Tracer:
+    """
+    Collects spans into per-name histograms and forwards them to sinks.
+
+    A sink is any callable taking a :class:`Span` (see :class:`LoggingSink`);
+    aggregated numbers are available from :meth:`summary` and, in Prometheus
+    text exposition format, from :meth:`render_prometheus`. Use
+    :data:`NULL_TRACER` to disable tracing at near-zero cost.
+    """
+
+    enabled = True
+
+    def __init__(self, sinks: Optional[List[Callable[[Span], None]]] = None) -> None:
+        self.sinks: List[Callable[[Span], None]] = list(sinks or [])
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._errors: Dict[str, int] = {}
+        self._totals: Dict[Tuple[str, str], float] = {}
+
+    def span(self, name: str, **attrs: Any) -> Any:
+        """Time a block: ``with tracer.span("embed", items=3) as span: ...``."""
+        return _SpanContext(self, Span(name, attrs))
+
+    def add_sink(self, sink: Callable[[Span], None]) -> None:
+        """Register another sink for finished spans."""
+        self.sinks.append(sink)
+
+    def record(self, span: Span) -> None:
+        """Aggregate a finished span and forward it to every sink."""
+        with self._lock:
+            hist = self._histograms.get(span.name)
+            if hist is None:
+                hist = self._histograms[span.name] = Histogram()
+            hist.observe(span.duration)
+            if span.error is not None:
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+            # Numeric attributes (bytes, attempts, ...) are summed per span name.
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    total_key = (span.name, key)
+                    self._totals[total_key] = self._totals.get(total_key, 0.0) + value
+        for sink in self.sinks:
+            sink(span)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count, errors, mean and p50/p95/p99 in milliseconds per span name."""
+        with self._lock:
+            out: Dict[str, Dict[str, float]] = {}
+            for name, hist in self._histograms.items():
+                out[name] = {
+                    "count": hist.count,
+                    "errors": self._errors.get(name, 0),
+                    "mean_ms": hist.total / hist.count * 1000 if hist.count else 0.0,
+                    "p50_ms": hist.percentile(0.50) * 1000,
+                    "p95_ms": hist.percentile(0.95) * 1000,
+                    "p99_ms": hist.percentile(0.99) * 1000,
+                }
+            for (name, attr), value in self._totals.items():
+                if name in out:
+                    out[name][attr] = value
+            return out
+
+    def render_prometheus(self, prefix: str = "nebularag") -> str:
+        """Render all histograms and attribute totals in Prometheus text format."""
+        lines = [
+            f"# HELP {prefix}_span_seconds Latency of traced operations.",
+            f"# TYPE {prefix}_span_seconds histogram",
+        ]
+        with self._lock:
+            for name, hist in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(_BUCKETS, hist.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{prefix}_span_seconds_bucket{{span="{name}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{prefix}_span_seconds_bucket{{span="{name}",le="+Inf"}} {hist.count}')
+                lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {hist.total:.6f}')
+                lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {hist.count}')
+            lines.append(f"# TYPE {prefix}_span_errors_total counter")
+            for name, errors in sorted(self._errors.items()):
+                lines.append(f'{prefix}_span_errors_total{{span="{name}"}} {errors}')
+            lines.append(f"# TYPE {prefix}_span_attribute_total counter")
+            for (name, attr), value in sorted(self._totals.items()):
+                lines.append(f'{prefix}_span_attribute_total{{span="{name}",attr="{attr}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all aggregated data."""
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+            self._totals.clear()
+
+
+class NullTracer(Tracer):
+    """Tracer that records nothing; spans are a shared no-op object."""
+
+    enabled = False
+
+    def span(self, name: str, **attrs: Any) -> Any:
+        return _NULL_SPAN
+
+    def record(self, span: Span) -> None:
+        return None
+
+
+NULL_TRACER = NullTracer()
+
+
+class LoggingSink:
+    """Sink that logs one line per finished span."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG) -> None:
+        self.logger = logger or logging.getLogger("nebularag.trace")
+        self.level = level
+
+    def __call__(self, span: Span) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        attrs = " ".join(f"{k}={v}" for k, v in span.attrs.items())
+        status = f" error={span.error}" if span.error else ""
+        self.logger.log(self.level, "%s %.1fms %s%s", span.name, span.duration * 1000, attrs, status)
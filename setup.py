@@ -16,6 +16,12 @@ setup(
     packages=find_packages(),
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        # Faster JSON encoding/decoding for API calls
+        "fast": ["orjson>=3.8.0"],
+        # Parquet/Arrow bulk embedding import/export
+        "arrow": ["pyarrow>=12.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "nebularag=nebularag.cli.main:main",
@@ -0,0 +1,49 @@
+"""Offline stand-ins for NebulaBlockClient used by the unit tests."""
+
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class FakeNebulaClient:
+    """
+    Deterministic client with the same methods as NebulaBlockClient.
+
+    Embeddings are hashed bag-of-words vectors, so texts sharing words are
+    similar; rerank keeps the given order and chat echoes the question.
+    Every call is recorded for assertions.
+    """
+
+    def __init__(self, dim: int = 32) -> None:
+        self.dim = dim
+        self.embedded: List[str] = []
+        self.calls: Dict[str, int] = {"embed": 0, "rerank": 0, "chat": 0}
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        self.calls["embed"] += 1
+        self.embedded.extend(texts)
+        out = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            for word in _WORD_RE.findall(text.lower()):
+                vec[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+            out.append(vec)
+        return out
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: Optional[int] = None,
+        return_documents: bool = False,
+    ) -> List[Dict[str, Any]]:
+        self.calls["rerank"] += 1
+        n = len(documents) if top_n is None else min(top_n, len(documents))
+        return [{"index": i, "relevance_score": 1.0 - i / len(documents)} for i in range(n)]
+
+    def chat(self, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: Optional[int] = None) -> str:
+        self.calls["chat"] += 1
+        question = messages[-1]["content"].rsplit("Question:", 1)[-1].strip()
+        return f"Answer to: {question}"
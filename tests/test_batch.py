@@ -0,0 +1,41 @@
+"""Tests for batch question answering."""
+
+import json
+
+from nebularag.cli.batch import load_checkpoint, read_questions, run_batch
+from nebularag.core.rag_pipeline import RAGPipeline
+
+from .fakes import FakeNebulaClient
+
+
+def _pipeline():
+    rag = RAGPipeline(FakeNebulaClient(), chunk_size=200, chunk_overlap=0)
+    rag.index_texts(["Testing shows the presence of defects.", "Early testing saves time."])
+    return rag
+
+
+def test_read_questions_jsonl_and_text(tmp_path):
+    jsonl = tmp_path / "q.jsonl"
+    jsonl.write_text('{"id": "a", "question": "One?"}\n\n{"question": "Two?"}\n', encoding="utf-8")
+    assert list(read_questions(str(jsonl))) == [("a", "One?"), ("3", "Two?")]
+
+    text = tmp_path / "q.txt"
+    text.write_text("First?\nSecond?\n", encoding="utf-8")
+    assert list(read_questions(str(text))) == [("1", "First?"), ("2", "Second?")]
+
+
+def test_batch_writes_results_and_resumes(tmp_path):
+    questions = tmp_path / "q.txt"
+    questions.write_text("\n".join(f"Question {i}?" for i in range(20)), encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+    # Simulate a crash: one finished line followed by a torn line.
+    output.write_text('{"id": "1", "question": "Question 0?", "answer": "x"}\n{"id": "2", "que', encoding="utf-8")
+
+    summary = run_batch(_pipeline(), str(questions), str(output), concurrency=4)
+    assert summary["skipped"] == 1
+    assert summary["answered"] == 19
+    assert summary["latency_ms"]["p95"] >= 0
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(int(r["id"]) for r in records) == list(range(1, 21))
+    assert load_checkpoint(str(output)) == {str(i) for i in range(1, 21)}
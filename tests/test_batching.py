@@ -0,0 +1,67 @@
+"""Tests for micro-batching of concurrent query embeddings and reranks."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from nebularag.clients.batching import BatchingClient, MicroBatcher
+from nebularag.core.rag_pipeline import RAGPipeline
+
+from .fakes import FakeNebulaClient
+
+
+class SlowClient(FakeNebulaClient):
+    """Fake whose calls take a while, like a network round trip."""
+
+    def embed(self, texts):
+        time.sleep(0.02)
+        return super().embed(texts)
+
+    def rerank_batch(self, requests):
+        self.calls["rerank"] += 1
+        return [[{"index": 0, "relevance_score": 1.0, "query": q}] for q, _, _ in requests]
+
+
+def test_concurrent_queries_share_embed_requests():
+    client = SlowClient()
+    batching = BatchingClient(client, max_batch=16, max_wait_ms=20)
+    questions = [f"question number {i}" for i in range(32)]
+    with ThreadPoolExecutor(32) as pool:
+        rows = list(pool.map(lambda q: batching.embed([q]), questions))
+
+    expected = np.asarray(FakeNebulaClient().embed(questions), dtype=np.float32)
+    assert np.array_equal(np.vstack(rows), expected)
+    assert client.calls["embed"] <= 6
+    assert batching.batch_stats()["embed"]["items"] == 32
+    # Bulk calls bypass the batcher; other attributes are delegated
+    assert len(batching.embed(["a", "b"])) == 2 and batching.dim == client.dim
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda q: batching.rerank(q, ["doc"], top_n=1), ["x", "y"] * 4))
+    assert [r[0]["query"] for r in results] == ["x", "y"] * 4
+    assert client.calls["rerank"] < 8
+    batching.close()
+
+
+def test_batch_errors_reach_every_caller_and_pipeline_uses_wrapper():
+    calls = []
+
+    def fail(items):
+        calls.append(items)
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fail, max_batch=4, max_wait_s=0.05)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="boom"):
+            future.result(timeout=5)
+    assert calls == [[0, 1, 2]]
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
+
+    rag = RAGPipeline(BatchingClient(FakeNebulaClient(), max_wait_ms=1), chunk_size=100, chunk_overlap=0)
+    rag.index_texts(["Reviews find defects early.", "Testing shows presence of defects."])
+    assert rag.retrieve("defects early")[0][0] == 0
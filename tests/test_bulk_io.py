@@ -0,0 +1,101 @@
+"""Tests for bulk embedding import/export."""
+
+import numpy as np
+import pytest
+
+from nebularag.core.persistence import export_embeddings, import_embeddings
+from nebularag.core.rag_pipeline import RAGPipeline
+
+from .fakes import FakeNebulaClient
+
+DOCS = [
+    "Black box testing derives tests from specifications.",
+    "White box testing derives tests from the code structure.",
+    "Static analysis finds defects without executing code.",
+]
+
+LAYOUTS = ["bulk_dir", "bulk.npz", "bulk.parquet", "bulk.arrow"]
+
+
+def _source():
+    client = FakeNebulaClient()
+    client.embedding_model = "fake-embed"
+    client.embedding_dimensions = None
+    rag = RAGPipeline(client, chunk_size=200, chunk_overlap=0)
+    rag.index_texts(DOCS)
+    return rag
+
+
+@pytest.mark.parametrize("name", LAYOUTS)
+def test_round_trip_skips_the_embeddings_api(tmp_path, name):
+    if name.endswith((".parquet", ".arrow")):
+        pytest.importorskip("pyarrow")
+    source = _source()
+    path = str(tmp_path / name)
+    assert source.export_embeddings(path) == len(DOCS)
+
+    client = FakeNebulaClient()
+    client.embedding_model = "fake-embed"
+    client.embedding_dimensions = None
+    target = RAGPipeline(client)
+    assert target.import_embeddings(path) == len(DOCS)
+    assert client.calls["embed"] == 0
+    assert target.store.texts == source.store.texts
+    np.testing.assert_allclose(target.store.embeddings, source.store.embeddings, rtol=1e-6)
+
+    question = client.embed(["static analysis"])[0]
+    assert target.store.search(question, k=1) == source.store.search(question, k=1)
+
+
+def test_import_rejects_other_model_or_dimension(tmp_path):
+    source = _source()
+    path = str(tmp_path / "bulk.npz")
+    source.export_embeddings(path)
+
+    other = FakeNebulaClient()
+    other.embedding_model = "other-embed"
+    other.embedding_dimensions = None
+    with pytest.raises(ValueError, match="embedding_model"):
+        RAGPipeline(other).import_embeddings(path)
+
+    export_embeddings(path, ["a"], np.ones((1, 8)), {"embedding_model": "fake-embed", "embedding_dimensions": 16})
+    same = FakeNebulaClient()
+    same.embedding_model = "fake-embed"
+    same.embedding_dimensions = 16
+    with pytest.raises(ValueError, match="8-dimensional"):
+        RAGPipeline(same).import_embeddings(path)
+
+
+def test_plain_npz_without_metadata_is_checked_against_the_store(tmp_path, capsys):
+    path = str(tmp_path / "offline.npz")
+    np.savez(path, texts=np.array(["first", "second"]), embeddings=np.eye(2, 8, dtype=np.float32))
+    rag = _source()  # FakeNebulaClient embeds at 32 dimensions
+    with pytest.raises(ValueError, match="the store expects 32"):
+        rag.import_embeddings(path, model="fake-embed")
+
+    target = RAGPipeline(rag.client)
+    assert target.import_embeddings(path) == 2
+    assert "does not name its embedding model" in capsys.readouterr().err
+    with pytest.raises(ValueError, match="embedding_model='other'"):
+        RAGPipeline(rag.client).import_embeddings(path, model="other")
+
+
+def test_npz_with_plain_text_array(tmp_path):
+    path = str(tmp_path / "offline.npz")
+    np.savez(path, texts=np.array(["first", "zweite"]), embeddings=np.eye(2, dtype=np.float32))
+    texts, embeddings, metadata = import_embeddings(path)
+    assert texts == ["first", "zweite"] and embeddings.shape == (2, 2) and metadata == {}
+
+
+def test_import_goes_through_the_dedup_filter(tmp_path):
+    path = str(tmp_path / "bulk.npz")
+    _source().export_embeddings(path)
+    client = FakeNebulaClient()
+    client.embedding_model = "fake-embed"
+    client.embedding_dimensions = None
+    target = RAGPipeline(client, chunk_size=200, chunk_overlap=0, dedup_threshold=0.9)
+    target.index_texts(DOCS[:1])
+    assert target.import_embeddings(path) == 2
+    assert target.store.texts == [DOCS[0], *DOCS[1:]]
+    # Imported chunks are registered, so indexing them again embeds nothing
+    assert target.index_texts(DOCS[1:]) == 0 and client.embedded == DOCS[:1]
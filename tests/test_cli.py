@@ -0,0 +1,55 @@
+"""Tests for building a pipeline from command line options."""
+
+import argparse
+import importlib
+
+import pytest
+
+from .fakes import FakeNebulaClient
+
+# nebularag.cli re-exports the main() function under the module's name
+main = importlib.import_module("nebularag.cli.main")
+
+
+def _args(tmp_path, *extra):
+    parser = argparse.ArgumentParser()
+    main.add_pipeline_args(parser)
+    return parser.parse_args(["--docs", str(tmp_path / "docs"), "--index-path", str(tmp_path / "index.npz"), *extra])
+
+
+@pytest.fixture
+def docs(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "build_client_from_env", lambda *a, **kw: FakeNebulaClient())
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "guide.txt").write_text("Boundary value analysis tests edges. " * 20, encoding="utf-8")
+    return tmp_path
+
+
+def test_saved_index_must_match_the_requested_options(docs, capsys):
+    built = main.build_pipeline(_args(docs, "--chunk-size", "200", "--chunk-overlap", "20"))
+    loaded = main.build_pipeline(_args(docs, "--chunk-size", "200", "--chunk-overlap", "20",
+                                       "--import-embeddings", "elsewhere.npz"))
+    assert loaded.store.texts == built.store.texts
+    assert "--import-embeddings is ignored" in capsys.readouterr().err
+
+    with pytest.raises(ValueError, match=r"--chunk-size 300 \(index: 200\)"):
+        main.build_pipeline(_args(docs, "--chunk-size", "300", "--chunk-overlap", "20"))
+    with pytest.raises(ValueError, match="--dim-reduction truncate"):
+        main.build_pipeline(_args(docs, "--chunk-size", "200", "--chunk-overlap", "20",
+                                  "--dim-reduction", "truncate", "--embedding-dim", "8"))
+
+
+def test_defaults_and_validation_come_from_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("RAG_CHUNK_SIZE", "300")
+    monkeypatch.setenv("RAG_SHARDS", "2")
+    monkeypatch.setenv("NEBULABLOCK_API_KEY", "test-key")
+    args = _args(tmp_path, "--chunk-overlap", "50")
+    assert (args.chunk_size, args.chunk_overlap, args.shards) == (300, 50, 2)
+    main.validate_args(args)
+
+    args.chunk_overlap = 300
+    with pytest.raises(ValueError, match="chunk_overlap must be less than chunk_size"):
+        main.validate_args(args)
+    monkeypatch.delenv("NEBULABLOCK_API_KEY")
+    with pytest.raises(ValueError, match="NEBULABLOCK_API_KEY"):
+        main.validate_args(_args(tmp_path))
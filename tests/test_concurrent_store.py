@@ -0,0 +1,113 @@
+"""Tests for searching a vector store while another thread adds to it."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.core.reduction import ReducedVectorStore, TruncateReducer
+from nebularag.core.vector_store import InMemoryVectorStore
+
+from .fakes import FakeNebulaClient
+
+DIM = 16
+
+
+def _rows(start, count):
+    rng = np.random.default_rng(start)
+    return [f"chunk {i}" for i in range(start, start + count)], rng.standard_normal((count, DIM))
+
+
+def test_snapshot_is_unaffected_by_later_writes():
+    store = InMemoryVectorStore()
+    store.add(*_rows(0, 10))
+    snap = store.snapshot()
+    store.add(*_rows(10, 100))
+    store.clear()
+
+    assert snap.size == 10 and snap.matrix.shape == (10, DIM)
+    results = store.search_snapshot(snap, np.ones(DIM), k=20)
+    assert len(results) == 10 and all(snap.texts[i] == f"chunk {i}" for i, _ in results)
+    assert store.size() == 0 and store.version == snap.version + 2
+
+
+def test_readers_never_see_partial_batches():
+    store = InMemoryVectorStore(binary_prefilter=True, min_shortlist=8)
+    store.add(*_rows(0, 5))
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        for start in range(5, 3000, 37):
+            store.add(*_rows(start, 37))
+        done.set()
+
+    def reader(seed):
+        rng = np.random.default_rng(seed)
+        seen = 0
+        try:
+            while not done.is_set():
+                size = store.size()
+                assert size >= seen
+                seen = size
+                for i, _ in store.search(rng.standard_normal(DIM), k=5):
+                    assert store.texts[i] == f"chunk {i}"
+        except Exception as e:  # surfaced in the main thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(4)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert store.size() == len(store.texts) == 5 + 81 * 37
+
+
+def test_search_during_clear_uses_one_snapshot():
+    store = InMemoryVectorStore()
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        for _ in range(200):
+            store.add(*_rows(0, 20))
+            store.clear()
+        done.set()
+
+    def reader():
+        try:
+            while not done.is_set():
+                snap = store.snapshot()
+                for i, _ in store.search_snapshot(snap, np.ones(DIM), k=3):
+                    assert snap.texts[i] == f"chunk {i}"
+                store.search(np.ones(DIM), k=3)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(3)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+@pytest.mark.parametrize("reduced", [False, True])
+def test_answer_reads_texts_from_one_snapshot(reduced):
+    class ClearingClient(FakeNebulaClient):
+        """Re-indexes the store while a question is being reranked."""
+
+        def rerank(self, query, documents, top_n=None, return_documents=False):
+            rag.store.clear()
+            rag.index_texts(["Something else entirely."])
+            return super().rerank(query, documents, top_n)
+
+    store = ReducedVectorStore(TruncateReducer(16), rescore_k=4) if reduced else None
+    rag = RAGPipeline(ClearingClient(), store=store, chunk_size=200, chunk_overlap=0, top_k=2, rerank_k=2)
+    rag.index_texts(["Black box testing uses specifications.", "White box testing uses code."])
+    result = rag.answer("black box testing")
+    assert sorted(result["sources"]) == ["Black box testing uses specifications.", "White box testing uses code."]
@@ -0,0 +1,45 @@
+"""Unit tests for near-duplicate chunk filtering."""
+
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.utils.dedup import NearDuplicateFilter
+
+from .fakes import FakeNebulaClient
+
+
+BOILERPLATE = (
+    "Copyright International Software Testing Qualifications Board. "
+    "This document may be copied in its entirety, or extracts made, "
+    "if the source is acknowledged. All rights reserved worldwide."
+)
+
+
+def test_exact_and_near_duplicates_are_linked():
+    dedup = NearDuplicateFilter(threshold=0.8)
+    assert dedup.check(BOILERPLATE) is None
+    assert dedup.check(BOILERPLATE.upper()) == 0
+    assert dedup.check(BOILERPLATE.replace("worldwide", "globally")) == 0
+    assert dedup.check("Static testing examines work products without running them.") is None
+    assert dedup.check("Static testing examines work products without running them!") == 1
+    assert dedup.links == [2, 1]
+    assert dedup.stats.exact_duplicates == 2
+    assert dedup.stats.near_duplicates == 1
+    assert 0 < dedup.stats.savings < 1
+
+
+def test_truncate_forgets_rolled_back_chunks():
+    dedup = NearDuplicateFilter()
+    dedup.check("first chunk of text here")
+    dedup.check(BOILERPLATE)
+    dedup.truncate(1)
+    assert dedup.size() == 1
+    assert dedup.check(BOILERPLATE) is None
+
+
+def test_duplicates_never_reach_embed():
+    client = FakeNebulaClient()
+    rag = RAGPipeline(client, chunk_size=400, chunk_overlap=0, dedup_threshold=0.9)
+    indexed = rag.index_texts([BOILERPLATE, "Unique page one.", BOILERPLATE])
+    indexed += rag.index_texts([BOILERPLATE])
+    assert indexed == 2
+    assert client.embedded == [BOILERPLATE, "Unique page one."]
+    assert rag.store.size() == 2
@@ -0,0 +1,20 @@
+"""Sanity checks for the retrieval quality evaluation harness."""
+
+from benchmarks.corpus import generate_embeddings
+from benchmarks.eval_retrieval import evaluate, recall_at_k, reciprocal_rank
+
+
+def test_metrics():
+    assert recall_at_k([1, 2, 3], [3, 9, 1], 3) == 2 / 3
+    assert reciprocal_rank(1, [3, 9, 1]) == 1 / 3
+    assert reciprocal_rank(1, [4]) == 0.0
+
+
+def test_exact_is_perfect_and_quantized_is_close():
+    embeddings = generate_embeddings(300, 32, n_clusters=8)
+    results = {r["config"]: r for r in evaluate(embeddings, embeddings[:10], ["exact", "int8", "truncate:4"], k=5)}
+    assert results["exact"]["recall@5"] == 1.0
+    assert results["exact"]["mrr@5"] == 1.0
+    assert results["int8"]["recall@5"] > 0.8
+    assert results["truncate:4"]["recall@5"] < results["int8"]["recall@5"]
+    assert results["exact"]["latency_ms"]["p50"] >= 0
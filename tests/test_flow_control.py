@@ -0,0 +1,132 @@
+"""Unit tests for client-side rate limiting and adaptive concurrency."""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockNebulaServer
+from nebularag.clients.flow_control import (
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    TokenBucket,
+    parse_rate_limits,
+    parse_retry_after,
+)
+from nebularag.clients.nebula_client import NebulaBlockClient
+from nebularag.utils.tracing import Tracer
+
+
+def test_parsers():
+    assert parse_rate_limits("embed=20, chat=2.5") == {"embed": 20.0, "chat": 2.5}
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_token_bucket_and_pause():
+    bucket = TokenBucket(rate=100, burst=2)
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    assert bucket.acquire() > 0
+    unlimited = TokenBucket()
+    unlimited.pause(0.05)
+    start = time.monotonic()
+    unlimited.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_aimd_grows_on_success_and_halves_on_overload():
+    limiter = AIMDLimiter(initial=4, maximum=8, latency_tolerance=None)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(0.01)
+    assert limiter.limit > 6
+    grown = limiter.limit
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(0.01, overloaded=True)
+    # One cut per round: the rest of the failing wave does not cut again
+    assert limiter.limit == grown / 2 and limiter.decreases == 1
+
+
+def test_client_honours_retry_after():
+    with MockNebulaServer(dim=8, max_rps=2, retry_after_s=0.6) as server:
+        tracer = Tracer()
+        client = NebulaBlockClient(base_url=server.base_url, api_key="mock", tracer=tracer, max_concurrency=4)
+        for _ in range(4):
+            assert len(client.embed(["alpha"])[0]) == 8
+        assert server.requests["throttled"] >= 1
+        assert tracer.summary()["http"]["rate_limited"] >= 1
+
+
+def test_slow_embed_is_hedged_and_duplicate_wins():
+    client = NebulaBlockClient(base_url="http://unused", api_key="mock", hedge_quantile=0.9)
+    client.hedges["embed"].initial_delay = 0.05
+    calls = []
+
+    def fake_send(path, payload, max_retries, span):
+        calls.append(path)
+        time.sleep(1.0 if len(calls) == 1 else 0.0)
+        return {"data": [{"embedding": [float(len(calls))]}]}
+
+    client._send = fake_send
+    start = time.monotonic()
+    assert client.embed(["x"]).tolist() == [[2.0]]
+    assert time.monotonic() - start < 0.5
+    assert client.resilience_stats()["embed"]["hedge"]["hedge_wins"] == 1
+
+
+def test_hedges_are_capped_until_losers_finish():
+    client = NebulaBlockClient(base_url="http://unused", api_key="mock", hedge_quantile=0.9, max_hedges=1)
+    client.hedges["embed"].initial_delay = 0.05
+    threads = []
+
+    def fake_send(path, payload, max_retries, span):
+        threads.append(threading.current_thread())
+        time.sleep(0.5 if len(threads) == 1 else 0.0)
+        return {"data": [{"embedding": [1.0]}]}
+
+    client._send = fake_send
+    client.embed(["x"])  # primary is slow, the duplicate wins
+    # The losing primary still holds the only slot: send directly, unhedged
+    client.embed(["y"])
+    assert threads[2] is threading.current_thread()
+    time.sleep(0.6)
+    client.embed(["z"])
+    assert threads[3] is not threading.current_thread()
+
+
+def test_breaker_fails_fast_on_unreachable_endpoint():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = NebulaBlockClient(base_url=f"http://127.0.0.1:{port}", api_key="mock", breaker_threshold=2)
+    client.breakers["chat"].reset_timeout = 60
+    with pytest.raises(CircuitOpenError):
+        client.chat([{"role": "user", "content": "hi"}])
+    start = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        client.chat([{"role": "user", "content": "hi"}])
+    assert time.monotonic() - start < 0.1
+    stats = client.resilience_stats()["chat"]["breaker"]
+    assert stats["state"] == "open" and stats["opened"] == 1 and stats["rejected"] == 2
+
+
+def test_breaker_only_closes_on_the_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    late = breaker.admit()
+    assert late is False
+    breaker.record(False)
+    breaker.record(None)  # a client error neither counts nor resets
+    breaker.record(False)
+    assert breaker.stats()["state"] == "open"
+    breaker.record(True, trial=late)  # a straggler from before the circuit opened
+    assert breaker.stats()["state"] == "open" and breaker.admit() is None
+
+    time.sleep(0.06)
+    trial = breaker.admit()
+    assert trial is True and breaker.admit() is None
+    breaker.record(True, trial=trial)
+    assert breaker.stats()["state"] == "closed"
@@ -0,0 +1,50 @@
+"""Guard the package's cold-import cost and its lazy optional dependencies."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# What an eager import would pull in
+HEAVY_MODULES = ("numpy", "PyPDF2", "brotli", "dotenv")
+# Over ten times the ~20 ms a cold import takes, so a loaded CI machine stays
+# under it; catches slow import-time work that HEAVY_MODULES does not name
+IMPORT_BUDGET_US = int(os.environ.get("NEBULARAG_IMPORT_BUDGET_US", 250_000))
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+
+def _cumulative_us(stderr: str, module: str) -> int:
+    for line in stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_package_import_is_lazy_and_within_budget():
+    code = (
+        "import sys, nebularag\n"
+        "import nebularag.clients.nebula_client\n"
+        "import nebularag.cli.main\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = _run(code)
+    assert result.stdout.strip() == ""
+    assert "Warning" not in result.stderr
+    assert _cumulative_us(result.stderr, "nebularag") < IMPORT_BUDGET_US
+
+
+def test_lazy_names_resolve_on_access():
+    result = _run(
+        "import nebularag, nebularag.core as core\n"
+        "print(nebularag.RAGPipeline.__name__, nebularag.NebulaBlockClient.__name__, 'ShardedVectorStore' in dir(core))"
+    )
+    assert result.stdout.split() == ["RAGPipeline", "NebulaBlockClient", "True"]
@@ -0,0 +1,34 @@
+"""The benchmark mock server must speak the same JSON shapes as NebulaBlock."""
+
+import numpy as np
+
+from benchmarks.mock_server import MockNebulaServer, hashed_embedding
+from nebularag.clients.nebula_client import NebulaBlockClient
+from nebularag.core.rag_pipeline import RAGPipeline
+
+
+def test_client_round_trip_against_mock_server():
+    with MockNebulaServer(dim=16) as server:
+        client = NebulaBlockClient(base_url=server.base_url, api_key="mock")
+        embeddings = client.embed(["alpha beta", "gamma"])
+        assert len(embeddings) == 2 and len(embeddings[0]) == 16
+
+        results = client.rerank("beta", ["gamma", "alpha beta"], top_n=1)
+        assert results[0]["index"] == 1
+
+        rag = RAGPipeline(client, chunk_size=100, chunk_overlap=0)
+        rag.index_texts(["Equivalence partitioning divides inputs.", "Boundary value analysis tests edges."])
+        assert rag.answer("What is boundary value analysis?")["answer"].startswith("Mock answer")
+        assert server.requests["/chat/completions"] == 1
+
+
+def test_base64_embeddings_and_gzip_requests():
+    texts = ["alpha beta " * 100, "gamma"]
+    with MockNebulaServer(dim=16) as server:
+        plain = NebulaBlockClient(base_url=server.base_url, api_key="mock").embed(texts)
+        fast = NebulaBlockClient(
+            base_url=server.base_url, api_key="mock", compress_requests=True, embedding_encoding="base64"
+        ).embed(texts)
+    assert fast.dtype == np.float32 and fast.shape == (2, 16)
+    assert np.array_equal(plain, fast)
+    assert fast[1].tolist() == hashed_embedding("gamma", 16)
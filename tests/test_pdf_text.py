@@ -0,0 +1,75 @@
+"""Tests for page-level PDF extraction and its persistent cache."""
+
+import pytest
+
+from nebularag.utils import pdf_text
+from nebularag.utils.file_utils import extract_text_from_pdf, read_text_files
+from nebularag.utils.pdf_text import PdfTextCache, iter_pdf_pages
+
+EXTRACTED = []
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        EXTRACTED.append(self.text)
+        if self.text == "broken":
+            raise ValueError("bad content stream")
+        return self.text
+
+
+class FakePdfReader:
+    """Treats a file as form-feed separated pages."""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as fh:
+            self.pages = [FakePage(t) for t in fh.read().split("\f")]
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_text, "_pdf_reader", FakePdfReader)
+    EXTRACTED.clear()
+    path = tmp_path / "guide.pdf"
+    path.write_text("\f".join(f"page {i}" for i in range(40)), encoding="utf-8")
+    return path
+
+
+def test_cached_pages_are_not_parsed_again(fake_pdf, tmp_path):
+    cache = PdfTextCache(tmp_path / "cache" / "pdf.sqlite")
+    first = extract_text_from_pdf(fake_pdf, cache, workers=1)
+    assert first.split("\n\n")[:2] == ["page 0", "page 1"]
+    assert len(EXTRACTED) == 40
+
+    # Lazy: consuming one batch extracts nothing new; a full re-read neither
+    assert next(iter_pdf_pages(fake_pdf, cache, workers=1, batch_pages=8)) == "page 0"
+    reopened = PdfTextCache(cache.path)
+    pdf_text._pdf_reader = False  # a fully cached PDF needs no PyPDF2
+    assert extract_text_from_pdf(fake_pdf, reopened) == first
+    assert len(EXTRACTED) == 40
+
+    # Changed contents hash differently and are parsed
+    pdf_text._pdf_reader = FakePdfReader
+    fake_pdf.write_text("new\fpages", encoding="utf-8")
+    assert extract_text_from_pdf(fake_pdf, reopened, workers=1) == "new\n\npages"
+
+
+def test_parallel_extraction_and_directory_reader(fake_pdf, tmp_path, monkeypatch):
+    monkeypatch.setenv("RAG_PDF_CACHE", str(tmp_path / "default.sqlite"))
+    pages = list(iter_pdf_pages(fake_pdf, workers=2, batch_pages=40))
+    assert pages == [f"page {i}" for i in range(40)]
+    docs = read_text_files(str(tmp_path))
+    assert docs == ["\n\n".join(pages)]
+    assert (tmp_path / "default.sqlite").exists()
+
+
+def test_failed_pages_are_not_cached(fake_pdf, tmp_path):
+    cache = PdfTextCache(tmp_path / "pdf.sqlite")
+    fake_pdf.write_text("ok\fbroken", encoding="utf-8")
+    assert list(iter_pdf_pages(fake_pdf, cache, workers=1)) == ["ok", ""]
+    assert cache.get_pages(pdf_text.file_hash(fake_pdf), [0, 1]) == {0: "ok"}
+    EXTRACTED.clear()
+    list(iter_pdf_pages(fake_pdf, cache, workers=1))
+    assert EXTRACTED == ["broken"]
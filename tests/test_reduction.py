@@ -0,0 +1,85 @@
+"""Unit tests for embedding dimension reduction and index persistence."""
+
+import numpy as np
+import pytest
+
+from benchmarks.corpus import generate_embeddings
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.core.reduction import DimensionReducer, PCAReducer, ReducedVectorStore, TruncateReducer
+from nebularag.core.vector_store import InMemoryVectorStore
+
+from .fakes import FakeNebulaClient
+
+
+def _texts(n):
+    return [f"chunk {i}" for i in range(n)]
+
+
+def test_pca_fits_once_enough_vectors_arrive_and_rescoring_recovers_exact_order():
+    # Low-rank data: 8 informative directions embedded in 64 dimensions
+    rng = np.random.default_rng(0)
+    vectors = (rng.standard_normal((400, 8)) @ rng.standard_normal((8, 64))).astype(np.float32)
+    exact = InMemoryVectorStore()
+    exact.add(_texts(400), vectors)
+
+    store = ReducedVectorStore(PCAReducer(8, min_fit_rows=300), rescore_k=20)
+    store.add(_texts(200), vectors[:200])
+    assert not store.reducer.fitted and store.dim == 64
+    store.add(_texts(200), vectors[200:])
+    assert store.reducer.fitted and store.dim == 8 and store.size() == 400
+
+    query = vectors[7] + 0.01
+    assert [i for i, _ in store.search(query, k=5)] == [i for i, _ in exact.search(query, k=5)]
+
+
+def test_failed_fit_stores_nothing():
+    with pytest.raises(ValueError):
+        PCAReducer(16, min_fit_rows=8)
+    store = ReducedVectorStore(PCAReducer(16, min_fit_rows=16), rescore_k=4)
+    store.add(_texts(10), np.eye(10, 8))
+    # 8-wide vectors cannot be projected to 16 dimensions
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            store.add(_texts(10), np.eye(10, 8))
+        assert store.size() == 10 and len(store.texts) == 10 and not store.reducer.fitted
+
+
+def test_truncate_rejects_narrow_vectors():
+    store = ReducedVectorStore(TruncateReducer(16), rescore_k=2)
+    with pytest.raises(ValueError):
+        store.add(["x"], [[1.0] * 8])
+    assert store.size() == 0 and store._full.size() == 0
+    with pytest.raises(TypeError):
+        DimensionReducer(4)
+
+
+def test_index_round_trip_and_model_check(tmp_path):
+    client = FakeNebulaClient()
+    client.embedding_model = "model-a"
+    rag = RAGPipeline(client, chunk_size=100, chunk_overlap=0,
+                      store=ReducedVectorStore(TruncateReducer(16), rescore_k=4))
+    rag.index_texts(["Equivalence partitioning divides inputs.", "Boundary value analysis tests edges."])
+    path = str(tmp_path / "index.npz")
+    rag.save_index(path)
+
+    loaded = RAGPipeline(client, chunk_size=100, chunk_overlap=0, dedup_threshold=0.9)
+    assert loaded.load_index(path) == 2
+    assert loaded.store.texts == rag.store.texts
+    assert loaded.retrieve("boundary value") == rag.retrieve("boundary value")
+    assert loaded.index_texts(["Boundary value analysis tests edges."]) == 0
+
+    client.embedding_model = "model-b"
+    with pytest.raises(ValueError):
+        RAGPipeline(client).load_index(path)
+
+
+def test_flat_index_round_trip(tmp_path):
+    store = InMemoryVectorStore()
+    store.add(_texts(50), generate_embeddings(50, 32))
+    rag = RAGPipeline(FakeNebulaClient(), store=store)
+    path = str(tmp_path / "flat.npz")
+    rag.save_index(path)
+    other = RAGPipeline(FakeNebulaClient(), dedup_threshold=0)
+    other.load_index(path)
+    assert np.allclose(other.store.embeddings, store.embeddings)
+    assert other.store.texts == store.texts
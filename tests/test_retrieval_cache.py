@@ -0,0 +1,55 @@
+"""Tests for the retrieval result cache and its invalidation."""
+
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.utils.cache import TTLCache
+
+from .fakes import FakeNebulaClient
+
+DOCS = [
+    "Black box testing derives tests from specifications.",
+    "White box testing derives tests from the code structure.",
+    "Static analysis finds defects without executing code.",
+]
+
+
+def _pipeline(**kwargs):
+    client = FakeNebulaClient()
+    rag = RAGPipeline(client, chunk_size=200, chunk_overlap=0, top_k=2, cache_size=8, **kwargs)
+    rag.index_texts(DOCS)
+    return rag, client
+
+
+def test_repeated_question_skips_embed_and_search():
+    rag, client = _pipeline()
+    first = rag.retrieve("What is black box testing?")
+    embeds = client.calls["embed"]
+
+    assert rag.retrieve("  what is BLACK box   testing? ") == first
+    assert client.calls["embed"] == embeds
+    assert rag.cache_stats()["hits"] == 1
+
+
+def test_store_mutation_invalidates_cached_results():
+    rag, client = _pipeline()
+    rag.retrieve("static analysis")
+    rag.index_texts(["Static analysis of static analysis tools."])
+    embeds = client.calls["embed"]
+
+    rag.retrieve("static analysis")
+    assert client.calls["embed"] == embeds + 1
+    assert rag.cache_stats()["stale"] == 1
+
+
+def test_entries_expire_after_ttl():
+    now = [0.0]
+    cache = TTLCache(max_entries=2, ttl_s=10, clock=lambda: now[0])
+    cache.put("a", 1, version=1)
+    assert cache.get("a", version=1) == 1
+    now[0] = 11.0
+    assert cache.get("a", version=1) is None
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None
+    assert cache.stats()["evicted"] == 1
@@ -0,0 +1,99 @@
+"""Tests for the warm-index HTTP server."""
+
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from nebularag.cli.server import RAGServer
+from nebularag.core.rag_pipeline import RAGPipeline
+
+from .fakes import FakeNebulaClient
+
+
+@pytest.fixture
+def server():
+    client = FakeNebulaClient()
+    rag = RAGPipeline(client, chunk_size=200, chunk_overlap=0, top_k=3, rerank_k=2)
+    rag.index_texts([
+        "Black box testing derives tests from specifications.",
+        "White box testing derives tests from the code structure.",
+        "Static analysis finds defects without executing code.",
+    ])
+    srv = RAGServer(("127.0.0.1", 0), rag)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _call(srv, path, payload=None):
+    url = "http://%s:%d%s" % (srv.server_address[0], srv.server_address[1], path)
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, method="POST" if data else "GET")
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_answer_retrieve_and_index(server):
+    status, body = _call(server, "/retrieve", {"question": "static analysis", "k": 1})
+    assert status == 200
+    assert body["results"][0]["text"].startswith("Static analysis")
+
+    status, body = _call(server, "/answer", {"question": "What is black box testing?"})
+    assert status == 200
+    assert body["answer"] == "Answer to: What is black box testing?"
+    assert len(body["sources"]) == 2
+
+    status, body = _call(server, "/index", {"texts": ["Regression testing repeats tests."]})
+    assert status == 200
+    assert body == {"indexed": 1, "size": 4}
+
+
+def test_index_docs_must_stay_inside_docs_root(server, tmp_path):
+    root, outside = tmp_path / "docs", tmp_path / "private"
+    for folder in (root / "more", outside):
+        folder.mkdir(parents=True)
+        (folder / "note.md").write_text("Mutation testing changes code.", encoding="utf-8")
+    assert _call(server, "/index", {"docs": str(root)})[0] == 400
+
+    server.docs_root = root.resolve()
+    assert _call(server, "/index", {"docs": "more"}) == (200, {"indexed": 1, "size": 4})
+    for docs in (str(outside), "../private", 5):
+        status, body = _call(server, "/index", {"docs": docs})
+        assert status == 400 and "docs" in body["error"]
+    assert server.rag.store.size() == 4
+
+
+def test_errors_and_metrics(server):
+    assert _call(server, "/answer", {})[0] == 400
+    for bad in (0, -1, "2", 1.5):
+        assert _call(server, "/answer", {"question": "x", "max_context_docs": bad})[0] == 400
+    assert _call(server, "/nope", {"question": "x"})[0] == 404
+    _call(server, "/retrieve", {"question": "testing"})
+
+    status, metrics = _call(server, "/metrics")
+    assert status == 200
+    assert metrics["endpoints"]["/answer"]["errors"] == 5
+    assert metrics["endpoints"]["/retrieve"]["requests"] == 1
+    assert metrics["endpoints"]["/retrieve"]["latency_ms"]["p99"] >= 0
+
+
+def test_bad_content_length_is_rejected(server):
+    server.max_body_bytes = 64
+    for length in ("-5", "abc", "65"):
+        conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+        conn.putrequest("POST", "/retrieve")
+        conn.putheader("Content-Length", length)
+        conn.endheaders()
+        response = conn.getresponse()
+        assert response.status == 400 and "Content-Length" in json.loads(response.read())["error"]
+        conn.close()
+    assert _call(server, "/retrieve", {"question": "testing"})[0] == 200
@@ -0,0 +1,108 @@
+"""Tests for the multi-process sharded vector store."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from benchmarks.corpus import generate_embeddings
+from nebularag.core.persistence import load_index, save_index
+from nebularag.core.sharded_store import ShardedVectorStore
+from nebularag.core.vector_store import InMemoryVectorStore
+
+
+def test_sharded_search_matches_single_store(tmp_path):
+    embeddings = generate_embeddings(500, 32, n_clusters=8)
+    texts = [f"chunk {i}" for i in range(500)]
+    exact = InMemoryVectorStore()
+    exact.add(texts, embeddings)
+    with ShardedVectorStore(3) as sharded:
+        sharded.add(texts[:200], embeddings[:200])
+        sharded.add(texts[200:], embeddings[200:])
+        assert sharded.size() == 500
+        np.testing.assert_allclose(sharded.embeddings, exact.embeddings, rtol=1e-6)
+        for q in embeddings[:10]:
+            assert [i for i, _ in sharded.search(q, k=7)] == [i for i, _ in exact.search(q, k=7)]
+        with pytest.raises(ValueError):
+            sharded.search(np.ones(5), k=3)
+
+        path = tmp_path / "sharded.npz"
+        save_index(str(path), sharded, {})
+    loaded, _ = load_index(str(path))
+    try:
+        assert isinstance(loaded, ShardedVectorStore) and loaded.num_shards == 3
+        assert loaded.texts == texts
+        assert loaded.search(embeddings[0], k=1)[0][0] == 0
+    finally:
+        loaded.close()
+
+
+def test_concurrent_searches_only_see_committed_rows():
+    embeddings = generate_embeddings(300, 16, n_clusters=4)
+    with ShardedVectorStore(2) as sharded:
+        sharded.add([f"chunk {i}" for i in range(100)], embeddings[:100])
+        errors = []
+
+        def reader():
+            try:
+                for q in embeddings[:40]:
+                    size = sharded.size()
+                    for i, _ in sharded.search(q, k=5):
+                        assert sharded.texts[i] == f"chunk {i}" and i < sharded.size() >= size
+            except Exception as e:  # surfaced in the main thread
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for start in range(100, 300, 50):
+            sharded.add([f"chunk {i}" for i in range(start, start + 50)], embeddings[start:start + 50])
+        for thread in threads:
+            thread.join()
+        assert not errors and sharded.size() == 300
+
+
+def test_uncommitted_rows_are_hidden_and_rolled_back():
+    embeddings = generate_embeddings(12, 8, n_clusters=2)
+    with ShardedVectorStore(2) as sharded:
+        sharded.add([f"chunk {i}" for i in range(10)], embeddings[:10])
+        # What a failed add leaves behind: rows on one shard, no texts
+        sharded._scatter([("add", np.array([10]), embeddings[10:11]), ("add", np.array([], dtype=np.int64),
+                                                                    np.zeros((0, 8), dtype=np.float32))])
+        assert all(i < 10 for i, _ in sharded.search(embeddings[10], k=10))
+        sharded._rollback(10)
+        assert sharded.embeddings.shape == (10, 8)
+        sharded.add(["chunk 10", "chunk 11"], embeddings[10:])
+        assert sharded.search(embeddings[11], k=1)[0][0] == 11
+
+        sharded._procs[1].terminate()
+        sharded._procs[1].join()
+        with pytest.raises(RuntimeError):
+            sharded.add(["lost"], embeddings[:1])
+        assert sharded.size() == 12
+        with pytest.raises(RuntimeError, match="unusable"):
+            sharded.search(embeddings[0], k=1)
+
+
+def test_snapshot_search_ignores_later_adds_and_clears():
+    embeddings = generate_embeddings(20, 8, n_clusters=2)
+    with ShardedVectorStore(2) as sharded:
+        sharded.add([f"chunk {i}" for i in range(10)], embeddings[:10])
+        snap = sharded.snapshot()
+        sharded.add([f"chunk {i}" for i in range(10, 20)], embeddings[10:])
+        hits = sharded.search_snapshot(snap, embeddings[15], k=20)
+        assert len(hits) == 10 and all(snap.texts[i] == f"chunk {i}" for i, _ in hits)
+        sharded.clear()
+        assert sharded.search_snapshot(snap, embeddings[0], k=5) == [] and snap.texts[3] == "chunk 3"
+
+
+def test_add_with_a_bad_text_rolls_the_shards_back():
+    embeddings = generate_embeddings(6, 8, n_clusters=2)
+    with ShardedVectorStore(2) as sharded:
+        sharded.add(["chunk 0", "chunk 1"], embeddings[:2])
+        with pytest.raises(TypeError):
+            sharded.add(["chunk 2", 3], embeddings[2:4])
+        assert sharded.size() == 2 and len(sharded.texts) == 2
+        assert sum(len(ids) for ids, _ in sharded._scatter([("dump",)] * 2)) == 2
+        sharded.add(["chunk 2", "chunk 3"], embeddings[2:4])
+        assert sharded.search(embeddings[3], k=1)[0][0] == 3 and sharded.texts[3] == "chunk 3"
@@ -0,0 +1,54 @@
+"""Tests for the process-wide shared index registry."""
+
+import gc
+
+from nebularag.core.shared_index import SharedIndexRegistry
+
+from .fakes import FakeNebulaClient
+
+DOCS = [f"Document {i} talks about topic {i} and testing." for i in range(5)]
+
+
+def _registry(client, reads, **kwargs):
+    def reader(path):
+        reads.append(path)
+        return DOCS
+
+    return SharedIndexRegistry(client, reader=reader, batch_docs=2, **kwargs)
+
+
+def test_sessions_share_one_build_and_keep_own_query_settings(tmp_path):
+    client = FakeNebulaClient()
+    reads = []
+    registry = _registry(client, reads)
+    first = registry.acquire(str(tmp_path), 200, 0)
+    second = registry.acquire(str(tmp_path / "." ), 200, 0)
+    assert first.index is second.index
+    assert first.index.wait(5) and first.index.ready
+    assert len(reads) == 1 and client.calls["embed"] == 3
+    assert first.index.progress == 1.0 and first.index.chunks == 5
+
+    a = first.session_pipeline(top_k=2, rerank_k=1)
+    b = second.session_pipeline(top_k=4, rerank_k=2)
+    assert a.store is b.store and (a.top_k, b.top_k) == (2, 4)
+    assert len(a.retrieve("topic 3")) == 2
+
+    other = registry.acquire(str(tmp_path), 300, 0)
+    assert other.index is not first.index
+    assert other.index.wait(5) and len(reads) == 2
+
+
+def test_unreferenced_indexes_are_evicted(tmp_path):
+    registry = _registry(FakeNebulaClient(), [], max_idle=1)
+    lease = registry.acquire(str(tmp_path), 200, 0)
+    lease.index.wait(5)
+    lease.release()
+    lease.release()
+    assert registry.stats()[0]["refs"] == 0  # kept as the one idle index
+
+    other = registry.acquire(str(tmp_path), 300, 0)
+    other.index.wait(5)
+    del other
+    gc.collect()
+    # Releasing the second (via garbage collection) evicts the older idle one
+    assert [s["chunk_size"] for s in registry.stats()] == [300]
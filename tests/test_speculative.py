@@ -0,0 +1,88 @@
+"""Tests for speculative chat while reranking."""
+
+import time
+
+from nebularag.core.rag_pipeline import RAGPipeline
+
+from .fakes import FakeNebulaClient
+
+DOCS = [
+    "Black box testing derives tests from specifications.",
+    "White box testing derives tests from the code structure.",
+    "Static analysis finds defects without executing code.",
+    "Reviews find defects early in requirements.",
+]
+
+
+class ReorderingClient(FakeNebulaClient):
+    """Reranker that is slow and, when told to, prefers the last candidates."""
+
+    def __init__(self, reverse):
+        super().__init__()
+        self.reverse = reverse
+
+    def rerank(self, query, documents, top_n=None, return_documents=False):
+        time.sleep(0.05)
+        results = super().rerank(query, documents, top_n)
+        if self.reverse:
+            n = len(documents)
+            results = [{"index": n - 1 - r["index"], "relevance_score": r["relevance_score"]} for r in results]
+        return results
+
+
+def _pipeline(reverse):
+    rag = RAGPipeline(ReorderingClient(reverse), chunk_size=200, chunk_overlap=0, top_k=4, rerank_k=2,
+                      speculative=True)
+    rag.index_texts(DOCS)
+    return rag
+
+
+def test_agreeing_rerank_reuses_speculative_answer():
+    rag = _pipeline(reverse=False)
+    plain = RAGPipeline(ReorderingClient(False), chunk_size=200, chunk_overlap=0, top_k=4, rerank_k=2)
+    plain.index_texts(DOCS)
+    result = rag.answer("Which testing derives tests from specifications?")
+    assert result == plain.answer("Which testing derives tests from specifications?")
+    assert rag.client.calls["chat"] == 1
+    assert rag.speculation_stats()["hits"] == 1
+
+
+def test_disagreeing_rerank_discards_speculation_and_counts_spend():
+    rag = _pipeline(reverse=True)
+    result = rag.answer("Which testing derives tests from specifications?")
+    dense = [i for i, _ in rag.retrieve("Which testing derives tests from specifications?")]
+    assert result["indices"] == [dense[-1], dense[-2]]
+    stats = rag.speculation_stats()
+    assert stats["misses"] == 1 and stats["hit_rate"] == 0.0
+    # The draft chat started during the slow rerank, so it could not be cancelled
+    assert rag.client.calls["chat"] == 2
+    assert stats["wasted_chat_calls"] == 1 and stats["wasted_prompt_chars"] > 0
+
+
+class FlakyChatClient(ReorderingClient):
+    """Chat fails on its first call only."""
+
+    def chat(self, messages, **kwargs):
+        if not self.calls["chat"]:
+            self.calls["chat"] += 1
+            raise RuntimeError("draft failed")
+        return super().chat(messages, **kwargs)
+
+
+def test_failed_draft_falls_back_to_a_fresh_chat():
+    rag = RAGPipeline(FlakyChatClient(False), chunk_size=200, chunk_overlap=0, top_k=4, rerank_k=2,
+                      speculative=True)
+    rag.index_texts(DOCS)
+    result = rag.answer("Which testing derives tests from specifications?")
+    assert result["answer"] and rag.client.calls["chat"] == 2
+    assert rag.speculation_stats()["misses"] == 1
+
+
+def test_saturated_pool_skips_speculation():
+    rag = _pipeline(reverse=True)
+    while rag._speculation_slots.acquire(blocking=False):
+        pass
+    rag.answer("Which testing derives tests from specifications?")
+    stats = rag.speculation_stats()
+    assert stats["skipped"] == 1 and stats["hits"] + stats["misses"] == 0
+    assert rag.client.calls["chat"] == 1
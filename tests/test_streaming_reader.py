@@ -0,0 +1,83 @@
+"""Tests for block-wise file reading and streaming chunking."""
+
+import random
+
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.utils.file_utils import iter_text_blocks
+from nebularag.utils.text_processing import iter_chunks, iter_stream_chunks
+from nebularag.utils.tokenization import RegexTokenizer
+
+from .fakes import FakeNebulaClient
+
+
+def _document(n_words, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(n_words):
+        r = rng.random()
+        if r < 0.05:
+            parts.append("\n\n# Heading\n")
+        elif r < 0.1:
+            parts.append("\n\n")
+        else:
+            parts.append(rng.choice(["alpha", "beta", "gamma.", "delta!", "testing"]) + " ")
+    return "".join(parts)
+
+
+def test_stream_chunks_match_whole_text_across_block_sizes():
+    text = _document(4000)
+    for tokenizer in (None, RegexTokenizer()):
+        expected = list(iter_chunks(text, 200, 40, tokenizer))
+        for block in (1, 97, 5000):
+            blocks = (text[i:i + block] for i in range(0, len(text), block))
+            assert list(iter_stream_chunks(blocks, 200, 40, tokenizer)) == expected
+
+
+def test_blocks_keep_split_characters_and_fall_back_on_bad_bytes(tmp_path):
+    path = tmp_path / "mixed.txt"
+    good = "naïve café " * 50
+    path.write_bytes(b"\xef\xbb\xbf" + good.encode("utf-8") + b"price \x80 5")
+    blocks = list(iter_text_blocks(path, block_size=7))
+    assert len(blocks) > 10
+    # UTF-8 part intact (BOM dropped); the rest decoded as cp1252
+    assert "".join(blocks) == good + "price € 5"
+
+
+def test_blocks_translate_line_endings_split_between_reads(tmp_path):
+    path = tmp_path / "crlf.txt"
+    text = _document(500, seed=2)
+    path.write_bytes(text.replace("\n", "\r\n").encode("utf-8") + b"old mac\rend\r")
+    for block in (1, 2, 3, 64):
+        assert "".join(iter_text_blocks(path, block_size=block)) == text + "old mac\nend\n"
+
+
+def test_index_files_streams_large_files_in_batches(tmp_path):
+    text = _document(3000, seed=1)
+    (tmp_path / "big.md").write_text(text, encoding="utf-8")
+    client = FakeNebulaClient()
+    rag = RAGPipeline(client, chunk_size=200, chunk_overlap=40, dedup_threshold=None)
+    indexed = rag.index_files(str(tmp_path), batch_chunks=16, block_size=512)
+    expected = [c.text for c in iter_chunks(text, 200, 40)]
+    assert indexed == len(expected) and rag.store.texts == expected
+    assert client.calls["embed"] == -(-len(expected) // 16)
+
+
+def test_index_files_skips_broken_pdfs_and_uses_the_pdf_cache(tmp_path, monkeypatch):
+    import nebularag.core.rag_pipeline as rag_pipeline
+
+    (tmp_path / "good.md").write_text("Regression testing repeats tests.", encoding="utf-8")
+    (tmp_path / "broken.pdf").write_bytes(b"%PDF-garbage")
+    sentinel = object()
+    seen = []
+
+    def fake_blocks(path, block_size, pdf_cache=None):
+        seen.append(pdf_cache)
+        if str(path).endswith(".pdf"):
+            raise RuntimeError("EOF marker not found")  # what PyPDF2 raises is a plain Exception
+        yield path.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(rag_pipeline, "default_pdf_cache", lambda: sentinel)
+    monkeypatch.setattr(rag_pipeline, "iter_file_blocks", fake_blocks)
+    rag = RAGPipeline(FakeNebulaClient(), chunk_size=200, chunk_overlap=0)
+    assert rag.index_files(str(tmp_path)) == 1
+    assert sentinel in seen
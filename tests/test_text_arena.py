@@ -0,0 +1,72 @@
+"""Tests for arena-backed chunk text storage."""
+
+import numpy as np
+
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.core.text_arena import TextArena
+from nebularag.utils.text_processing import Chunk, iter_chunks
+
+from .fakes import FakeNebulaClient
+
+TEXT = ("Équivalence partitioning groups inputs. " * 30 + "\n\n") * 5
+
+
+def test_overlapping_chunks_share_bytes():
+    chunks = list(iter_chunks(TEXT, chunk_size=200, chunk_overlap=60))
+    arena = TextArena()
+    arena.extend(chunks)
+
+    assert list(arena) == [c.text for c in chunks]
+    assert arena[-1] == chunks[-1].text and arena[1:3] == [c.text for c in chunks[1:3]]
+    assert len(arena.data) < sum(len(c.text.encode("utf-8")) for c in chunks) * 0.8
+
+
+def test_unrelated_chunks_are_not_merged():
+    arena = TextArena()
+    arena.extend([Chunk(0, 11, "hello world"), Chunk(6, 15, "wide open"), "plain"])
+    assert arena == ["hello world", "wide open", "plain"]
+
+
+def test_bulk_copy_and_buffer_round_trip():
+    arena = TextArena()
+    arena.extend(["a", "βγ", ""])
+    copy = TextArena()
+    copy.extend(["x"])
+    copy.extend(arena)
+    assert copy == ["x", "a", "βγ", ""]
+
+    restored = TextArena.from_buffer(copy.data.copy(), copy.spans)
+    assert restored == copy
+    try:
+        TextArena.from_buffer(b"ab", np.array([[0, 3]]))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("span past the buffer was accepted")
+
+
+def test_from_buffer_appends_behind_the_shared_buffer():
+    data = np.frombuffer("abβ".encode("utf-8"), dtype=np.uint8)
+    restored = TextArena.from_buffer(data, np.array([[0, 2], [2, 4]]))
+    restored.extend([Chunk(0, 2, "cd"), Chunk(1, 3, "de")])
+    assert restored == ["ab", "β", "cd", "de"]
+    assert restored.data.tobytes() == "abβcde".encode("utf-8")
+
+    store_texts = TextArena()
+    store_texts.extend(restored)
+    assert store_texts._base.obj is restored._base.obj
+    store_texts.extend(["e"])
+    assert store_texts == ["ab", "β", "cd", "de", "e"] and store_texts.nbytes - store_texts._spans.nbytes == 8
+
+
+def test_pipeline_stores_chunks_in_arena(tmp_path):
+    rag = RAGPipeline(FakeNebulaClient(), chunk_size=200, chunk_overlap=60, dedup_threshold=None)
+    rag.index_texts([TEXT])
+    assert isinstance(rag.store.texts, TextArena)
+    assert list(rag.store.texts) == [c.text for c in iter_chunks(TEXT, 200, 60)]
+
+    path = str(tmp_path / "index.npz")
+    rag.save_index(path)
+    other = RAGPipeline(FakeNebulaClient(), chunk_size=200, chunk_overlap=60)
+    other.load_index(path)
+    assert other.store.texts == rag.store.texts
@@ -0,0 +1,95 @@
+"""Unit tests for the text splitting utilities."""
+
+import pytest
+
+from nebularag.utils.text_processing import iter_chunks, split_text
+from nebularag.utils.tokenization import RegexTokenizer, Tokenizer
+
+
+SAMPLE = (
+    "# Testing\n\n"
+    "Testing finds defects. It also builds confidence in quality!\n\n"
+    "## Principles\n\n"
+    "Exhaustive testing is impossible. Early testing saves time and money. "
+    "Defects cluster together.\n"
+)
+
+
+def test_chunks_report_source_offsets():
+    for chunk in iter_chunks(SAMPLE, chunk_size=60, chunk_overlap=10):
+        assert SAMPLE[chunk.start:chunk.end] == chunk.text
+        assert chunk.text == chunk.text.strip()
+        assert len(chunk.text) <= 60
+
+
+def test_chunks_end_on_sentence_or_structure_boundaries():
+    for chunk in split_text(SAMPLE, chunk_size=80, chunk_overlap=0):
+        assert chunk.endswith((".", "!", "?", "Testing", "Principles"))
+
+
+def test_words_are_not_broken_when_whitespace_exists():
+    text = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+    words = set(text.split())
+    for chunk in split_text(text, chunk_size=16, chunk_overlap=6):
+        assert set(chunk.split()) <= words
+
+
+def test_consecutive_chunks_overlap():
+    text = " ".join(f"word{i}" for i in range(200))
+    chunks = list(iter_chunks(text, chunk_size=100, chunk_overlap=20))
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt.start < prev.end < nxt.end
+
+
+def test_short_first_chunk_does_not_skip_the_document():
+    # The first chunk ends before chunk_overlap; the next must start right after it
+    text = "Hi. " + "word " * 300
+    chunks = list(iter_chunks(text))
+    assert chunks[0].text == "Hi." and chunks[1].start == 4
+    covered = set()
+    for chunk in chunks:
+        covered.update(range(chunk.start, chunk.end))
+    assert all(i in covered for i, ch in enumerate(text) if not ch.isspace())
+
+
+def test_text_without_boundaries_is_hard_cut():
+    text = "x" * 250
+    chunks = split_text(text, chunk_size=100, chunk_overlap=10)
+    assert "".join(chunks) == text
+
+
+def test_empty_and_invalid_input():
+    assert split_text("   \n\n  ") == []
+    with pytest.raises(ValueError):
+        split_text("abc", chunk_size=10, chunk_overlap=10)
+    with pytest.raises(ValueError):
+        split_text("abc", chunk_size=0, chunk_overlap=0)
+
+
+def test_token_mode_respects_token_budget():
+    tokenizer = RegexTokenizer()
+    text = SAMPLE * 5
+    chunks = split_text(text, chunk_size=20, chunk_overlap=4, tokenizer=tokenizer)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert tokenizer.count_tokens(chunk) <= 20
+
+
+def test_tokenizer_subclasses_must_implement_token_offsets():
+    class Incomplete(Tokenizer):
+        pass
+
+    class Words(Tokenizer):
+        def token_offsets(self, text):
+            return [0, 4] if text else []
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert Words().count_tokens("two words") == 2
+
+
+def test_tokenizer_vocab_is_used(tmp_path):
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("test\ning\nĠtest\n", encoding="utf-8")
+    tokenizer = RegexTokenizer(str(vocab))
+    assert tokenizer.token_offsets("testing testing") == [0, 4, 7, 12]
@@ -0,0 +1,47 @@
+"""Tests for latency tracing and metric export."""
+
+from nebularag.core.rag_pipeline import RAGPipeline
+from nebularag.utils.tracing import NULL_TRACER, Histogram, Tracer
+
+from .fakes import FakeNebulaClient
+
+
+def test_histogram_percentiles_are_close():
+    hist = Histogram()
+    for ms in range(1, 1001):
+        hist.observe(ms / 1000)
+    assert abs(hist.percentile(0.50) - 0.5) < 0.05
+    assert abs(hist.percentile(0.99) - 0.99) < 0.1
+    assert hist.percentile(1.0) <= hist.max
+
+
+def test_pipeline_stages_are_traced_and_exported():
+    seen = []
+    tracer = Tracer(sinks=[seen.append])
+    rag = RAGPipeline(FakeNebulaClient(), chunk_size=200, chunk_overlap=0, tracer=tracer)
+    rag.index_texts(["Reviews are a form of static testing.", "Dynamic testing runs the code."])
+    rag.answer("What is static testing?")
+
+    summary = tracer.summary()
+    for stage in ("index.split", "index.embed", "embed", "search", "rerank", "context", "chat", "answer"):
+        assert summary[stage]["count"] == 1
+    assert summary["index.embed"]["items"] == 2
+    assert {span.name for span in seen} >= {"embed", "chat"}
+
+    text = tracer.render_prometheus()
+    assert 'nebularag_span_seconds_count{span="chat"} 1' in text
+    assert 'nebularag_span_seconds_bucket{span="chat",le="+Inf"} 1' in text
+
+
+def test_errors_are_counted_and_null_tracer_is_inert():
+    tracer = Tracer()
+    try:
+        with tracer.span("http"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert tracer.summary()["http"]["errors"] == 1
+
+    with NULL_TRACER.span("http", endpoint="/x") as span:
+        span.set("bytes_sent", 10)
+    assert NULL_TRACER.summary() == {}
@@ -0,0 +1,54 @@
+"""Unit tests for the in-memory vector store search modes."""
+
+import numpy as np
+import pytest
+
+from benchmarks.corpus import generate_embeddings
+from nebularag.core.vector_store import InMemoryVectorStore, hamming_distances, sign_codes
+
+
+def test_hamming_distance_of_sign_codes():
+    a = np.array([[1.0, -1.0, 1.0] + [0.5] * 70])
+    b = np.array([[-1.0, -1.0, 1.0] + [0.5] * 69 + [-0.5]])
+    codes = sign_codes(np.vstack([a, b]))
+    assert codes.shape == (2, 2) and codes.dtype == np.uint64
+    assert hamming_distances(codes, codes[0]).tolist() == [0, 2]
+
+
+def test_binary_prefilter_keeps_result_contract():
+    embeddings = generate_embeddings(2000, 64, n_clusters=16)
+    exact = InMemoryVectorStore()
+    fast = InMemoryVectorStore(binary_prefilter=True, shortlist_factor=50, min_shortlist=1)
+    texts = [str(i) for i in range(2000)]
+    for store in (exact, fast):
+        store.add(texts[:1000], embeddings[:1000])
+        store.add(texts[1000:], embeddings[1000:])
+
+    for q in embeddings[:20]:
+        expected = exact.search(q, k=5)
+        got = fast.search(q, k=5)
+        assert got[0][0] == expected[0][0]
+        assert [s for _, s in got] == sorted((s for _, s in got), reverse=True)
+
+
+def test_threaded_block_search_matches_single_scan():
+    embeddings = generate_embeddings(3000, 32, n_clusters=8)
+    embeddings[10] = embeddings[2500]  # tie across blocks keeps index order
+    single = InMemoryVectorStore()
+    threaded = InMemoryVectorStore(search_threads=3, block_rows=700)
+    for store in (single, threaded):
+        store.add([""] * 3000, embeddings)
+
+    for q in embeddings[[0, 10, 1500, 2999]]:
+        assert threaded.search(q, k=8) == single.search(q, k=8)
+
+
+def test_failed_add_leaves_texts_and_vectors_aligned():
+    store = InMemoryVectorStore()
+    store.add(["a"], [[1.0, 0.0]])
+    with pytest.raises(TypeError):
+        store.add(["b", 5], [[0.0, 1.0], [1.0, 1.0]])
+    store.add(["c"], [[1.0, 1.0]])
+    assert store.size() == len(store.texts) == 2
+    i, _ = store.search([1.0, 1.0], k=1)[0]
+    assert store.texts[i] == "c"